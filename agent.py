@@ -1,6 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from events import DELETE, INSERT, UPDATE
+from live_search import FIRST_RESULTS, LiveSearch
+from presenters import format_agent_rows, parse_number
+from virtual_tree import VirtualTreeview
+
 
 class AgentTab:
     def __init__(self, parent, database, app):
@@ -17,13 +22,15 @@ class AgentTab:
         self.agent_commission_var = tk.StringVar()
         self.agent_search_var = tk.StringVar()
 
-        # Create the tab UI
-        self.create_tab()
+        # Add the tab's frame now; its widgets and data are built when it is first shown
+        self.frame = ttk.Frame(self.parent)
+        self.parent.add(self.frame, text="Agent Registration")
+        self.built = False
 
     def create_tab(self):
-        """Create the Agent Registration tab UI"""
-        agent_frame = ttk.Frame(self.parent)
-        self.parent.add(agent_frame, text="Agent Registration")
+        """Create the Agent Registration tab UI and load its data (called when the tab is first shown)"""
+        self.built = True
+        agent_frame = self.frame
 
         # Left frame for agent entry
         left_frame = ttk.Frame(agent_frame)
@@ -99,20 +106,31 @@ class AgentTab:
         search_frame.pack(fill=tk.X, pady=5)
 
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
-        ttk.Entry(search_frame, textvariable=self.agent_search_var, width=20).pack(
+        search_entry = ttk.Entry(search_frame, textvariable=self.agent_search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        # Search as the user types, once typing pauses
+        self.agent_search = LiveSearch(search_entry, self.agent_search_var, self.search_agents)
+        search_entry.bind("<Return>", self.agent_search.run)
+        ttk.Button(search_frame, text="Search", command=self.agent_search.run).pack(
+            side=tk.LEFT, padx=5
+        )
+        ttk.Button(search_frame, text="Show All", command=self.agent_search.clear).pack(
             side=tk.LEFT, padx=5
         )
-        ttk.Button(search_frame, text="Search", command=self.search_agents).pack(
+        ttk.Button(search_frame, text="Export", command=self.export_agents).pack(
             side=tk.LEFT, padx=5
         )
-        ttk.Button(search_frame, text="Show All", command=self.load_agents).pack(
+        ttk.Button(search_frame, text="Import", command=self.import_agents).pack(
             side=tk.LEFT, padx=5
         )
 
         # Treeview for agent listing
         columns = ("id", "name", "phone", "email", "license", "join_date", "commission")
-        self.agent_tree = ttk.Treeview(
-            right_frame, columns=columns, show="headings", height=15
+        # Only the rows on screen exist as Tk items; the rest are fetched as the list scrolls
+        self.agent_tree = VirtualTreeview(
+            right_frame, format_agent_rows, self.app.executor, self.app.show_error,
+            changes=lambda after_seq: self.db.get_changes("agents", after_seq), sort_column="name",
+            columns=columns, show="headings", height=15,
         )
 
         # Define headings
@@ -146,6 +164,9 @@ class AgentTab:
         # Bind select event
         self.agent_tree.bind("<<TreeviewSelect>>", self.agent_selected)
 
+        # Follow changes made on any tab; applied once per burst, while the tab is shown
+        self.app.events.subscribe(("agents",), self.records_changed, agent_frame)
+
         # Load data
         self.load_agents()
 
@@ -162,19 +183,20 @@ class AgentTab:
             return
 
         try:
-            commission_rate = float(commission_rate) if commission_rate else 0
+            commission_rate = parse_number(commission_rate, "Commission rate")
+        except ValueError as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            return
 
-            self.db.add_agent(name, phone, email, license_number, commission_rate)
+        def agent_added(agent_id):
+            self.app.events.publish("agents", agent_id, INSERT)
             self.clear_fields()
-            self.load_agents()
-
-            # Update comboboxes in other tabs
-            self.app.property_tab.update_agent_combo()
-            self.app.inquiry_tab.update_agent_combo()
 
             messagebox.showinfo("Success", "Agent added successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+        self.app.run_in_background(
+            self.db.add_agent, name, phone, email, license_number, commission_rate, on_success=agent_added
+        )
 
     def update_agent(self):
         """Update an existing agent in the database"""
@@ -195,20 +217,26 @@ class AgentTab:
             return
 
         try:
-            commission_rate = float(commission_rate) if commission_rate else 0
-
-            self.db.update_agent(
-                agent_id, name, phone, email, license_number, commission_rate
-            )
-            self.load_agents()
+            commission_rate = parse_number(commission_rate, "Commission rate")
+        except ValueError as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            return
 
-            # Update comboboxes in other tabs
-            self.app.property_tab.update_agent_combo()
-            self.app.inquiry_tab.update_agent_combo()
+        def agent_updated(_):
+            self.app.events.publish("agents", int(agent_id), UPDATE)
 
             messagebox.showinfo("Success", "Agent updated successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+        self.app.run_in_background(
+            self.db.update_agent,
+            agent_id,
+            name,
+            phone,
+            email,
+            license_number,
+            commission_rate,
+            on_success=agent_updated,
+        )
 
     def delete_agent(self):
         """Delete an agent from the database"""
@@ -226,87 +254,51 @@ class AgentTab:
         if not confirm:
             return
 
-        try:
-            self.db.delete_agent(agent_id)
+        def agent_deleted(_):
+            # Their listings and inquiries are now unassigned; those tabs refresh too
+            self.app.events.publish("agents", int(agent_id), DELETE)
             self.clear_fields()
-            self.load_agents()
-
-            # Update comboboxes in other tabs
-            self.app.property_tab.update_agent_combo()
-            self.app.inquiry_tab.update_agent_combo()
-
-            # Refresh other tabs
-            self.app.property_tab.load_properties()
-            self.app.inquiry_tab.load_inquiries()
 
             messagebox.showinfo("Success", "Agent deleted successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+        self.app.run_in_background(self.db.delete_agent, agent_id, on_success=agent_deleted)
 
     def load_agents(self):
         """Load all agents into the treeview"""
-        # Clear existing data
-        for i in self.agent_tree.get_children():
-            self.agent_tree.delete(i)
+        self.agent_tree.load(self.db.get_agent_ids, self.db.get_agents_by_ids)
 
-        # Load data from database
-        agents = self.db.get_agents()
+    def refresh_agents(self):
+        """Apply agent changes to the treeview without reloading it"""
+        self.agent_tree.refresh()
 
-        for row in agents:
-            # Format commission rate
-            commission_formatted = (
-                f"{float(row[6]):.1f}%" if row[6] is not None else "0.0%"
-            )
+    def records_changed(self, events):
+        """Bring the tab up to date after agents changed"""
+        self.refresh_agents()
 
-            # Add to treeview
-            self.agent_tree.insert(
-                "",
-                "end",
-                values=(
-                    row[0],
-                    row[1],
-                    row[2] or "",
-                    row[3] or "",
-                    row[4] or "",
-                    row[5],
-                    commission_formatted,
-                ),
-            )
+    def search_agents(self, search_term, cancel):
+        """Search agents by name, email, or license number
 
-    def search_agents(self):
-        """Search agents by name, email, or license number"""
-        search_term = self.agent_search_var.get()
+        Called by the live search; cancel is set once the term changes again.
+        """
         if not search_term:
             self.load_agents()
             return
 
-        # Clear existing data
-        for i in self.agent_tree.get_children():
-            self.agent_tree.delete(i)
-
-        # Search agents
-        agents = self.db.search_agents(search_term)
+        # Show the first matches straight away, then the rest of the ids
+        self.agent_tree.load(
+            lambda: self.db.search_agent_ids(search_term, cancel=cancel),
+            self.db.get_agents_by_ids,
+            incremental=False,
+            first_ids=lambda: self.db.search_agent_ids(search_term, FIRST_RESULTS, cancel),
+        )
 
-        for row in agents:
-            # Format commission rate
-            commission_formatted = (
-                f"{float(row[6]):.1f}%" if row[6] is not None else "0.0%"
-            )
+    def export_agents(self):
+        """Export the agents matching the current search to a file"""
+        self.app.export_table("agents", search=self.agent_search_var.get())
 
-            # Add to treeview
-            self.agent_tree.insert(
-                "",
-                "end",
-                values=(
-                    row[0],
-                    row[1],
-                    row[2] or "",
-                    row[3] or "",
-                    row[4] or "",
-                    row[5],
-                    commission_formatted,
-                ),
-            )
+    def import_agents(self):
+        """Import agents from a CSV file"""
+        self.app.import_file("agents")
 
     def agent_selected(self, event):
         """Handle agent selection in the treeview"""
@@ -316,17 +308,22 @@ class AgentTab:
             agent_id = self.agent_tree.item(selected_item, "values")[0]
 
             # Get agent details from database
-            agent_data = self.db.get_agent(agent_id)
-            if agent_data:
-                # Clear current fields
-                self.clear_fields()
-
-                # Populate fields with selected agent data
-                self.agent_name_var.set(agent_data[1])
-                self.agent_phone_var.set(agent_data[2] or "")
-                self.agent_email_var.set(agent_data[3] or "")
-                self.agent_license_var.set(agent_data[4] or "")
-                self.agent_commission_var.set(agent_data[6] or 0)
+            self.app.run_in_background(
+                self.db.get_agent, agent_id, key=(self, "selected"), on_success=self.show_agent
+            )
+
+    def show_agent(self, agent_data):
+        """Populate the input fields with an agent row"""
+        if agent_data:
+            # Clear current fields
+            self.clear_fields()
+
+            # Populate fields with selected agent data
+            self.agent_name_var.set(agent_data[1])
+            self.agent_phone_var.set(agent_data[2] or "")
+            self.agent_email_var.set(agent_data[3] or "")
+            self.agent_license_var.set(agent_data[4] or "")
+            self.agent_commission_var.set(agent_data[6] or 0)
 
     def clear_fields(self):
         """Clear all input fields"""
@@ -5,12 +5,25 @@ from property import PropertyTab
 from agent import AgentTab
 from inquiry import InquiryTab
 from marketing import MarketingTab # Import the marketing tab
+from dashboard import DashboardTab
+from db_worker import QueryExecutor
+from events import BULK, EventBus
+
+# Milliseconds after the first tab is shown before the other tabs are built in the background
+PREFETCH_DELAY = 500
 
 class RealEstateApp:
-    def __init__(self, root, database):
-        """Initialize the main application"""
+    def __init__(self, root, database, prefetch=True):
+        """Initialize the main application
+
+        Tabs are built, and load their data, the first time they are shown.
+        With prefetch the remaining tabs are then built one at a time while
+        the window is idle, so switching to them is instant.
+        """
         self.root = root
         self.db = database
+        self.prefetch = prefetch
+        self._prefetching = False
 
         # Configure the main window
         self.root.title("Real Estate Management System")
@@ -20,18 +33,56 @@ class RealEstateApp:
         # Set application style
         self.configure_styles()
 
+        # Add a status bar (packed first so it keeps its place at the bottom)
+        self.create_status_bar()
+
+        # Run database calls off the Tk thread; results come back via root.after
+        self.executor = QueryExecutor(self.root, on_busy=self.set_busy)
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+
+        # Row changes are published here; each tab subscribes to the tables it shows
+        self.events = EventBus(self.root)
+
         # Create notebook for tabs
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Initialize tabs
+        # Initialize tabs (only their frames; see build_tab)
         self.property_tab = PropertyTab(self.notebook, self.db, self)
         self.agent_tab = AgentTab(self.notebook, self.db, self)
         self.inquiry_tab = InquiryTab(self.notebook, self.db, self)
         self.marketing_tab = MarketingTab(self.notebook, self.db, self)  # Add this line
+        self.dashboard_tab = DashboardTab(self.notebook, self.db, self)
+        self.tabs = [self.property_tab, self.agent_tab, self.inquiry_tab, self.marketing_tab, self.dashboard_tab]
 
-        # Add a status bar
-        self.create_status_bar()
+        # Build the selected tab now and the others when they are first shown
+        self.notebook.bind("<<NotebookTabChanged>>", self.tab_changed)
+        self.tab_changed()
+
+        # Listings from before the location columns get theirs in the background,
+        # and inquiries from before duplicate detection their contact keys
+        self.backfill_locations()
+        self.backfill_contacts()
+
+    def tab_changed(self, event=None):
+        """Build the selected tab if this is the first time it is shown"""
+        self.build_tab(self.tabs[self.notebook.index("current")])
+        if self.prefetch and not self._prefetching:
+            self._prefetching = True
+            self.root.after(PREFETCH_DELAY, self.prefetch_tabs)
+
+    def build_tab(self, tab):
+        """Create a tab's widgets and start loading its data, once"""
+        if not tab.built:
+            tab.create_tab()
+
+    def prefetch_tabs(self):
+        """Build the next tab not built yet and schedule the one after it"""
+        for tab in self.tabs:
+            if not tab.built:
+                self.build_tab(tab)
+                self.root.after(PREFETCH_DELAY, self.prefetch_tabs)
+                return
 
     def configure_styles(self):
         """Configure the application styles"""
@@ -102,9 +153,123 @@ class RealEstateApp:
         status_label.pack(side=tk.LEFT)
 
         # Add a quit button to the status bar
-        quit_button = ttk.Button(status_frame, text="Quit", command=self.root.destroy)
+        quit_button = ttk.Button(status_frame, text="Quit", command=self.quit)
         quit_button.pack(side=tk.RIGHT, padx=5)
 
+        # Query diagnostics, available when instrumentation is enabled
+        if getattr(self.db, "query_stats", None):
+            diagnostics_button = ttk.Button(status_frame, text="Diagnostics", command=self.show_diagnostics)
+            diagnostics_button.pack(side=tk.RIGHT, padx=5)
+
+        # Busy indicator, shown while background database calls are running
+        self.busy_bar = ttk.Progressbar(status_frame, mode="indeterminate", length=80)
+
     def set_status(self, message):
         """Set the status bar message"""
-        self.status_var.set(message)
\ No newline at end of file
+        self.status_var.set(message)
+
+    def set_busy(self, busy):
+        """Show or hide the busy indicator in the status bar"""
+        if busy:
+            self.busy_bar.pack(side=tk.RIGHT, padx=5)
+            self.busy_bar.start(15)
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+
+    def export_table(self, table, search=None, status=None, filters=None):
+        """Ask for a file and export the matching rows of `table` in the background"""
+        from tkinter import filedialog
+        from export import EXPORT_FILE_TYPES, export_table
+
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=EXPORT_FILE_TYPES)
+        if not path:
+            return
+
+        def exported(count):
+            self.set_status(f"Exported {count} {table} rows to {path}")
+            messagebox.showinfo("Success", f"Exported {count} rows to {path}")
+
+        self.set_status(f"Exporting {table}...")
+        self.run_in_background(
+            export_table, self.db, table, path, search=search, status=status, filters=filters, on_success=exported
+        )
+
+    def import_file(self, table):
+        """Ask for a CSV file and import it into `table` in the background
+
+        Afterwards a BULK change is published for the table.
+        """
+        from tkinter import filedialog
+        from importer import IMPORT_FILE_TYPES, default_reject_path, import_file
+
+        path = filedialog.askopenfilename(filetypes=IMPORT_FILE_TYPES)
+        if not path:
+            return
+        reject_path = default_reject_path(path)
+
+        def imported(result):
+            count, rejected = result
+            self.set_status(f"Imported {count} {table} rows from {path}")
+            self.events.publish(table, None, BULK)
+            message = f"Imported {count} rows from {path}"
+            if rejected:
+                message += f"\n\n{rejected} rows were rejected; see {reject_path}"
+            messagebox.showinfo("Import Complete", message)
+
+        self.set_status(f"Importing {table}...")
+        self.run_in_background(import_file, self.db, table, path, reject_path, on_success=imported)
+
+    def backfill_locations(self, result=None):
+        """Parse older listings' addresses into their location columns and coordinates, one chunk per background call
+
+        Other database calls run between the chunks. Once the last chunk is
+        done the listings reload, so location filters, counts and nearby
+        searches include them.
+        """
+        if result is not None:
+            updated, remaining = result
+            if not remaining:
+                if updated:
+                    self.set_status("Listing locations updated")
+                    self.events.publish("properties", None, BULK)
+                return
+            self.set_status(f"Updating listing locations ({remaining:,} to go)...")
+        self.run_in_background(self.db.backfill_locations, key=(self, "backfill"), on_success=self.backfill_locations)
+
+    def backfill_contacts(self, result=None):
+        """Save older inquiries' contact keys for duplicate detection, one chunk per background call"""
+        if result is not None:
+            updated, remaining = result
+            if not remaining:
+                if updated:
+                    self.set_status("Client contacts indexed")
+                return
+            self.set_status(f"Indexing client contacts ({remaining:,} to go)...")
+        self.run_in_background(self.db.backfill_contacts, key=(self, "contacts"), on_success=self.backfill_contacts)
+
+    def show_duplicates(self, table):
+        """Open the duplicate review window for listings ("properties") or clients ("inquiries")"""
+        from duplicates import DuplicatesWindow
+
+        DuplicatesWindow(self.root, self, table)
+
+    def show_diagnostics(self):
+        """Open the query diagnostics window"""
+        from diagnostics import DiagnosticsWindow
+
+        DiagnosticsWindow(self.root, self.db.query_stats)
+
+    def show_error(self, error):
+        """Report a failed database call"""
+        messagebox.showerror("Error", f"An error occurred: {str(error)}")
+
+    def run_in_background(self, fn, *args, **kwargs):
+        """Run a database call on the query executor (see QueryExecutor.submit)"""
+        kwargs.setdefault("on_error", self.show_error)
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def quit(self):
+        """Stop background work and close the window"""
+        self.executor.shutdown()
+        self.root.destroy()
\ No newline at end of file
@@ -0,0 +1,611 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from database import BACKFILL_ROWS, Database, PropertyFilter
+from importer import import_file
+from instrumentation import SKIPPED_METHODS
+from migrations import DUPLICATE_TABLES, queue_backfill
+from presenters import (
+    format_agent_rows, format_agent_summary_rows, format_city_summary_rows, format_funnel_rows, format_inquiry_rows,
+    format_listing_summary_rows, format_marketing_rows, format_property_rows,
+)
+from synthetic_data import SCALES, SyntheticData, generate, parse_scale
+from virtual_tree import PREFETCH_ROWS
+
+# Database sizes (properties) benchmarked by default
+DEFAULT_SIZES = ("10k", "100k")
+DEFAULT_SEED = 42
+DEFAULT_REPEAT = 20
+
+# Generated databases are dated as of this day, so a seed always gives the same data
+BENCHMARK_END_DATE = date(2025, 1, 1)
+
+# Untimed runs before the timed ones (warm caches and prepared statements)
+WARMUP_RUNS = 2
+
+# Rows the tabs show at once (Treeview height) and the rows fetched for the first screen
+SCREEN_ROWS = 15
+FIRST_SCREEN_ROWS = SCREEN_ROWS + 2 * PREFETCH_ROWS
+
+# Rows formatted per run of the format.* benchmarks, and rows per bulk write
+FORMAT_ROWS = 5000
+BULK_ROWS = 1000
+
+# Search terms: one matching a small share of the generated rows, one matching most of them
+SEARCH_TERMS = {
+    "properties": ("whitefield", "apartment"),
+    "agents": ("sharma", "realestate"),
+    "inquiries": ("edappally", "budget"),
+    "marketing": ("whitefield", "apartment"),
+}
+
+# Listing filters: one matching a small share of the generated listings, one matching most of them,
+# and one by place
+PROPERTY_FILTERS = (
+    PropertyFilter(property_type="Villa", min_bedrooms=4, max_bedrooms=4, min_price=20000000, max_price=30000000),
+    PropertyFilter(status="Available"),
+    PropertyFilter(city="Pune", locality="Aundh"),
+)
+
+# Nearby searches (latitude, longitude, km): around Powai, and across most of Mumbai
+NEAR_SEARCHES = (("local", (19.1176, 72.9060, 2)), ("city", (19.1176, 72.9060, 15)))
+
+# Listings per CSV import benchmark, and the slowest import rate (rows/s) that passes. On one
+# core the set-based bulk path imports 15-19k rows/s; per-row triggers would manage about 5k.
+IMPORT_ROWS = 100_000
+MIN_IMPORT_RATE = 10_000
+
+# A slower median than baseline * (1 + threshold), by at least MIN_REGRESSION_MS, is a regression
+DEFAULT_THRESHOLD = 0.25
+MIN_REGRESSION_MS = 0.25
+
+
+def database_path(data_dir, size, seed):
+    """Where the generated database for `size` properties and `seed` is kept"""
+    return os.path.join(data_dir, f"bench-{size}-seed{seed}.db")
+
+
+def build_database(path, size, seed, rebuild=False):
+    """Generate the benchmark database at `path` unless it already exists
+
+    An existing database is brought up to date instead (migrations and their
+    backfills), so the copies each run works on start out current.
+    """
+    if os.path.exists(path) and not rebuild:
+        db = Database(path)
+        try:
+            while db.backfill_locations()[1]:
+                pass
+            while db.backfill_contacts()[1]:
+                pass
+        finally:
+            db.close()
+        return
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    db = Database(path)
+    try:
+        generate(db, size, seed, BENCHMARK_END_DATE)
+        # A few marketing entries and a login, so those methods have rows to work on
+        property_ids = random.Random(seed).sample(db.get_property_ids(), min(BULK_ROWS, size))
+        db.add_marketing_bulk(marketing_rows([db.get_property(property_id) for property_id in property_ids]))
+        db.add_user("Benchmark User", "Bengaluru", "9000000000", "benchmark")
+        # Record the duplicates among the generated rows, so the duplicate reads have pairs to return
+        for table in DUPLICATE_TABLES:
+            db.find_duplicates(table)
+    finally:
+        db.close()
+
+
+def run_timed(func, repeat, warmup=WARMUP_RUNS):
+    """Call func(i) warmup + repeat times and summarize the timed runs in milliseconds
+
+    i counts up from 0 across all calls, so write benchmarks can use a fresh
+    row on every call.
+    """
+    for i in range(warmup):
+        func(i)
+    times = []
+    for i in range(warmup, warmup + repeat):
+        started = time.perf_counter()
+        func(i)
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(times[0], 4),
+        "median_ms": round(times[len(times) // 2], 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "mean_ms": round(sum(times) / len(times), 4),
+    }
+
+
+class BenchmarkSuite:
+    def __init__(self, db, seed=DEFAULT_SEED, runs=DEFAULT_REPEAT + WARMUP_RUNS):
+        """The benchmarks for one database, as (name, func(i)) pairs
+
+        Ids are sampled once from a seeded generator, so every run times the
+        same calls. Write benchmarks change the database; run them on a copy.
+        """
+        self.db = db
+        self.rng = random.Random(seed)
+        self.runs = runs
+
+        self.property_ids = db.get_property_ids()
+        self.agent_ids = db.get_agent_ids()
+        self.inquiry_ids = db.get_inquiry_ids()
+        self.marketing_ids = db.get_marketing_ids()
+
+    def sample(self, ids, count=None):
+        """`count` (default: one per run) distinct ids, or as many as there are"""
+        return self.rng.sample(ids, min(count or self.runs, len(ids)))
+
+    def cycle(self, ids):
+        """func(i) argument picker: the i-th of `ids`, wrapping around"""
+        return lambda i: ids[i % len(ids)]
+
+    def benchmarks(self):
+        """Every benchmark, in the order they run (reads before writes)"""
+        return (
+            self.read_benchmarks()
+            + self.tab_benchmarks()
+            + self.write_benchmarks()
+            + self.delete_benchmarks()
+        )
+
+    def read_benchmarks(self):
+        """Listing, paging, get-by-id, search and filter methods"""
+        db = self.db
+        benchmarks = [
+            ("is_empty", lambda i: db.is_empty()),
+            ("get_last_id", lambda i: db.get_last_id("properties")),
+            ("get_id_sequence", lambda i: db.get_id_sequence("properties")),
+            ("get_ids_after", lambda i: db.get_ids_after("properties", self.property_ids[0] - BULK_ROWS)),
+            ("get_changes", lambda i: db.get_changes("properties", 0)),
+            ("authenticate_user", lambda i: db.authenticate_user("9000000000", "benchmark")),
+        ]
+
+        tables = (
+            ("properties", self.property_ids, db.get_properties, db.get_properties_page, db.get_property_ids,
+             db.get_properties_by_ids, db.iter_properties, db.get_property, db.search_properties,
+             db.search_property_ids),
+            ("agents", self.agent_ids, db.get_agents, None, db.get_agent_ids, db.get_agents_by_ids, None,
+             db.get_agent, db.search_agents, db.search_agent_ids),
+            ("inquiries", self.inquiry_ids, db.get_inquiries, db.get_inquiries_page, db.get_inquiry_ids,
+             db.get_inquiries_by_ids, db.iter_inquiries, db.get_inquiry, db.search_inquiries,
+             db.search_inquiry_ids),
+            ("marketing", self.marketing_ids, db.get_marketing_entries, db.get_marketing_entries_page,
+             db.get_marketing_ids, db.get_marketing_entries_by_ids, db.iter_marketing_entries, db.get_marketing,
+             db.search_marketing_entries, db.search_marketing_ids),
+        )
+        for table, ids, get_all, get_page, get_ids, get_by_ids, iterate, get_one, search, search_ids in tables:
+            pick = self.cycle(self.sample(ids) or [0])
+            screen = self.sample(ids, FIRST_SCREEN_ROWS)
+            narrow, broad = SEARCH_TERMS[table]
+            benchmarks += [
+                (get_all.__name__, lambda i, get_all=get_all: get_all()),
+                (get_ids.__name__, lambda i, get_ids=get_ids: get_ids()),
+                (get_by_ids.__name__, lambda i, get_by_ids=get_by_ids, screen=screen: get_by_ids(screen)),
+                (get_one.__name__, lambda i, get_one=get_one, pick=pick: get_one(pick(i))),
+                (f"{search.__name__}[narrow]", lambda i, search=search, term=narrow: search(term)),
+                (f"{search.__name__}[broad]", lambda i, search=search, term=broad: search(term)),
+                (f"{search_ids.__name__}[narrow]", lambda i, search_ids=search_ids, term=narrow: search_ids(term)),
+                (f"{search_ids.__name__}[broad]", lambda i, search_ids=search_ids, term=broad: search_ids(term)),
+            ]
+            if get_page is not None:
+                benchmarks.append((get_page.__name__, lambda i, get_page=get_page: get_page()))
+            if iterate is not None:
+                benchmarks.append((iterate.__name__, lambda i, iterate=iterate: sum(1 for _ in iterate())))
+
+        benchmarks += [
+            ("get_inquiry_ids[status]", lambda i: db.get_inquiry_ids("New")),
+            ("filter_inquiries_by_status", lambda i: db.filter_inquiries_by_status("New")),
+            ("get_property_combo_data", lambda i: db.get_property_combo_data()),
+            ("get_agent_combo_data", lambda i: db.get_agent_combo_data()),
+            ("get_listing_summary", lambda i: db.get_listing_summary()),
+            ("get_inquiry_funnel", lambda i: db.get_inquiry_funnel()),
+            ("get_inquiry_funnel[agent]", lambda i, agent=self.cycle(self.sample(self.agent_ids)): db.get_inquiry_funnel(agent(i))),
+            ("get_agent_summary", lambda i: db.get_agent_summary()),
+            ("get_city_summary", lambda i: db.get_city_summary()),
+            ("get_city_summary[city]", lambda i: db.get_city_summary("Mumbai")),
+        ]
+
+        screen = self.sample(self.property_ids, FIRST_SCREEN_ROWS)
+        searched = PROPERTY_FILTERS[1]._replace(search=SEARCH_TERMS["properties"][0])
+        for kind, filters in zip(("narrow", "broad", "place"), PROPERTY_FILTERS):
+            benchmarks += [
+                (f"count_properties[{kind}]", lambda i, filters=filters: db.count_properties(filters)),
+                (f"filter_property_ids[{kind}]", lambda i, filters=filters: db.filter_property_ids(filters)),
+                (f"filter_property_ids[{kind},first]",
+                 lambda i, filters=filters: db.filter_property_ids(filters, FIRST_SCREEN_ROWS)),
+                (f"get_property_facets[{kind}]", lambda i, filters=filters: db.get_property_facets(filters)),
+                (f"get_properties_by_ids[{kind}]",
+                 lambda i, filters=filters: db.get_properties_by_ids(screen, filters)),
+            ]
+        for kind, near in NEAR_SEARCHES:
+            benchmarks += [
+                (f"search_properties_near[{kind}]", lambda i, near=near: db.search_properties_near(*near)),
+                (f"search_properties_near[{kind},first]",
+                 lambda i, near=near: db.search_properties_near(*near, limit=FIRST_SCREEN_ROWS)),
+                (f"search_properties_near[{kind},narrow]",
+                 lambda i, near=near: db.search_properties_near(*near, PROPERTY_FILTERS[0])),
+                (f"search_properties_near[{kind},broad]",
+                 lambda i, near=near: db.search_properties_near(*near, PROPERTY_FILTERS[1])),
+            ]
+        for table, ids in (("properties", self.property_ids), ("inquiries", self.inquiry_ids)):
+            pick = self.cycle(self.sample(ids) or [0])
+            benchmarks += [
+                (f"get_duplicates[{table}]", lambda i, table=table: db.get_duplicates(table)),
+                (f"count_duplicates[{table}]", lambda i, table=table: db.count_duplicates(table)),
+                (f"get_duplicates_of[{table}]", lambda i, table=table, pick=pick: db.get_duplicates_of(table, pick(i))),
+            ]
+        benchmarks += [
+            ("get_property_facets", lambda i: db.get_property_facets(PropertyFilter())),
+            ("get_property_facets[search]", lambda i: db.get_property_facets(searched)),
+            ("property_filter_sql", lambda i: db.property_filter_sql(searched)),
+        ]
+        return benchmarks
+
+    def tab_benchmarks(self):
+        """The tabs' load paths: the id list, the first screen of rows, and row formatting
+
+        tab.* times what load_properties (etc.) wait for before the first rows
+        show; format.* times the presenters on FORMAT_ROWS rows.
+        """
+        db = self.db
+        tabs = (
+            ("properties", db.get_property_ids, db.get_properties_by_ids, format_property_rows),
+            ("agents", db.get_agent_ids, db.get_agents_by_ids, format_agent_rows),
+            ("inquiries", db.get_inquiry_ids, db.get_inquiries_by_ids, format_inquiry_rows),
+            ("marketing", db.get_marketing_ids, db.get_marketing_entries_by_ids, format_marketing_rows),
+        )
+        benchmarks = []
+        for table, get_ids, get_by_ids, format_rows in tabs:
+            def first_screen(i, get_ids=get_ids, get_by_ids=get_by_ids, format_rows=format_rows):
+                return format_rows(get_by_ids(get_ids()[:FIRST_SCREEN_ROWS]))
+
+            rows = get_by_ids(get_ids()[:FORMAT_ROWS])
+            benchmarks += [
+                (f"tab.load_{table}", first_screen),
+                (f"format.{table}", lambda i, rows=rows, format_rows=format_rows: format_rows(rows)),
+            ]
+
+        def dashboard(i):
+            return (
+                format_listing_summary_rows(db.get_listing_summary()),
+                format_funnel_rows(db.get_inquiry_funnel()),
+                format_agent_summary_rows(db.get_agent_summary()),
+                format_city_summary_rows(db.get_city_summary()),
+            )
+
+        def filtered_properties(i, filters=PROPERTY_FILTERS[1]):
+            property_ids = db.filter_property_ids(filters, FIRST_SCREEN_ROWS)
+            return (
+                format_property_rows(db.get_properties_by_ids(property_ids, filters)),
+                db.count_properties(filters),
+                db.get_property_facets(filters),
+            )
+
+        benchmarks.append(("tab.load_dashboard", dashboard))
+        benchmarks.append(("tab.filter_properties", filtered_properties))
+        return benchmarks
+
+    def write_benchmarks(self):
+        """add, bulk add, upsert and update methods (each run commits)"""
+        db = self.db
+        agent = self.cycle(self.sample(self.agent_ids))
+        prop = self.cycle(self.sample(self.property_ids))
+        inquiry = self.cycle(self.sample(self.inquiry_ids))
+        marketing = self.cycle(self.sample(self.marketing_ids) or [0])
+
+        properties = [db.get_property(property_id) for property_id in self.sample(self.property_ids, BULK_ROWS)]
+        # get_property rows end with the location columns, which the writes fill in themselves
+        property_rows = [row[1:10] for row in properties]
+        agent_rows = [db.get_agent(agent_id)[1:] for agent_id in self.sample(self.agent_ids, BULK_ROWS)]
+        inquiry_rows = [db.get_inquiry(inquiry_id)[1:] for inquiry_id in self.sample(self.inquiry_ids, BULK_ROWS)]
+        marketing_entries = marketing_rows(properties)
+        upsert_rows = [db.get_property(property_id)[:10] for property_id in self.sample(self.property_ids, BULK_ROWS)]
+        upsert_agents = [db.get_agent(agent_id) for agent_id in self.sample(self.agent_ids, BULK_ROWS)]
+        upsert_inquiries = [db.get_inquiry(inquiry_id) for inquiry_id in self.sample(self.inquiry_ids, BULK_ROWS)]
+        listing = ("12, MG Road, Indiranagar, Bangalore 560038", "Apartment", 2, 2, 8500000, "Available")
+        description = "Benchmark listing"
+        # The last of the oldest listings that make up one backfill chunk
+        backfill_end = self.property_ids[-min(BACKFILL_ROWS, len(self.property_ids))]
+        contacts_end = sorted(self.inquiry_ids)[min(BACKFILL_ROWS, len(self.inquiry_ids)) - 1]
+        pair = self.cycle([row[:2] for row in db.get_duplicates("properties", self.runs)] or [(0, 0)])
+
+        def backfill(i):
+            # Queue the oldest listings again, as migrations 7 and 8 queue every listing
+            with db.pool.writer() as conn:
+                queue_backfill(conn, "property_locations", 0, backfill_end)
+                conn.commit()
+            return db.backfill_locations()
+
+        def backfill_contacts(i):
+            # Queue the oldest inquiries again, as migration 9 queues every inquiry
+            with db.pool.writer() as conn:
+                queue_backfill(conn, "client_contacts", 0, contacts_end)
+                conn.commit()
+            return db.backfill_contacts()
+
+        return [
+            ("add_user", lambda i: db.add_user("Benchmark", "Pune", f"8{i:09d}", "secret")),
+            ("add_property", lambda i: db.add_property(*listing, agent(i), description)),
+            ("add_properties_bulk", lambda i: db.add_properties_bulk(property_rows)),
+            ("upsert_properties_bulk", lambda i: db.upsert_properties_bulk(upsert_rows)),
+            ("update_property", lambda i: db.update_property(prop(i), *listing, agent(i), f"{description} {i}")),
+            ("add_agent", lambda i: db.add_agent("Benchmark Agent", "9000000001", "bench@realestate.co.in", f"BENCH{i}", 2.0)),
+            ("add_agents_bulk", lambda i: db.add_agents_bulk(agent_rows)),
+            ("upsert_agents_bulk", lambda i: db.upsert_agents_bulk(upsert_agents)),
+            ("update_agent", lambda i: db.update_agent(agent(i), "Benchmark Agent", "9000000001", "bench@realestate.co.in", f"BENCH{i}", 2.5)),
+            ("add_inquiry", lambda i: db.add_inquiry("Benchmark Client", "9000000002", prop(i), "New", "Benchmark note", agent(i))),
+            ("add_inquiries_bulk", lambda i: db.add_inquiries_bulk(inquiry_rows)),
+            ("upsert_inquiries_bulk", lambda i: db.upsert_inquiries_bulk(upsert_inquiries)),
+            ("update_inquiry", lambda i: db.update_inquiry(inquiry(i), "Benchmark Client", "9000000002", prop(i), "Contacted", f"Note {i}", agent(i))),
+            ("add_marketing", lambda i: db.add_marketing("", "", None, None, None, "Active", agent(i), description, prop(i), "Social Media", 2500.0, 25000.0, "2025-01-01", "2025-01-31")),
+            ("add_marketing_bulk", lambda i: db.add_marketing_bulk(marketing_entries)),
+            ("update_marketing", lambda i: db.update_marketing(marketing(i), "", "", None, None, None, "Active", agent(i), f"{description} {i}", prop(i), "Email", 2500.0, 30000.0, "2025-01-01", "2025-02-28")),
+            ("backfill_locations", backfill),
+            ("backfill_contacts", backfill_contacts),
+            ("find_duplicates[properties]", lambda i: db.find_duplicates("properties")),
+            ("find_duplicates[inquiries]", lambda i: db.find_duplicates("inquiries")),
+            ("dismiss_duplicate", lambda i: db.dismiss_duplicate("properties", *pair(i))),
+        ]
+
+    def delete_benchmarks(self):
+        """Deletes and merges, each run removing a different existing row
+
+        delete_property also deletes the property's inquiries and delete_agent
+        unassigns the agent's properties and inquiries. merge_duplicates merges
+        a pair of sampled rows, whether or not they were found to be duplicates.
+        """
+        db = self.db
+        agent = self.cycle(self.sample(self.agent_ids))
+        prop = self.cycle(self.sample(self.property_ids))
+        inquiry = self.cycle(self.sample(self.inquiry_ids))
+        marketing = self.cycle(self.sample(self.marketing_ids) or [0])
+        listings = self.sample(self.property_ids, 2 * self.runs)
+        clients = self.sample(self.inquiry_ids, 2 * self.runs)
+        merged_listing = self.cycle(list(zip(listings[::2], listings[1::2])))
+        merged_client = self.cycle(list(zip(clients[::2], clients[1::2])))
+        return [
+            ("merge_duplicates[properties]", lambda i: db.merge_duplicates("properties", *merged_listing(i))),
+            ("merge_duplicates[inquiries]", lambda i: db.merge_duplicates("inquiries", *merged_client(i))),
+            ("delete_inquiry", lambda i: db.delete_inquiry(inquiry(i))),
+            ("delete_marketing", lambda i: db.delete_marketing(marketing(i))),
+            ("delete_property", lambda i: db.delete_property(prop(i))),
+            ("delete_agent", lambda i: db.delete_agent(agent(i))),
+        ]
+
+
+def marketing_rows(property_rows):
+    """Marketing campaigns for add_marketing_bulk, one per get_property row"""
+    return [
+        (row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9],
+         row[0], "Property Portal", 2500.0, 25000.0, row[6], None)
+        for row in property_rows
+    ]
+
+
+def write_import_file(path, rows, seed, agent_ids):
+    """Write `rows` synthetic listings, assigned to the given agents, as an import CSV"""
+    data = SyntheticData(rows, seed, BENCHMARK_END_DATE)
+    # The generator draws from its own number of agents; they map onto the database's
+    agents = [agent_ids[i % len(agent_ids)] for i in range(data.agents)] if agent_ids else [None] * data.agents
+    weights = data.agent_weights()
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["address", "property_type", "bedrooms", "bathrooms", "price", "listing_date", "status", "agent_id",
+             "description"]
+        )
+        for chunk, start, count in data.chunks(rows):
+            for row in data.property_rows(chunk, start, count, agents, weights):
+                writer.writerow(["" if value is None else value for value in row])
+
+
+def run_import(path, seed, rows=IMPORT_ROWS):
+    """Time a CSV import of `rows` listings into a copy of the database at `path`
+
+    This is the path a builder's inventory file takes (importer.import_file:
+    parsing, checks and the bulk insert, in IMPORT_BATCH_SIZE batches), and
+    the only benchmark that writes more than BULK_ROWS rows at once. Returns
+    {"rows", "seconds", "rows_per_s"}.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        copy = os.path.join(work_dir, os.path.basename(path))
+        shutil.copyfile(path, copy)
+        db = Database(copy)
+        try:
+            csv_path = os.path.join(work_dir, "listings.csv")
+            write_import_file(csv_path, rows, seed, db.get_agent_ids())
+            started = time.perf_counter()
+            imported, _ = import_file(db, "properties", csv_path)
+            seconds = time.perf_counter() - started
+        finally:
+            db.close()
+    return {"rows": imported, "seconds": round(seconds, 3), "rows_per_s": round(imported / seconds)}
+
+
+def slow_imports(report, min_rate=MIN_IMPORT_RATE):
+    """The (size, rows/s) of the imports in `report` slower than min_rate rows/s"""
+    return [(size, result["rows_per_s"]) for size, result in report["imports"].items() if result["rows_per_s"] < min_rate]
+
+
+def uncovered_methods(names):
+    """Public Database methods that no benchmark in `names` times"""
+    covered = {name.split("[")[0] for name in names}
+    return sorted(
+        name
+        for name, value in vars(Database).items()
+        if callable(value) and not name.startswith("_") and name not in SKIPPED_METHODS and name not in covered
+    )
+
+
+def run_size(path, seed, repeat, select=None, progress=print):
+    """Benchmark a copy of the database at `path`; return {benchmark name: timings}"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Writes go to a scratch copy, so the generated database stays as it was built
+        copy = os.path.join(work_dir, os.path.basename(path))
+        shutil.copyfile(path, copy)
+
+        db = Database(copy)
+        try:
+            suite = BenchmarkSuite(db, seed, repeat + WARMUP_RUNS)
+            results = {}
+            for name, func in suite.benchmarks():
+                if select and not any(pattern in name for pattern in select):
+                    continue
+                results[name] = run_timed(func, repeat)
+                progress(f"  {name:<40}{results[name]['median_ms']:>12.3f} ms")
+        finally:
+            db.close()
+    return results
+
+
+def run_benchmarks(sizes, seed=DEFAULT_SEED, repeat=DEFAULT_REPEAT, data_dir="benchmark_data", rebuild=False,
+                   select=None, progress=print, import_rows=IMPORT_ROWS):
+    """Build (or reuse) a database per size and benchmark each; return the JSON-ready report
+
+    The CSV import of import_rows listings is timed once per size (it runs
+    for seconds) and reported in rows/s under "imports".
+    """
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": {},
+        "imports": {},
+    }
+    for size in sizes:
+        count = parse_scale(size)
+        path = database_path(data_dir, size, seed)
+        progress(f"{size}: building {path}" if rebuild or not os.path.exists(path) else f"{size}: using {path}")
+        build_database(path, count, seed, rebuild)
+        report["results"][size] = run_size(path, seed, repeat, select, progress)
+        if import_rows and (not select or any(pattern in "import_file" for pattern in select)):
+            report["imports"][size] = run_import(path, seed, import_rows)
+            progress(f"  {'import_file[' + str(import_rows) + ' rows]':<40}{report['imports'][size]['rows_per_s']:>12,} rows/s")
+
+    names = {name for results in report["results"].values() for name in results}
+    report["meta"]["uncovered"] = [] if select else uncovered_methods(names)
+    return report
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return (rows, regressions) comparing median times with a baseline report
+
+    Each row is (size, name, baseline ms, current ms, ratio, regressed).
+    """
+    rows = []
+    for size, results in report["results"].items():
+        base_results = baseline.get("results", {}).get(size, {})
+        for name, timings in results.items():
+            if name not in base_results:
+                continue
+            before = base_results[name]["median_ms"]
+            after = timings["median_ms"]
+            ratio = after / before if before else float("inf")
+            regressed = after > before * (1 + threshold) and after - before >= MIN_REGRESSION_MS
+            rows.append((size, name, before, after, ratio, regressed))
+    return rows, [row for row in rows if row[5]]
+
+
+def print_comparison(rows, threshold):
+    """Print the comparison table, regressions marked"""
+    print(f"{'size':<8}{'benchmark':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for size, name, before, after, ratio, regressed in rows:
+        change = f"{(ratio - 1) * 100:+.0f}%" if ratio != float("inf") else "new"
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{size:<8}{name:<40}{before:>10.3f}ms{after:>10.3f}ms{change:>10}{marker}")
+    regressions = sum(1 for row in rows if row[5])
+    print(f"{regressions} regression(s) over {threshold:.0%} (and {MIN_REGRESSION_MS} ms)")
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark the database layer and the tab load paths")
+    parser.add_argument(
+        "--sizes", default=",".join(DEFAULT_SIZES),
+        help=f"comma-separated property counts or {', '.join(SCALES)} (default: {','.join(DEFAULT_SIZES)})",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"data seed (default: {DEFAULT_SEED})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"timed runs per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--data-dir", default="benchmark_data", help="where generated databases are kept")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the databases even if they exist")
+    parser.add_argument("--only", action="append", help="only benchmarks whose name contains this text (repeatable)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against; exits with 1 on a regression")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help=f"allowed slowdown of the median before it counts as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--import-rows", type=int, default=IMPORT_ROWS,
+        help=f"listings in the timed CSV import, 0 to skip it (default: {IMPORT_ROWS})",
+    )
+    parser.add_argument(
+        "--min-import-rate", type=int, default=MIN_IMPORT_RATE,
+        help=f"slowest CSV import, in rows/s, before exiting with 1 (default: {MIN_IMPORT_RATE})",
+    )
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    try:
+        for size in sizes:
+            parse_scale(size)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"can't read baseline {args.compare}: {e}")
+
+    report = run_benchmarks(
+        sizes, args.seed, args.repeat, args.data_dir, args.rebuild, args.only, import_rows=args.import_rows
+    )
+    if report["meta"]["uncovered"]:
+        print(f"Not benchmarked: {', '.join(report['meta']['uncovered'])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    slow = slow_imports(report, args.min_import_rate)
+    for size, rate in slow:
+        print(f"{size}: the CSV import ran at {rate:,} rows/s, below {args.min_import_rate:,} rows/s")
+
+    if baseline is not None:
+        rows, regressions = compare(report, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+        return 1 if regressions or slow else 0
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import tkinter as tk
+from tkinter import ttk
+
+from presenters import (
+    format_agent_summary_rows, format_city_summary_rows, format_funnel_rows, format_listing_summary_rows, format_price,
+)
+
+class DashboardTab:
+    def __init__(self, parent, database, app):
+        """Initialize the Dashboard tab
+
+        Every figure comes from the summary tables that triggers keep up to
+        date, so loading it costs the same whatever the size of the database.
+        """
+        self.parent = parent
+        self.db = database
+        self.app = app
+
+        self.totals_var = tk.StringVar()
+
+        # Add the tab's frame now; its widgets and data are built when it is first shown
+        self.frame = ttk.Frame(self.parent)
+        self.parent.add(self.frame, text="Dashboard")
+        self.built = False
+
+    def create_tab(self):
+        """Create the dashboard UI and load its figures (called when the tab is first shown)"""
+        self.built = True
+        dashboard_frame = self.frame
+
+        # Headline totals
+        header_frame = ttk.Frame(dashboard_frame)
+        header_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(header_frame, text="Dashboard", font=("Arial", 14, "bold")).pack(side=tk.LEFT)
+        ttk.Button(header_frame, text="Refresh", command=self.load_summary).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(dashboard_frame, textvariable=self.totals_var).pack(fill=tk.X, padx=10)
+
+        # Listings and inquiry funnel side by side, agents and cities underneath
+        top_frame = ttk.Frame(dashboard_frame)
+        top_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        self.listing_tree = self.create_table(
+            top_frame,
+            "Listings by Status and Type",
+            (("status", "Status", 100), ("type", "Type", 130), ("listings", "Listings", 80), ("value", "Total Value", 110)),
+            side=tk.LEFT,
+        )
+        self.funnel_tree = self.create_table(
+            top_frame,
+            "Inquiry Funnel",
+            (("status", "Status", 130), ("inquiries", "Inquiries", 80), ("share", "Share", 70)),
+            side=tk.RIGHT,
+        )
+        bottom_frame = ttk.Frame(dashboard_frame)
+        bottom_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        self.agent_tree = self.create_table(
+            bottom_frame,
+            "Agents",
+            (
+                ("agent", "Agent", 180),
+                ("listings", "Listings", 80),
+                ("available", "Available", 80),
+                ("value", "Listed Value", 110),
+                ("inquiries", "Open Inquiries", 110),
+            ),
+            side=tk.LEFT,
+        )
+        self.city_tree = self.create_table(
+            bottom_frame,
+            "Listings by City",
+            (("city", "City", 120), ("listings", "Listings", 80), ("available", "Available", 80), ("value", "Total Value", 110)),
+            side=tk.RIGHT,
+        )
+
+        # The figures change with any listing, inquiry or agent edit; reloading them is cheap
+        self.app.events.subscribe(("properties", "inquiries", "agents"), self.records_changed, dashboard_frame)
+
+        # Load data
+        self.load_summary()
+
+    def create_table(self, parent, title, columns, **pack_options):
+        """Create a titled Treeview with (column, heading, width) columns and return it"""
+        table_frame = ttk.Frame(parent)
+        table_frame.pack(fill=tk.BOTH, expand=True, **pack_options)
+        ttk.Label(table_frame, text=title, font=("Arial", 12, "bold")).pack(anchor=tk.W, pady=5)
+
+        tree = ttk.Treeview(table_frame, columns=[column[0] for column in columns], show="headings", height=6)
+        for column, heading, width in columns:
+            tree.heading(column, text=heading)
+            tree.column(column, width=width)
+
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        return tree
+
+    def load_summary(self):
+        """Fetch the dashboard figures in the background"""
+        self.app.run_in_background(
+            lambda: (
+                self.db.get_listing_summary(),
+                self.db.get_inquiry_funnel(),
+                self.db.get_agent_summary(),
+                self.db.get_city_summary(),
+            ),
+            key=(self, "summary"),
+            on_success=self.show_summary,
+        )
+
+    def show_summary(self, summary):
+        """Fill the tables and totals with freshly fetched figures"""
+        listings, funnel, agents, cities = summary
+        self.fill_table(self.listing_tree, format_listing_summary_rows(listings))
+        self.fill_table(self.funnel_tree, format_funnel_rows(funnel))
+        self.fill_table(self.agent_tree, format_agent_summary_rows(agents))
+        self.fill_table(self.city_tree, format_city_summary_rows(cities))
+
+        listing_count = sum(row[2] for row in listings)
+        listing_value = sum(row[3] for row in listings)
+        inquiry_count = sum(row[1] for row in funnel)
+        self.totals_var.set(
+            f"{listing_count} listings worth {format_price(listing_value)} · {inquiry_count} inquiries"
+        )
+
+    def fill_table(self, tree, rows):
+        """Replace the rows of a dashboard table"""
+        tree.delete(*tree.get_children())
+        for row in rows:
+            tree.insert("", tk.END, values=row)
+
+    def records_changed(self, events):
+        """Reload the figures after listings, inquiries or agents changed (on any tab)"""
+        self.load_summary()
@@ -1,30 +1,382 @@
+import heapq
 import sqlite3
 import os
+import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from contextlib import contextmanager
 from datetime import datetime
+from math import asin, cos, pi, radians, sin, sqrt
+
+from dedup import client_pairs, contact_keys, listing_matches, listing_pairs, price_window
+from locations import EARTH_RADIUS_KM, bounding_box, localities_in_box, locality_centre, parse_address
+from migrations import (
+    DUPLICATE_TABLES, FTS_COLUMNS, LATEST_VERSION, PRICE_BANDS, SUMMARY_TABLES, TRACKED_TABLES, coordinate_index_sql,
+    fts_insert_sql, get_schema_version, price_band_sql, run_migrations, summaries_of, summary_groups_insert_sql, summary_groups_sql,
+    summary_range_sql,
+)
+from pool import ConnectionPool, DEFAULT_READERS
+
+# Default number of rows per page for the paginated listing methods
+PAGE_SIZE = 500
+
+# Most recent change_log entries kept when the database is opened
+CHANGE_LOG_KEEP = 100000
+
+# Most changes get_changes returns before telling the caller to reload instead
+CHANGE_LIMIT = 1000
+
+# Markers wrapped around matched terms in search snippets
+SNIPPET_START = "["
+SNIPPET_END = "]"
+
+# Searches matching more rows than this are listed newest first instead of
+# ranked, since ranking every match of a one- or two-letter prefix is slow
+RANKED_SEARCH_LIMIT = 20000
+
+# SQLite virtual machine steps between checks of a query's cancel event
+CANCEL_CHECK_STEPS = 1000
+
+# Inquiry statuses that no longer count as open on the dashboard
+CLOSED_INQUIRY_STATUSES = ("Closed", "Cancelled")
+
+# Agents listed on the dashboard, busiest first
+DASHBOARD_AGENTS = 50
+
+# Facet dimensions counted by get_property_facets
+PROPERTY_FACETS = ("property_type", "status", "bedrooms", "bathrooms", "price_band", "agent_id", "city", "locality")
+
+# Agents in the agent facet, most listings first
+FACET_AGENTS = 20
+
+# Property filters matching more than this share of all listings walk the table
+# newest first (no sort, and a LIMIT stops early) instead of using an index
+FILTER_SCAN_SHARE = 0.05
+
+# Listings whose addresses backfill_locations parses per call
+BACKFILL_ROWS = 5000
+
+# Candidate listings search_properties_near checks the distance of at a time
+NEAR_BATCH_SIZE = 4096
+
+# Possible duplicate pairs get_duplicates lists, best match first
+DUPLICATE_LIMIT = 500
+
+# Marketing listing rows: id, address (of the linked property if any), channel,
+# registration fee, spend, start date, end date, status and agent name
+MARKETING_LISTING_COLUMNS = (
+    "m.id, COALESCE(p.address, NULLIF(m.address, '')), m.channel, m.registration_fee, m.spend, "
+    "m.start_date, m.end_date, m.status, a.name"
+)
+
+# Marketing address and type values, taken from the linked property when left blank
+MARKETING_FROM_PROPERTY = (
+    "COALESCE(NULLIF(?, ''), (SELECT address FROM properties WHERE id = ?), ''), "
+    "COALESCE(NULLIF(?, ''), (SELECT property_type FROM properties WHERE id = ?), '')"
+)
+MARKETING_UPDATE_COLUMNS = (
+    "address, marketing_type, bedrooms, bathrooms, price, status, agent_id, description, "
+    "property_id, channel, registration_fee, spend, start_date, end_date"
+)
+
+
+def build_match_query(search_term):
+    """Turn free text into an FTS5 query: every word must match as a prefix
+
+    Returns None when the term has no searchable words. Each word is quoted so
+    FTS5 operators typed by the user (AND, NEAR, *, quotes) are taken literally.
+    """
+    words = re.findall(r"\w+", search_term)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def placeholders(values):
+    """Return "?, ?, ..." with one placeholder per value, for IN (...) lists"""
+    return ", ".join("?" * len(values))
+
+
+def haversines(centre, points):
+    """The haversine, sin²(distance / 2R), between centre and each (latitude, longitude) point
+
+    centre is (latitude, longitude, cosine of latitude), in radians. The
+    coordinates are converted a whole column at a time, then combined in one
+    pass.
+    """
+    if not points:
+        return []
+    latitudes, longitudes = zip(*points)
+    latitudes = list(map(radians, latitudes))
+    longitudes = list(map(radians, longitudes))
+    latitude, longitude, cos_latitude = centre
+    return [
+        sin((phi - latitude) / 2) ** 2 + cos_latitude * cos(phi) * sin((lam - longitude) / 2) ** 2
+        for phi, lam in zip(latitudes, longitudes)
+    ]
+
+
+def property_location(address, latitude=None, longitude=None):
+    """The (city, locality, pincode, latitude, longitude, coordinates_manual) values saved with a listing
+
+    City, locality and PIN code are parsed from the address. Coordinates
+    given (both of them) are kept as entered; otherwise the listing is placed
+    at its locality's centre, or has no coordinates when the locality is
+    unknown.
+    """
+    city, locality, pincode = parse_address(address)
+    if latitude is not None and longitude is not None:
+        return city, locality, pincode, latitude, longitude, 1
+    return (city, locality, pincode) + locality_centre(city, locality) + (0,)
+
+
+class PropertyFilter(
+    namedtuple(
+        "PropertyFilter",
+        "property_type status min_bedrooms max_bedrooms min_bathrooms max_bathrooms min_price max_price agent_id "
+        "city locality pincode search",
+        defaults=(None,) * 13,
+    )
+):
+    """Structured property search criteria; a criterion left as None (or "") is not applied
+
+    Bedroom and bathroom ranges include both ends. Prices run from min_price
+    up to but not including max_price, so max_price=15000000 is "under 1.5 Cr".
+    city, locality and pincode match the columns parsed from the address
+    (see locations.parse_address). search is free text, matched as in
+    search_properties.
+    """
+
+    __slots__ = ()
+
+    def is_empty(self):
+        """True when no criterion is set"""
+        return all(value is None or value == "" for value in self)
+
+    def on_price_bands(self):
+        """True when both price bounds (if set) are price band edges"""
+        return all(price is None or price in PRICE_BANDS for price in (self.min_price, self.max_price))
+
+    def to_price_bands(self):
+        """A copy with the price bounds widened to the nearest band edges"""
+        min_price, max_price = self.min_price, self.max_price
+        if min_price is not None:
+            min_price = PRICE_BANDS[max(bisect_right(PRICE_BANDS, min_price) - 1, 0)]
+        if max_price is not None:
+            index = bisect_left(PRICE_BANDS, max_price)
+            max_price = PRICE_BANDS[index] if index < len(PRICE_BANDS) else None
+        return self._replace(min_price=min_price, max_price=max_price)
+
 
 class Database:
-    def __init__(self, db_file):
+    def __init__(self, db_file, readers=DEFAULT_READERS):
         """Initialize database connection and create tables if they don't exist"""
         self.db_file = db_file
+        self.readers = readers
+        self.pool = None
         self.conn = None
-        self.cursor = None
+        self._transaction_depth = 0
         self.connect()
         self.create_tables()
 
     def connect(self):
-        """Connect to the SQLite database"""
-        self.conn = sqlite3.connect(self.db_file)
-        self.cursor = self.conn.cursor()
+        """Connect to the SQLite database through a WAL connection pool"""
+        self.pool = ConnectionPool(self.db_file, readers=self.readers)
+        # The single writer connection; use it via self.pool.writer() off the main thread
+        self.conn = self.pool.writer_connection
 
     def close(self):
         """Close the database connection"""
-        if self.conn:
-            self.conn.close()
+        if self.pool:
+            self.pool.close()
+
+    def _fetchall(self, sql, params=(), cancel=None):
+        """Run a read query on a pooled reader connection and return all rows"""
+        with self.pool.reader() as conn, self._interruptible(conn, cancel):
+            return conn.execute(sql, params).fetchall()
+
+    def _fetchone(self, sql, params=(), cancel=None):
+        """Run a read query on a pooled reader connection and return the first row"""
+        with self.pool.reader() as conn, self._interruptible(conn, cancel):
+            return conn.execute(sql, params).fetchone()
+
+    @contextmanager
+    def _interruptible(self, conn, cancel):
+        """Abort the queries run on `conn` inside the block once `cancel` is set
+
+        `cancel` is a threading.Event (or None). SQLite checks it every
+        CANCEL_CHECK_STEPS steps; an aborted query raises CancelledError, which
+        the QueryExecutor drops without calling back.
+        """
+        if cancel is None:
+            yield
+            return
+        # Imported here: the login screen has no use for concurrent.futures
+        from concurrent.futures import CancelledError
+
+        if cancel.is_set():
+            raise CancelledError()
+        conn.set_progress_handler(cancel.is_set, CANCEL_CHECK_STEPS)
+        try:
+            yield
+        except sqlite3.OperationalError:
+            if cancel.is_set():
+                raise CancelledError() from None
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    def _iter_pages(self, fetch_page, page_size):
+        """Yield rows from successive keyset pages until a short page is returned
+
+        fetch_page(after, page_size) returns one page; `after` is None for the
+        first page and the last row of the previous page afterwards.
+        """
+        after = None
+        while True:
+            rows = fetch_page(after, page_size)
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after = rows[-1]
+
+    def _commit(self, conn):
+        """Commit unless the write is part of an enclosing transaction() block"""
+        if not self._transaction_depth:
+            conn.commit()
+
+    def _execute(self, sql, params=()):
+        """Run a single write statement on the writer connection and commit"""
+        with self.pool.writer() as conn:
+            cursor = conn.execute(sql, params)
+            self._commit(conn)
+            return cursor.lastrowid
+
+    def _executemany(self, sql, rows):
+        """Run one write statement for every row in a single commit; return the row count"""
+        with self.pool.writer() as conn:
+            cursor = conn.executemany(sql, rows)
+            self._commit(conn)
+            return cursor.rowcount
+
+    def _deferred_insert_triggers(self, table):
+        """Return (trigger name, replacement statement, grouped) for the AFTER INSERT triggers on `table`
+
+        Each statement takes the highest id that existed before the batch, but
+        the grouped ones (the summaries) read temp.summary_groups instead.
+        """
+        triggers = []
+        if f"{table}_fts" in self.fts_tables:
+            triggers.append((f"{table}_fts_ai", fts_insert_sql(table), False))
+        for summary in summaries_of(table):
+            # The new rows' groups added to each summary in one grouped upsert
+            triggers.append((f"{summary}_ai", summary_groups_insert_sql(summary), True))
+        if table == "properties" and self.coordinate_index:
+            triggers.append(("properties_rtree_ai", coordinate_index_sql("id > ?"), False))
+        if table in TRACKED_TABLES:
+            # One marker instead of a row per insert; readers of the log reload on it
+            triggers.append(
+                (
+                    f"{table}_changes_ai",
+                    f"INSERT INTO change_log (table_name, row_id, kind) VALUES ('{table}', ?, 'bulk')",
+                    False,
+                )
+            )
+        return triggers
+
+    def _bulk_insert(self, table, sql, rows):
+        """Run a bulk INSERT into `table`, replacing its per-row insert triggers with one pass
+
+        Firing the FTS, summary and change-log triggers once per row dominates the
+        cost of a large insert, so for the duration of the batch they are dropped:
+        the new id range is indexed with a single INSERT ... SELECT each and
+        logged as one bulk change instead. The new rows are added up once per
+        group of all the summaries' keys, and each summary from those groups.
+        All of it runs in one transaction (and savepoint), so other
+        connections never see a trigger missing. Returns the row count.
+        """
+        with self.pool.writer() as conn:
+            triggers = []
+            for name, statement, grouped in self._deferred_insert_triggers(table):
+                row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)).fetchone()
+                if row is not None:
+                    triggers.append((name, statement, grouped, row[0]))
+            if not triggers:
+                return self._executemany(sql, rows)
+
+            # DDL doesn't open a transaction implicitly; the drops must not commit on their own.
+            # Inside an open transaction a savepoint undoes just this batch on failure.
+            nested = conn.in_transaction
+            conn.execute("SAVEPOINT bulk_insert" if nested else "BEGIN IMMEDIATE")
+            try:
+                last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                for name, _, _, _ in triggers:
+                    conn.execute(f"DROP TRIGGER {name}")
+                count = conn.executemany(sql, rows).rowcount
+                if any(grouped for _, _, grouped, _ in triggers):
+                    conn.execute(summary_groups_sql(table), (last_id,))
+                for _, statement, grouped, create_sql in triggers:
+                    conn.execute(statement, () if grouped else (last_id,))
+                    conn.execute(create_sql)
+                conn.execute("DROP TABLE IF EXISTS temp.summary_groups")
+            except BaseException:
+                if nested:
+                    conn.execute("ROLLBACK TO bulk_insert")
+                    conn.execute("RELEASE bulk_insert")
+                if not self._transaction_depth:
+                    conn.rollback()
+                raise
+            if nested:
+                conn.execute("RELEASE bulk_insert")
+            self._commit(conn)
+            return count
+
+    @contextmanager
+    def transaction(self):
+        """Group writes into a single commit, rolling everything back on error
+
+        Every add_*/update_*/delete_* call made inside the block (on this thread)
+        shares one transaction and one fsync. Nested blocks join the outermost one.
+        """
+        with self.pool.writer() as conn:
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._transaction_depth == 1:
+                    conn.rollback()
+                raise
+            else:
+                if self._transaction_depth == 1:
+                    conn.commit()
+            finally:
+                self._transaction_depth -= 1
 
     def create_tables(self):
-        """Create database tables if they don't exist"""
+        """Create database tables and apply pending migrations, unless the schema is already current"""
+        with self.pool.writer() as conn:
+            # An up-to-date database (the usual case) needs no DDL at all
+            self.schema_version = get_schema_version(conn)
+            if self.schema_version < LATEST_VERSION:
+                self.schema_version = self._create_schema(conn)
+
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.fts_tables = {f"{table}_fts" for table in FTS_COLUMNS} & tables
+            # Nearby searches use the R*Tree when this SQLite build has one
+            self.coordinate_index = "properties_rtree" in tables
+
+            # Only recent changes are of interest to open windows
+            conn.execute(
+                "DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?", (CHANGE_LOG_KEEP,)
+            )
+            conn.commit()
+
+    def _create_schema(self, conn):
+        """Create the base tables and run pending migrations; return the new schema version"""
+        cursor = conn.cursor()
+
         # Create Property table
-        self.cursor.execute(
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS properties (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -42,7 +394,7 @@ class Database:
         )
 
         # Create Agents table
-        self.cursor.execute(
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS agents (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,7 +409,7 @@ class Database:
         )
 
         # Create Inquiries table
-        self.cursor.execute(
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS inquiries (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -73,7 +425,7 @@ class Database:
         )
 
         # Create Marketing table
-        self.cursor.execute(
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS marketing (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -90,42 +442,307 @@ class Database:
             """
         )
 
-        self.conn.commit()
+        # Create Users table (login accounts)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                address TEXT,
+                mobile TEXT NOT NULL UNIQUE,
+                password TEXT NOT NULL
+            )
+            """
+        )
+
+        conn.commit()
+
+        # Upgrade existing databases in place (indexes, later schema changes)
+        return run_migrations(conn)
+
+    def is_empty(self):
+        """Return True if there are no properties, agents, inquiries or marketing entries"""
+        exists = " OR ".join(f"EXISTS (SELECT 1 FROM {table})" for table in TRACKED_TABLES)
+        return not self._fetchone(f"SELECT {exists}")[0]
+
+    def get_last_id(self, table):
+        """Return the highest id in `table` (0 when it is empty)"""
+        if table not in TRACKED_TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        return self._fetchone(f"SELECT COALESCE(MAX(id), 0) FROM {table}")[0]
+
+    def get_id_sequence(self, table):
+        """Return the last id AUTOINCREMENT gave out in `table` (0 before the first insert)
+
+        New rows get ids above it, even when the newest rows have since been
+        deleted and get_last_id is lower.
+        """
+        if table not in TRACKED_TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        row = self._fetchone("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        return row[0] if row else 0
+
+    def get_ids_after(self, table, after_id):
+        """Return the ids in `table` above after_id, in order (the rows a bulk insert just added)"""
+        if table not in TRACKED_TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        return [row[0] for row in self._fetchall(f"SELECT id FROM {table} WHERE id > ? ORDER BY id", (after_id,))]
+
+    # Change tracking
+    def get_changes(self, table, after_seq, limit=CHANGE_LIMIT):
+        """Return (seq, {row id: kind}) for the rows of `table` changed after `after_seq`
+
+        kind is the last change to each row: 'insert', 'update' or 'delete'. The
+        dict is None when the changes can't be listed cheaply (more than `limit`
+        rows, a bulk insert, or entries already pruned); the caller should then
+        reload. Pass the returned seq as after_seq next time, or None to only
+        read the current seq before a full load.
+        """
+        with self.pool.reader() as conn:
+            seq, first_seq = conn.execute("SELECT COALESCE(MAX(seq), 0), MIN(seq) FROM change_log").fetchone()
+            if after_seq is None or (first_seq is not None and first_seq > after_seq + 1):
+                return seq, None
+            rows = conn.execute(
+                """
+                SELECT row_id, kind FROM change_log
+                WHERE table_name = ? AND seq > ? AND seq <= ?
+                ORDER BY seq
+                LIMIT ?
+                """,
+                (table, after_seq, seq, limit + 1),
+            ).fetchall()
+
+        if len(rows) > limit:
+            return seq, None
+        changes = {}
+        for row_id, kind in rows:
+            if kind == "bulk":
+                return seq, None
+            changes[row_id] = kind
+        return seq, changes
+
+    def _search_ids(self, table, search_term, rank, like_order, limit, cancel):
+        """Return the ids of `table` rows matching search_term (see search_property_ids)
+
+        rank holds the bm25 column weights; like_order is the ORDER BY of the
+        LIKE fallback used when the table has no full-text index.
+        """
+        match = self._full_text_query(table, search_term)
+        if match:
+            fts = f"{table}_fts"
+            (matches,) = self._fetchone(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM {fts} WHERE {fts} MATCH ? LIMIT ?)",
+                (match, RANKED_SEARCH_LIMIT + 1),
+                cancel=cancel,
+            )
+            order = "rowid DESC" if matches > RANKED_SEARCH_LIMIT else f"bm25({fts}, {rank})"
+            rows = self._fetchall(
+                f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY {order} LIMIT ?",
+                (match, limit),
+                cancel=cancel,
+            )
+        else:
+            where = " OR ".join(f"{column} LIKE ?" for column in FTS_COLUMNS[table])
+            rows = self._fetchall(
+                f"SELECT id FROM {table} WHERE {where} ORDER BY {like_order} LIMIT ?",
+                [f"%{search_term}%"] * len(FTS_COLUMNS[table]) + [limit],
+                cancel=cancel,
+            )
+        return [row[0] for row in rows]
+
+    def _full_text_query(self, table, search_term):
+        """Return the FTS5 MATCH string for `table`, or None to fall back to LIKE"""
+        if f"{table}_fts" not in self.fts_tables:
+            return None
+        return build_match_query(search_term)
+
+    # User-related methods
+    def add_user(self, name, address, mobile, password):
+        """Register a new login user (raises sqlite3.IntegrityError for a duplicate mobile)"""
+        self._execute(
+            "INSERT INTO users (name, address, mobile, password) VALUES (?, ?, ?, ?)",
+            (name, address, mobile, password),
+        )
+
+    def authenticate_user(self, mobile, password):
+        """Return the matching user row, or None if the credentials are invalid"""
+        return self._fetchone("SELECT * FROM users WHERE mobile = ? AND password = ?", (mobile, password))
 
     # Property-related methods
-    def add_property(self, address, property_type, bedrooms, bathrooms, price, status, agent_id, description):
-        """Add a new property to the database"""
+    def add_property(self, address, property_type, bedrooms, bathrooms, price, status, agent_id, description,
+                     latitude=None, longitude=None):
+        """Add a new property to the database and return its id
+
+        Without coordinates the listing is placed at its locality's centre
+        (see property_location). Likely duplicates of it are recorded (see
+        find_duplicates).
+        """
         listing_date = datetime.now().strftime("%Y-%m-%d")
-        self.cursor.execute(
+        with self.pool.writer() as conn:
+            property_id = conn.execute(
+                """
+                INSERT INTO properties (address, property_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description,
+                                        city, locality, pincode, latitude, longitude, coordinates_manual)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (address, property_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description)
+                + property_location(address, latitude, longitude),
+            ).lastrowid
+            self._check_listing(conn, property_id)
+            self._commit(conn)
+        return property_id
+
+    def add_properties_bulk(self, rows):
+        """Insert many properties with one executemany and one commit
+
+        Each row is (address, property_type, bedrooms, bathrooms, price,
+        listing_date, status, agent_id, description), optionally followed by
+        latitude and longitude; rows may be any iterable. As with every
+        property write, city, locality and pincode are parsed from the address
+        and missing coordinates taken from the locality.
+        """
+        return self._bulk_insert(
+            "properties",
             """
-            INSERT INTO properties (address, property_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO properties (address, property_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description,
+                                    city, locality, pincode, latitude, longitude, coordinates_manual)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (address, property_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description),
+            (tuple(row[:9]) + property_location(row[0], *row[9:11]) for row in rows),
         )
-        self.conn.commit()
 
-    def update_property(self, property_id, address, property_type, bedrooms, bathrooms, price, status, agent_id, description):
-        """Update an existing property in the database"""
-        self.cursor.execute(
+    def upsert_properties_bulk(self, rows):
+        """Insert or update many properties by id with one executemany and one commit
+
+        Each row is (id, address, property_type, bedrooms, bathrooms, price,
+        listing_date, status, agent_id, description), optionally followed by
+        latitude and longitude. Coordinates entered by hand are kept when a
+        row brings none.
+        """
+        return self._executemany(
             """
-            UPDATE properties
-            SET address = ?, property_type = ?, bedrooms = ?, bathrooms = ?, price = ?, status = ?, agent_id = ?, description = ?
-            WHERE id = ?
+            INSERT INTO properties (id, address, property_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description,
+                                    city, locality, pincode, latitude, longitude, coordinates_manual)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                address = excluded.address, property_type = excluded.property_type,
+                bedrooms = excluded.bedrooms, bathrooms = excluded.bathrooms, price = excluded.price,
+                listing_date = excluded.listing_date, status = excluded.status,
+                agent_id = excluded.agent_id, description = excluded.description,
+                city = excluded.city, locality = excluded.locality, pincode = excluded.pincode,
+                latitude = IIF(properties.coordinates_manual > excluded.coordinates_manual, properties.latitude, excluded.latitude),
+                longitude = IIF(properties.coordinates_manual > excluded.coordinates_manual, properties.longitude, excluded.longitude),
+                coordinates_manual = MAX(properties.coordinates_manual, excluded.coordinates_manual)
             """,
-            (address, property_type, bedrooms, bathrooms, price, status, agent_id, description, property_id),
+            (tuple(row[:10]) + property_location(row[1], *row[10:12]) for row in rows),
         )
-        self.conn.commit()
+
+    def update_property(self, property_id, address, property_type, bedrooms, bathrooms, price, status, agent_id, description,
+                        latitude=None, longitude=None):
+        """Update an existing property in the database
+
+        Without coordinates the listing moves to its locality's centre, as when
+        added. Its open duplicate pairs are looked for again.
+        """
+        with self.pool.writer() as conn:
+            conn.execute(
+                """
+                UPDATE properties
+                SET address = ?, property_type = ?, bedrooms = ?, bathrooms = ?, price = ?, status = ?, agent_id = ?, description = ?,
+                    city = ?, locality = ?, pincode = ?, latitude = ?, longitude = ?, coordinates_manual = ?
+                WHERE id = ?
+                """,
+                (address, property_type, bedrooms, bathrooms, price, status, agent_id, description)
+                + property_location(address, latitude, longitude)
+                + (property_id,),
+            )
+            self._forget_duplicates(conn, "properties", [property_id])
+            self._check_listing(conn, property_id)
+            self._commit(conn)
 
     def delete_property(self, property_id):
         """Delete a property and its associated inquiries from the database"""
-        self.cursor.execute("DELETE FROM inquiries WHERE property_id = ?", (property_id,))
-        self.cursor.execute("DELETE FROM properties WHERE id = ?", (property_id,))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute("DELETE FROM inquiries WHERE property_id = ?", (property_id,))
+            conn.execute("DELETE FROM properties WHERE id = ?", (property_id,))
+            self._commit(conn)
+
+    def backfill_locations(self, limit=BACKFILL_ROWS):
+        """Parse and place up to `limit` listings saved before the location columns existed
+
+        Migrations 7 and 8 queue the listings they find; each call fills in
+        the city, locality, PIN code and (unless entered by hand) coordinates
+        of the next chunk in its own short transaction, so saves made in
+        between wait for one chunk at most, and an interrupted backfill
+        resumes where it stopped. Like _bulk_insert, the chunk skips the
+        per-row summary and change log triggers: the place summaries are
+        moved with one grouped pass each and the change log (the addresses
+        themselves don't change) gets one bulk entry once the last chunk is
+        done. Listings placed at their locality's centre stay out of the
+        R*Tree. Returns (listings updated, an upper bound on the listings
+        still to do).
+        """
+        summaries = [
+            summary for summary in summaries_of("properties")
+            if {"city", "locality", "pincode"} & set(SUMMARY_TABLES[summary][1])
+        ]
+        with self.pool.writer() as conn:
+            progress = conn.execute("SELECT last_id, end_id FROM backfills WHERE name = 'property_locations'").fetchone()
+            if progress is None:
+                return 0, 0
+            first_id, end_id = progress
+
+            # DDL doesn't open a transaction implicitly; the triggers must never be missing outside this one
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, address FROM properties WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                    (first_id, end_id, limit),
+                ).fetchall()
+                last_id = rows[-1][0] if len(rows) == limit else end_id
+
+                names = [f"{summary}_au" for summary in summaries] + ["properties_changes_au"]
+                triggers = [
+                    row[0]
+                    for row in conn.execute(
+                        f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders(names)})",
+                        names,
+                    )
+                ]
+                for name in names:
+                    conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                for summary in summaries:
+                    conn.execute(summary_range_sql(summary, -1), (first_id, last_id))
+                conn.executemany(
+                    """
+                    UPDATE properties SET city = ?, locality = ?, pincode = ?,
+                        latitude = IIF(coordinates_manual, latitude, ?), longitude = IIF(coordinates_manual, longitude, ?)
+                    WHERE id = ?
+                    """,
+                    [property_location(address)[:5] + (property_id,) for property_id, address in rows],
+                )
+                for summary in summaries:
+                    conn.execute(summary_range_sql(summary, 1), (first_id, last_id))
+                    conn.execute(f"DELETE FROM {summary} WHERE {SUMMARY_TABLES[summary][2][0][0]} = 0")
+                for create_sql in triggers:
+                    conn.execute(create_sql)
+
+                if last_id < end_id:
+                    conn.execute("UPDATE backfills SET last_id = ? WHERE name = 'property_locations'", (last_id,))
+                else:
+                    conn.execute("DELETE FROM backfills WHERE name = 'property_locations'")
+                    conn.execute(
+                        "INSERT INTO change_log (table_name, row_id, kind) VALUES ('properties', ?, 'bulk')", (end_id,)
+                    )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return len(rows), end_id - last_id
 
     def get_properties(self):
         """Get all properties with agent names"""
-        self.cursor.execute(
+        return self._fetchall(
             """
             SELECT p.id, p.address, p.property_type, p.bedrooms, p.bathrooms, p.price, p.status, a.name
             FROM properties p
@@ -133,49 +750,422 @@ class Database:
             ORDER BY p.id DESC
             """
         )
-        return self.cursor.fetchall()
+
+    def get_properties_page(self, after_id=None, page_size=PAGE_SIZE):
+        """Get one page of properties with agent names, newest first, after `after_id`"""
+        where = "WHERE p.id < ?" if after_id is not None else ""
+        params = (after_id, page_size) if after_id is not None else (page_size,)
+        return self._fetchall(
+            f"""
+            SELECT p.id, p.address, p.property_type, p.bedrooms, p.bathrooms, p.price, p.status, a.name
+            FROM properties p
+            LEFT JOIN agents a ON p.agent_id = a.id
+            {where}
+            ORDER BY p.id DESC
+            LIMIT ?
+            """,
+            params,
+        )
+
+    def get_property_ids(self):
+        """Get every property id in listing order (newest first)"""
+        return [row[0] for row in self._fetchall("SELECT id FROM properties ORDER BY id DESC")]
+
+    def get_properties_by_ids(self, property_ids, filters=None):
+        """Get the listing rows (as get_properties) of the given property ids that still exist
+
+        With a PropertyFilter, only the rows that still match it are returned. The
+        ids are looked up directly (NOT INDEXED keeps a filter's index out of it).
+        """
+        where, params = self.property_filter_sql(filters or PropertyFilter())
+        return self._fetchall(
+            f"""
+            SELECT p.id, p.address, p.property_type, p.bedrooms, p.bathrooms, p.price, p.status, a.name
+            FROM properties p NOT INDEXED
+            LEFT JOIN agents a ON p.agent_id = a.id
+            WHERE p.id IN ({placeholders(property_ids)}) AND {where}
+            """,
+            list(property_ids) + params,
+        )
+
+    def iter_properties(self, page_size=PAGE_SIZE):
+        """Lazily yield every property (as get_properties) one keyset page at a time"""
+        return self._iter_pages(
+            lambda last, size: self.get_properties_page(last[0] if last else None, size), page_size
+        )
 
     def get_property(self, property_id):
         """Get a single property by ID"""
-        self.cursor.execute("SELECT * FROM properties WHERE id = ?", (property_id,))
-        return self.cursor.fetchone()
+        return self._fetchone("SELECT * FROM properties WHERE id = ?", (property_id,))
+
+    def search_properties(self, search_term, limit=-1):
+        """Search properties by address, property type or description, best matches first
+
+        Rows carry a trailing highlighted snippet column (None on the LIKE fallback).
+        """
+        match = self._full_text_query("properties", search_term)
+        if match:
+            return self._fetchall(
+                f"""
+                SELECT p.id, p.address, p.property_type, p.bedrooms, p.bathrooms, p.price, p.status, a.name,
+                       snippet(properties_fts, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 12)
+                FROM properties_fts
+                JOIN properties p ON p.id = properties_fts.rowid
+                LEFT JOIN agents a ON p.agent_id = a.id
+                WHERE properties_fts MATCH ?
+                ORDER BY bm25(properties_fts, 4.0, 2.0, 1.0)
+                LIMIT ?
+                """,
+                (match, limit),
+            )
 
-    def search_properties(self, search_term):
-        """Search properties by address or property type"""
         search_pattern = f"%{search_term}%"
-        self.cursor.execute(
+        return self._fetchall(
             """
-            SELECT p.id, p.address, p.property_type, p.bedrooms, p.bathrooms, p.price, p.status, a.name
+            SELECT p.id, p.address, p.property_type, p.bedrooms, p.bathrooms, p.price, p.status, a.name, NULL
             FROM properties p
             LEFT JOIN agents a ON p.agent_id = a.id
-            WHERE p.address LIKE ? OR p.property_type LIKE ?
+            WHERE p.address LIKE ? OR p.property_type LIKE ? OR p.description LIKE ?
             ORDER BY p.id DESC
+            LIMIT ?
             """,
-            (search_pattern, search_pattern),
+            (search_pattern, search_pattern, search_pattern, limit),
         )
-        return self.cursor.fetchall()
+
+    def search_property_ids(self, search_term, limit=-1, cancel=None):
+        """Return the ids of the properties search_properties finds, best matches first
+
+        Very broad terms (over RANKED_SEARCH_LIMIT matches) come back newest
+        first instead. Setting `cancel` (a threading.Event) stops the query
+        early with CancelledError. Pass a limit to get the first results quickly;
+        they are the start of the full result.
+        """
+        return self._search_ids("properties", search_term, "4.0, 2.0, 1.0", "id DESC", limit, cancel)
 
     def get_property_combo_data(self):
-        """Get property data for combobox (ID - Address)"""
-        self.cursor.execute("SELECT id, address FROM properties ORDER BY address")
-        return self.cursor.fetchall()
+        """Get (id, address) rows for the property picker, unordered (the picker sorts them)"""
+        return self._fetchall("SELECT id, address FROM properties")
+
+    # Structured property search
+    def property_filter_sql(self, filters, exclude=None):
+        """Return (WHERE conditions, parameters) for the listings (alias p) matching `filters`
+
+        `exclude` names a facet dimension whose criteria are left out.
+        """
+        conditions = []
+        params = []
+
+        def add(dimension, condition, value):
+            if dimension != exclude and value is not None and value != "":
+                conditions.append(condition)
+                params.append(value)
+
+        add("property_type", "p.property_type = ?", filters.property_type)
+        add("status", "p.status = ?", filters.status)
+        add("bedrooms", "p.bedrooms >= ?", filters.min_bedrooms)
+        add("bedrooms", "p.bedrooms <= ?", filters.max_bedrooms)
+        add("bathrooms", "p.bathrooms >= ?", filters.min_bathrooms)
+        add("bathrooms", "p.bathrooms <= ?", filters.max_bathrooms)
+        add("price_band", "p.price >= ?", filters.min_price)
+        add("price_band", "p.price < ?", filters.max_price)
+        add("agent_id", "p.agent_id = ?", filters.agent_id)
+        add("city", "p.city = ?", filters.city)
+        add("locality", "p.locality = ?", filters.locality)
+        add("pincode", "p.pincode = ?", filters.pincode)
+        if "p.locality = ?" in conditions and "p.city = ?" not in conditions:
+            # The cities with that locality, so the place index (city first) serves it too
+            add("locality", "p.city IN (SELECT city FROM city_summary WHERE locality = ?)", filters.locality)
+
+        if filters.search:
+            match = self._full_text_query("properties", filters.search)
+            if match:
+                conditions.append("p.id IN (SELECT rowid FROM properties_fts WHERE properties_fts MATCH ?)")
+                params.append(match)
+            else:
+                columns = FTS_COLUMNS["properties"]
+                conditions.append("(" + " OR ".join(f"p.{column} LIKE ?" for column in columns) + ")")
+                params += [f"%{filters.search}%"] * len(columns)
+
+        return " AND ".join(conditions) or "1", params
+
+    def _facet_filter_sql(self, filters, exclude=None):
+        """Return (facet table, WHERE conditions, parameters) answering `filters`, or None
+
+        property_facets counts listings without their agent or place,
+        agent_facets per agent and location_facets per city and locality; none
+        has text or PIN codes, and all count prices in bands. `exclude` names a
+        facet dimension whose criteria are left out (agent_id: counts per
+        agent, so from agent_facets; city or locality: from location_facets).
+        """
+        if filters.search or filters.pincode or not filters.on_price_bands():
+            return None
+        by_agent = exclude == "agent_id" or filters.agent_id is not None
+        by_place = exclude in ("city", "locality") or bool(filters.city or filters.locality)
+        if by_agent and by_place:
+            return None
+
+        conditions = []
+        params = []
+        table = "agent_facets" if by_agent else "location_facets" if by_place else "property_facets"
+        if exclude != "agent_id" and filters.agent_id is not None:
+            conditions.append("agent_id = ?")
+            params.append(filters.agent_id)
+
+        for dimension, low, high, high_condition in (
+            ("bedrooms", filters.min_bedrooms, filters.max_bedrooms, "bedrooms <= ?"),
+            ("bathrooms", filters.min_bathrooms, filters.max_bathrooms, "bathrooms <= ?"),
+            ("price_band", filters.min_price, filters.max_price, "price_band < ?"),
+        ):
+            if dimension == exclude or (low is None and high is None):
+                continue
+            # Unknown values are counted under -1; a range never includes them
+            conditions.append(f"{dimension} >= ?")
+            params.append(low if low is not None else 0)
+            if high is not None:
+                conditions.append(high_condition)
+                params.append(high)
+        for dimension in ("property_type", "status", "city", "locality"):
+            value = getattr(filters, dimension)
+            if dimension != exclude and value:
+                conditions.append(f"{dimension} = ?")
+                params.append(value)
+
+        return table, " AND ".join(conditions) or "1", params
+
+    def count_properties(self, filters, cancel=None):
+        """Return the number of listings matching a PropertyFilter"""
+        facet = self._facet_filter_sql(filters)
+        if facet is not None:
+            table, where, params = facet
+            return self._fetchone(
+                f"SELECT COALESCE(SUM(listings), 0) FROM {table} WHERE {where}", params, cancel=cancel
+            )[0]
+        where, params = self.property_filter_sql(filters)
+        return self._fetchone(f"SELECT COUNT(*) FROM properties p WHERE {where}", params, cancel=cancel)[0]
+
+    def filter_property_ids(self, filters, limit=-1, cancel=None):
+        """Return the ids of the listings matching a PropertyFilter, newest first
+
+        Setting `cancel` (a threading.Event) stops the query early with
+        CancelledError. Pass a limit to get the first results quickly.
+        """
+        where, params = self.property_filter_sql(filters)
+
+        # The facet table tells (within a price band) how broad the filter is. Broad
+        # filters read the table newest first; narrow ones an index, then sort.
+        estimate_filters = filters._replace(search=None, agent_id=None).to_price_bands()
+        scan = (
+            not filters.search
+            and filters.agent_id is None
+            and self.count_properties(estimate_filters, cancel)
+            > FILTER_SCAN_SHARE * self.count_properties(PropertyFilter(), cancel)
+        )
+        return [
+            row[0]
+            for row in self._fetchall(
+                f"""
+                SELECT p.id FROM properties p {"NOT INDEXED" if scan else ""}
+                WHERE {where}
+                ORDER BY p.id DESC
+                LIMIT ?
+                """,
+                params + [limit],
+                cancel=cancel,
+            )
+        ]
+
+    def get_property_facets(self, filters, cancel=None):
+        """Return {dimension: [(value, listings), ...]} for each of PROPERTY_FACETS
+
+        Each dimension is counted with every criterion of `filters` except its
+        own, so the counts say how many listings choosing that value would
+        show. price_band values are PRICE_BANDS lower edges. Missing values come
+        as None. The agent facet holds the FACET_AGENTS agents with the most
+        matching listings; the others are ordered by value (rooms, prices) or
+        by count (type, status, city, locality). Counts come from the facet
+        tables whenever the criteria allow (no text search or PIN code,
+        band-edge prices, not both an agent and a place).
+        """
+        return {dimension: self._property_facet(filters, dimension, cancel) for dimension in PROPERTY_FACETS}
+
+    def _property_facet(self, filters, dimension, cancel):
+        """The (value, listings) counts of one facet dimension (see get_property_facets)"""
+        facet = self._facet_filter_sql(filters, dimension)
+        order = "ORDER BY 2 DESC LIMIT ?" if dimension == "agent_id" else ""
+        limit = [FACET_AGENTS] if dimension == "agent_id" else []
+        if dimension == "agent_id" and facet is not None and facet[1] == "1":
+            # Nothing to filter on: the dashboard's per-agent counts are indexed by size
+            rows = self._fetchall(
+                f"SELECT agent_id, listings FROM agent_listing_summary {order}", limit, cancel=cancel
+            )
+        elif dimension in ("city", "locality") and facet is not None and facet[1] == "1":
+            # Likewise the listings per city and locality
+            rows = self._fetchall(f"SELECT {dimension}, SUM(listings) FROM city_summary GROUP BY 1", cancel=cancel)
+        elif facet is not None:
+            table, where, params = facet
+            rows = self._fetchall(
+                f"SELECT {dimension}, SUM(listings) FROM {table} WHERE {where} GROUP BY 1 {order}",
+                params + limit,
+                cancel=cancel,
+            )
+        else:
+            where, params = self.property_filter_sql(filters, dimension)
+            column = price_band_sql("p") if dimension == "price_band" else f"p.{dimension}"
+            rows = self._fetchall(
+                f"SELECT {column}, COUNT(*) FROM properties p WHERE {where} GROUP BY 1 {order}",
+                params + limit,
+                cancel=cancel,
+            )
+
+        # The facet tables' stand-ins for missing values (agent 0 is unassigned)
+        rows = [(None if value in (-1, "") or (dimension == "agent_id" and value == 0) else value, count)
+                for value, count in rows]
+        if dimension in ("property_type", "status", "agent_id", "city", "locality"):
+            return sorted(rows, key=lambda row: -row[1])
+        return sorted(rows, key=lambda row: (row[0] is None, row[0]))
+
+    # Nearby search
+    def search_properties_near(self, latitude, longitude, radius_km, filters=None, limit=-1, cancel=None):
+        """Return (property id, distance in km) for the listings within radius_km of a point, nearest first
+
+        Candidates are the listings in the circle's bounding box that match
+        the PropertyFilter, if any: those with coordinates of their own found
+        through the R*Tree and those placed at a locality's centre through
+        the localities centred in the box, or all of them through the
+        filter's own index when the facet counts show it matches fewer
+        listings than the box holds (and through the coordinate index without
+        R*Tree support). Their exact (haversine) distances are then worked out
+        NEAR_BATCH_SIZE candidates at a time, once per distinct point, and
+        those outside the circle dropped. Listings at the same distance come
+        newest first. Pass a limit to get just the nearest ones. Setting
+        `cancel` (a threading.Event) stops the search early with
+        CancelledError.
+        """
+        if radius_km < 0:
+            return []
+        filters = filters or PropertyFilter()
+        where, params = self.property_filter_sql(filters)
+        south, north, spans = bounding_box(latitude, longitude, radius_km)
+        rtree_box = "r.max_latitude >= ? AND r.min_latitude <= ? AND r.max_longitude >= ? AND r.min_longitude <= ?"
+        by_rtree = self.coordinate_index
+        if by_rtree:
+            localities = localities_in_box(south, north, spans)
+        if by_rtree and self._facet_filter_sql(filters) is not None and not filters.is_empty():
+            in_box = sum(
+                self._fetchone(
+                    f"SELECT COUNT(*) FROM properties_rtree r WHERE {rtree_box}", (south, north, west, east), cancel
+                )[0]
+                for west, east in spans
+            )
+            if localities:
+                in_box += self._fetchone(
+                    f"""
+                    SELECT COALESCE(SUM(listings), 0) FROM city_summary
+                    WHERE (city, locality) IN (VALUES {", ".join(["(?, ?)"] * len(localities))})
+                    """,
+                    [value for place in localities for value in place],
+                    cancel,
+                )[0]
+            by_rtree = self.count_properties(filters, cancel) > in_box
+        if by_rtree:
+            # Box first, then each candidate's row (CROSS JOIN keeps that order)
+            queries = [
+                (
+                    f"""
+                    SELECT p.id, p.latitude, p.longitude FROM properties_rtree r CROSS JOIN properties p ON p.id = r.id
+                    WHERE {rtree_box} AND {where}
+                    """,
+                    [south, north, west, east] + params,
+                )
+                for west, east in spans
+            ]
+            queries += [
+                (
+                    f"""
+                    SELECT p.id, p.latitude, p.longitude FROM properties p
+                    WHERE p.city = ? AND p.locality = ? AND NOT p.coordinates_manual AND {where}
+                    """,
+                    [city, locality] + params,
+                )
+                for city, locality in localities
+            ]
+        else:
+            queries = [
+                (
+                    f"""
+                    SELECT p.id, p.latitude, p.longitude FROM properties p
+                    WHERE p.latitude BETWEEN ? AND ? AND p.longitude BETWEEN ? AND ? AND {where}
+                    """,
+                    [south, north, west, east] + params,
+                )
+                for west, east in spans
+            ]
+
+        # A point is inside when its haversine, sin²(distance / 2R), is at most the radius's
+        centre = radians(latitude), radians(longitude), cos(radians(latitude))
+        reach = sin(min(radius_km / EARTH_RADIUS_KM, pi) / 2) ** 2
+        found = []  # (haversine, -id): sorts nearest first, then newest first
+        with self.pool.reader() as conn, self._interruptible(conn, cancel):
+            for sql, query_params in queries:
+                cursor = conn.execute(sql, query_params)
+                while True:
+                    batch = cursor.fetchmany(NEAR_BATCH_SIZE)
+                    if not batch:
+                        break
+                    # Listings placed at a locality's centre share their point
+                    points = dict.fromkeys((row[1], row[2]) for row in batch)
+                    inside = {point: value for point, value in zip(points, haversines(centre, points)) if value <= reach}
+                    found += [(inside[row[1], row[2]], -row[0]) for row in batch if (row[1], row[2]) in inside]
+
+        found = heapq.nsmallest(limit, found) if limit >= 0 else sorted(found)
+        return [(-negated_id, 2 * EARTH_RADIUS_KM * asin(sqrt(value))) for value, negated_id in found]
 
     # Agent-related methods
     def add_agent(self, name, phone, email, license_number, commission_rate):
-        """Add a new agent to the database"""
+        """Add a new agent to the database and return its id"""
         join_date = datetime.now().strftime("%Y-%m-%d")
-        self.cursor.execute(
+        return self._execute(
             """
             INSERT INTO agents (name, phone, email, license_number, join_date, commission_rate)
             VALUES (?, ?, ?, ?, ?, ?)
             """,
             (name, phone, email, license_number, join_date, commission_rate),
         )
-        self.conn.commit()
+
+    def add_agents_bulk(self, rows):
+        """Insert many agents with one executemany and one commit
+
+        Each row is (name, phone, email, license_number, join_date, commission_rate).
+        """
+        return self._bulk_insert(
+            "agents",
+            """
+            INSERT INTO agents (name, phone, email, license_number, join_date, commission_rate)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+    def upsert_agents_bulk(self, rows):
+        """Insert or update many agents by id with one executemany and one commit
+
+        Each row is (id, name, phone, email, license_number, join_date, commission_rate).
+        """
+        return self._executemany(
+            """
+            INSERT INTO agents (id, name, phone, email, license_number, join_date, commission_rate)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                name = excluded.name, phone = excluded.phone, email = excluded.email,
+                license_number = excluded.license_number, join_date = excluded.join_date,
+                commission_rate = excluded.commission_rate
+            """,
+            rows,
+        )
 
     def update_agent(self, agent_id, name, phone, email, license_number, commission_rate):
         """Update an existing agent in the database"""
-        self.cursor.execute(
+        self._execute(
             """
             UPDATE agents
             SET name = ?, phone = ?, email = ?, license_number = ?, commission_rate = ?
@@ -183,180 +1173,785 @@ class Database:
             """,
             (name, phone, email, license_number, commission_rate, agent_id),
         )
-        self.conn.commit()
 
     def delete_agent(self, agent_id):
         """Delete an agent from the database"""
-        self.cursor.execute("UPDATE properties SET agent_id = NULL WHERE agent_id = ?", (agent_id,))
-        self.cursor.execute("UPDATE inquiries SET agent_id = NULL WHERE agent_id = ?", (agent_id,))
-        self.cursor.execute("DELETE FROM agents WHERE id = ?", (agent_id,))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute("UPDATE properties SET agent_id = NULL WHERE agent_id = ?", (agent_id,))
+            conn.execute("UPDATE inquiries SET agent_id = NULL WHERE agent_id = ?", (agent_id,))
+            conn.execute("DELETE FROM agents WHERE id = ?", (agent_id,))
+            self._commit(conn)
 
     def get_agents(self):
         """Get all agents"""
-        self.cursor.execute("SELECT * FROM agents ORDER BY name")
-        return self.cursor.fetchall()
+        return self._fetchall("SELECT * FROM agents ORDER BY name")
+
+    def get_agent_ids(self):
+        """Get every agent id in listing order (by name)"""
+        return [row[0] for row in self._fetchall("SELECT id FROM agents ORDER BY name")]
+
+    def get_agents_by_ids(self, agent_ids):
+        """Get the agents with the given ids that still exist"""
+        return self._fetchall(f"SELECT * FROM agents WHERE id IN ({placeholders(agent_ids)})", list(agent_ids))
 
     def get_agent(self, agent_id):
         """Get a single agent by ID"""
-        self.cursor.execute("SELECT * FROM agents WHERE id = ?", (agent_id,))
-        return self.cursor.fetchone()
+        return self._fetchone("SELECT * FROM agents WHERE id = ?", (agent_id,))
+
+    def search_agents(self, search_term, limit=-1):
+        """Search agents by name, email, or license number, best matches first
+
+        Rows carry a trailing highlighted snippet column (None on the LIKE fallback).
+        """
+        match = self._full_text_query("agents", search_term)
+        if match:
+            return self._fetchall(
+                f"""
+                SELECT a.*, snippet(agents_fts, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 12)
+                FROM agents_fts
+                JOIN agents a ON a.id = agents_fts.rowid
+                WHERE agents_fts MATCH ?
+                ORDER BY bm25(agents_fts, 4.0, 1.0, 2.0)
+                LIMIT ?
+                """,
+                (match, limit),
+            )
 
-    def search_agents(self, search_term):
-        """Search agents by name, email, or license number"""
         search_pattern = f"%{search_term}%"
-        self.cursor.execute(
+        return self._fetchall(
             """
-            SELECT * FROM agents
+            SELECT *, NULL FROM agents
             WHERE name LIKE ? OR email LIKE ? OR license_number LIKE ?
             ORDER BY name
+            LIMIT ?
             """,
-            (search_pattern, search_pattern, search_pattern),
+            (search_pattern, search_pattern, search_pattern, limit),
         )
-        return self.cursor.fetchall()
+
+    def search_agent_ids(self, search_term, limit=-1, cancel=None):
+        """Return the ids of the agents search_agents finds (see search_property_ids)"""
+        return self._search_ids("agents", search_term, "4.0, 1.0, 2.0", "name", limit, cancel)
 
     def get_agent_combo_data(self):
         """Get agent data for combobox (ID - Name)"""
-        self.cursor.execute("SELECT id, name FROM agents ORDER BY name")
-        return self.cursor.fetchall()
+        return self._fetchall("SELECT id, name FROM agents ORDER BY name")
 
     # Inquiry-related methods
     def add_inquiry(self, client_name, contact_info, property_id, status, notes, agent_id):
-        """Add a new inquiry to the database"""
+        """Add a new inquiry to the database and return its id
+
+        Its contact keys are saved and other spellings of the client recorded
+        as likely duplicates (see find_duplicates).
+        """
         inquiry_date = datetime.now().strftime("%Y-%m-%d")
-        self.cursor.execute(
-            """
-            INSERT INTO inquiries (client_name, contact_info, property_id, inquiry_date, status, notes, agent_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (client_name, contact_info, property_id, inquiry_date, status, notes, agent_id),
-        )
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            inquiry_id = conn.execute(
+                """
+                INSERT INTO inquiries (client_name, contact_info, property_id, inquiry_date, status, notes, agent_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (client_name, contact_info, property_id, inquiry_date, status, notes, agent_id),
+            ).lastrowid
+            self._add_contacts(conn, [(inquiry_id, contact_info)])
+            self._check_client(conn, inquiry_id)
+            self._commit(conn)
+        return inquiry_id
+
+    def add_inquiries_bulk(self, rows):
+        """Insert many inquiries with one executemany and one commit
+
+        Each row is (client_name, contact_info, property_id, inquiry_date, status, notes, agent_id).
+        The new inquiries' contact keys are saved in the same transaction;
+        duplicates among them are left to find_duplicates.
+        """
+        with self.transaction(), self.pool.writer() as conn:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM inquiries").fetchone()[0]
+            count = self._bulk_insert(
+                "inquiries",
+                """
+                INSERT INTO inquiries (client_name, contact_info, property_id, inquiry_date, status, notes, agent_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self._add_contacts(conn, conn.execute("SELECT id, contact_info FROM inquiries WHERE id > ?", (last_id,)))
+        return count
+
+    def upsert_inquiries_bulk(self, rows):
+        """Insert or update many inquiries by id with one executemany and one commit
+
+        Each row is (id, client_name, contact_info, property_id, inquiry_date, status, notes, agent_id).
+        The rows' contact keys are replaced in the same transaction.
+        """
+        contacts = []
+
+        def keyed(rows):
+            for row in rows:
+                contacts.append((row[0], row[2]))
+                yield row
+
+        with self.transaction(), self.pool.writer() as conn:
+            count = self._executemany(
+                """
+                INSERT INTO inquiries (id, client_name, contact_info, property_id, inquiry_date, status, notes, agent_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    client_name = excluded.client_name, contact_info = excluded.contact_info,
+                    property_id = excluded.property_id, inquiry_date = excluded.inquiry_date,
+                    status = excluded.status, notes = excluded.notes, agent_id = excluded.agent_id
+                """,
+                keyed(rows),
+            )
+            self._replace_contacts(conn, contacts)
+        return count
 
     def update_inquiry(self, inquiry_id, client_name, contact_info, property_id, status, notes, agent_id):
-        """Update an existing inquiry in the database"""
-        self.cursor.execute(
-            """
-            UPDATE inquiries
-            SET client_name = ?, contact_info = ?, property_id = ?, status = ?, notes = ?, agent_id = ?
-            WHERE id = ?
-            """,
-            (client_name, contact_info, property_id, status, notes, agent_id, inquiry_id),
-        )
-        self.conn.commit()
+        """Update an existing inquiry in the database
+
+        Its contact keys are replaced and its open duplicate pairs looked for again.
+        """
+        with self.pool.writer() as conn:
+            conn.execute(
+                """
+                UPDATE inquiries
+                SET client_name = ?, contact_info = ?, property_id = ?, status = ?, notes = ?, agent_id = ?
+                WHERE id = ?
+                """,
+                (client_name, contact_info, property_id, status, notes, agent_id, inquiry_id),
+            )
+            self._replace_contacts(conn, [(inquiry_id, contact_info)])
+            self._forget_duplicates(conn, "inquiries", [inquiry_id])
+            self._check_client(conn, inquiry_id)
+            self._commit(conn)
 
     def delete_inquiry(self, inquiry_id):
         """Delete an inquiry from the database"""
-        self.cursor.execute("DELETE FROM inquiries WHERE id = ?", (inquiry_id,))
-        self.conn.commit()
+        self._execute("DELETE FROM inquiries WHERE id = ?", (inquiry_id,))
 
     def get_inquiries(self):
         """Get all inquiries with property and agent info"""
-        self.cursor.execute(
+        return self._fetchall(
             """
             SELECT i.id, i.client_name, p.address, i.inquiry_date, i.status, a.name
             FROM inquiries i
             LEFT JOIN properties p ON i.property_id = p.id
             LEFT JOIN agents a ON i.agent_id = a.id
-            ORDER BY i.inquiry_date DESC
+            ORDER BY i.inquiry_date DESC, i.id DESC
             """
         )
-        return self.cursor.fetchall()
+
+    def get_inquiries_page(self, after=None, page_size=PAGE_SIZE, status=None):
+        """Get one page of inquiries, newest first, ordered on (inquiry_date, id)
+
+        `after` is the (inquiry_date, id) of the last row of the previous page.
+        Pass `status` to page through filter_inquiries_by_status instead.
+        """
+        conditions = []
+        params = []
+        if status is not None:
+            conditions.append("i.status = ?")
+            params.append(status)
+        if after is not None:
+            conditions.append("(i.inquiry_date, i.id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(page_size)
+        return self._fetchall(
+            f"""
+            SELECT i.id, i.client_name, p.address, i.inquiry_date, i.status, a.name
+            FROM inquiries i
+            LEFT JOIN properties p ON i.property_id = p.id
+            LEFT JOIN agents a ON i.agent_id = a.id
+            {where}
+            ORDER BY i.inquiry_date DESC, i.id DESC
+            LIMIT ?
+            """,
+            params,
+        )
+
+    def get_inquiry_ids(self, status=None):
+        """Get every inquiry id in listing order (newest first), optionally only those with `status`"""
+        if status is None:
+            rows = self._fetchall("SELECT id FROM inquiries ORDER BY inquiry_date DESC, id DESC")
+        else:
+            rows = self._fetchall(
+                "SELECT id FROM inquiries WHERE status = ? ORDER BY inquiry_date DESC, id DESC", (status,)
+            )
+        return [row[0] for row in rows]
+
+    def get_inquiries_by_ids(self, inquiry_ids, status=None):
+        """Get the listing rows (as get_inquiries) of the given inquiry ids, optionally only those with `status`"""
+        params = list(inquiry_ids)
+        where = f"i.id IN ({placeholders(inquiry_ids)})"
+        if status is not None:
+            where += " AND i.status = ?"
+            params.append(status)
+        return self._fetchall(
+            f"""
+            SELECT i.id, i.client_name, p.address, i.inquiry_date, i.status, a.name
+            FROM inquiries i
+            LEFT JOIN properties p ON i.property_id = p.id
+            LEFT JOIN agents a ON i.agent_id = a.id
+            WHERE {where}
+            """,
+            params,
+        )
+
+    def iter_inquiries(self, page_size=PAGE_SIZE, status=None):
+        """Lazily yield every inquiry (as get_inquiries) one keyset page at a time"""
+        return self._iter_pages(
+            lambda last, size: self.get_inquiries_page((last[3], last[0]) if last else None, size, status),
+            page_size,
+        )
 
     def get_inquiry(self, inquiry_id):
         """Get a single inquiry by ID"""
-        self.cursor.execute("SELECT * FROM inquiries WHERE id = ?", (inquiry_id,))
-        return self.cursor.fetchone()
+        return self._fetchone("SELECT * FROM inquiries WHERE id = ?", (inquiry_id,))
+
+    def search_inquiries(self, search_term, limit=-1):
+        """Search inquiries by client name, contact info or notes, best matches first
+
+        Rows carry a trailing highlighted snippet column (None on the LIKE fallback).
+        """
+        match = self._full_text_query("inquiries", search_term)
+        if match:
+            return self._fetchall(
+                f"""
+                SELECT i.id, i.client_name, p.address, i.inquiry_date, i.status, a.name,
+                       snippet(inquiries_fts, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 12)
+                FROM inquiries_fts
+                JOIN inquiries i ON i.id = inquiries_fts.rowid
+                LEFT JOIN properties p ON i.property_id = p.id
+                LEFT JOIN agents a ON i.agent_id = a.id
+                WHERE inquiries_fts MATCH ?
+                ORDER BY bm25(inquiries_fts, 4.0, 2.0, 1.0)
+                LIMIT ?
+                """,
+                (match, limit),
+            )
 
-    def search_inquiries(self, search_term):
-        """Search inquiries by client name"""
         search_pattern = f"%{search_term}%"
-        self.cursor.execute(
+        return self._fetchall(
             """
-            SELECT i.id, i.client_name, p.address, i.inquiry_date, i.status, a.name
+            SELECT i.id, i.client_name, p.address, i.inquiry_date, i.status, a.name, NULL
             FROM inquiries i
             LEFT JOIN properties p ON i.property_id = p.id
             LEFT JOIN agents a ON i.agent_id = a.id
-            WHERE i.client_name LIKE ?
+            WHERE i.client_name LIKE ? OR i.contact_info LIKE ? OR i.notes LIKE ?
             ORDER BY i.inquiry_date DESC
+            LIMIT ?
             """,
-            (search_pattern,),
+            (search_pattern, search_pattern, search_pattern, limit),
         )
-        return self.cursor.fetchall()
+
+    def search_inquiry_ids(self, search_term, limit=-1, cancel=None):
+        """Return the ids of the inquiries search_inquiries finds (see search_property_ids)"""
+        return self._search_ids("inquiries", search_term, "4.0, 2.0, 1.0", "inquiry_date DESC, id DESC", limit, cancel)
 
     def filter_inquiries_by_status(self, status):
         """Filter inquiries by status"""
-        self.cursor.execute(
+        return self._fetchall(
             """
             SELECT i.id, i.client_name, p.address, i.inquiry_date, i.status, a.name
             FROM inquiries i
             LEFT JOIN properties p ON i.property_id = p.id
             LEFT JOIN agents a ON i.agent_id = a.id
             WHERE i.status = ?
-            ORDER BY i.inquiry_date DESC
+            ORDER BY i.inquiry_date DESC, i.id DESC
             """,
             (status,),
         )
-        return self.cursor.fetchall()
 
     # Marketing-related methods
-    def add_marketing(self, address, marketing_type, bedrooms, bathrooms, price, status, agent_id, description):
-        """Add a new marketing entry to the database"""
+    def add_marketing(self, address, marketing_type, bedrooms, bathrooms, price, status, agent_id, description,
+                      property_id=None, channel=None, registration_fee=None, spend=None, start_date=None, end_date=None):
+        """Add a new marketing campaign to the database and return its id
+
+        A blank address or marketing type is taken from the linked property.
+        """
         listing_date = datetime.now().strftime("%Y-%m-%d")
-        self.cursor.execute(
-            """
-            INSERT INTO marketing (address, marketing_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        return self._execute(
+            f"""
+            INSERT INTO marketing (address, marketing_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description,
+                                   property_id, channel, registration_fee, spend, start_date, end_date)
+            VALUES ({MARKETING_FROM_PROPERTY}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (address, marketing_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description),
+            (
+                address, property_id, marketing_type, property_id, bedrooms, bathrooms, price, listing_date, status,
+                agent_id, description, property_id, channel, registration_fee, spend, start_date, end_date,
+            ),
         )
-        self.conn.commit()
 
-    def update_marketing(self, marketing_id, address, marketing_type, bedrooms, bathrooms, price, status, agent_id, description):
-        """Update an existing marketing entry in the database"""
-        self.cursor.execute(
+    def add_marketing_bulk(self, rows):
+        """Insert many marketing campaigns with one executemany and one commit
+
+        Each row is (address, marketing_type, bedrooms, bathrooms, price,
+        listing_date, status, agent_id, description, property_id, channel,
+        registration_fee, spend, start_date, end_date).
+        """
+        return self._bulk_insert(
+            "marketing",
             """
+            INSERT INTO marketing (address, marketing_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description,
+                                   property_id, channel, registration_fee, spend, start_date, end_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+    def update_marketing(self, marketing_id, address, marketing_type, bedrooms, bathrooms, price, status, agent_id, description,
+                         property_id=None, channel=None, registration_fee=None, spend=None, start_date=None, end_date=None):
+        """Update an existing marketing campaign in the database (blanks filled as in add_marketing)"""
+        self._execute(
+            f"""
             UPDATE marketing
-            SET address = ?, marketing_type = ?, bedrooms = ?, bathrooms = ?, price = ?, status = ?, agent_id = ?, description = ?
+            SET ({MARKETING_UPDATE_COLUMNS}) = ({MARKETING_FROM_PROPERTY}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             WHERE id = ?
             """,
-            (address, marketing_type, bedrooms, bathrooms, price, status, agent_id, description, marketing_id),
+            (
+                address, property_id, marketing_type, property_id, bedrooms, bathrooms, price, status, agent_id,
+                description, property_id, channel, registration_fee, spend, start_date, end_date, marketing_id,
+            ),
         )
-        self.conn.commit()
 
     def delete_marketing(self, marketing_id):
-        """Delete a marketing entry from the database"""
-        self.cursor.execute("DELETE FROM marketing WHERE id = ?", (marketing_id,))
-        self.conn.commit()
+        """Delete a marketing campaign from the database"""
+        self._execute("DELETE FROM marketing WHERE id = ?", (marketing_id,))
 
     def get_marketing_entries(self):
-        """Get all marketing entries with agent names"""
-        self.cursor.execute(
-            """
-            SELECT m.id, m.address, m.marketing_type, m.bedrooms, m.bathrooms, m.price, m.status, a.name
+        """Get all marketing campaigns with property addresses and agent names"""
+        return self._fetchall(
+            f"""
+            SELECT {MARKETING_LISTING_COLUMNS}
             FROM marketing m
+            LEFT JOIN properties p ON m.property_id = p.id
             LEFT JOIN agents a ON m.agent_id = a.id
             ORDER BY m.id DESC
             """
         )
-        return self.cursor.fetchall()
 
-    def search_marketing_entries(self, search_term):
-        """Search marketing entries by address or marketing type"""
+    def get_marketing_entries_page(self, after_id=None, page_size=PAGE_SIZE):
+        """Get one page of marketing campaigns (as get_marketing_entries), newest first, after `after_id`"""
+        where = "WHERE m.id < ?" if after_id is not None else ""
+        params = (after_id, page_size) if after_id is not None else (page_size,)
+        return self._fetchall(
+            f"""
+            SELECT {MARKETING_LISTING_COLUMNS}
+            FROM marketing m
+            LEFT JOIN properties p ON m.property_id = p.id
+            LEFT JOIN agents a ON m.agent_id = a.id
+            {where}
+            ORDER BY m.id DESC
+            LIMIT ?
+            """,
+            params,
+        )
+
+    def get_marketing_ids(self):
+        """Get every marketing entry id in listing order (newest first)"""
+        return [row[0] for row in self._fetchall("SELECT id FROM marketing ORDER BY id DESC")]
+
+    def get_marketing_entries_by_ids(self, marketing_ids):
+        """Get the listing rows (as get_marketing_entries) of the given marketing ids that still exist"""
+        return self._fetchall(
+            f"""
+            SELECT {MARKETING_LISTING_COLUMNS}
+            FROM marketing m
+            LEFT JOIN properties p ON m.property_id = p.id
+            LEFT JOIN agents a ON m.agent_id = a.id
+            WHERE m.id IN ({placeholders(marketing_ids)})
+            """,
+            list(marketing_ids),
+        )
+
+    def iter_marketing_entries(self, page_size=PAGE_SIZE):
+        """Lazily yield every marketing entry (as get_marketing_entries) one keyset page at a time"""
+        return self._iter_pages(
+            lambda last, size: self.get_marketing_entries_page(last[0] if last else None, size), page_size
+        )
+
+    def search_marketing_entries(self, search_term, limit=-1):
+        """Search marketing entries by address, marketing type or description, best matches first
+
+        Rows carry a trailing highlighted snippet column (None on the LIKE fallback).
+        """
+        match = self._full_text_query("marketing", search_term)
+        if match:
+            return self._fetchall(
+                f"""
+                SELECT {MARKETING_LISTING_COLUMNS},
+                       snippet(marketing_fts, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 12)
+                FROM marketing_fts
+                JOIN marketing m ON m.id = marketing_fts.rowid
+                LEFT JOIN properties p ON m.property_id = p.id
+                LEFT JOIN agents a ON m.agent_id = a.id
+                WHERE marketing_fts MATCH ?
+                ORDER BY bm25(marketing_fts, 4.0, 2.0, 1.0)
+                LIMIT ?
+                """,
+                (match, limit),
+            )
+
         search_pattern = f"%{search_term}%"
-        self.cursor.execute(
-            """
-            SELECT m.id, m.address, m.marketing_type, m.bedrooms, m.bathrooms, m.price, m.status, a.name
+        return self._fetchall(
+            f"""
+            SELECT {MARKETING_LISTING_COLUMNS}, NULL
             FROM marketing m
+            LEFT JOIN properties p ON m.property_id = p.id
             LEFT JOIN agents a ON m.agent_id = a.id
-            WHERE m.address LIKE ? OR m.marketing_type LIKE ?
+            WHERE COALESCE(p.address, m.address) LIKE ? OR m.marketing_type LIKE ? OR m.description LIKE ?
             ORDER BY m.id DESC
+            LIMIT ?
             """,
-            (search_pattern, search_pattern),
+            (search_pattern, search_pattern, search_pattern, limit),
         )
-        return self.cursor.fetchall()
+
+    def search_marketing_ids(self, search_term, limit=-1, cancel=None):
+        """Return the ids of the marketing entries search_marketing_entries finds (see search_property_ids)"""
+        return self._search_ids("marketing", search_term, "4.0, 2.0, 1.0", "id DESC", limit, cancel)
 
     def get_marketing(self, marketing_id):
-        """Get a single marketing entry by ID"""
-        self.cursor.execute("SELECT * FROM marketing WHERE id = ?", (marketing_id,))
-        return self.cursor.fetchone()
\ No newline at end of file
+        """Get a single marketing campaign by ID (all columns, campaign columns last)"""
+        return self._fetchone("SELECT * FROM marketing WHERE id = ?", (marketing_id,))
+
+    # Duplicate-related methods
+    def _add_contacts(self, conn, rows):
+        """Save the contact keys (see dedup.contact_keys) of (inquiry id, contact_info) rows"""
+        conn.executemany(
+            "INSERT OR IGNORE INTO client_contacts (contact, inquiry_id) VALUES (?, ?)",
+            ((key, inquiry_id) for inquiry_id, contact_info in rows for key in contact_keys(contact_info)),
+        )
+
+    def _replace_contacts(self, conn, rows):
+        """Replace the saved contact keys of (inquiry id, contact_info) rows"""
+        rows = list(rows)
+        conn.executemany("DELETE FROM client_contacts WHERE inquiry_id = ?", [(row[0],) for row in rows])
+        self._add_contacts(conn, rows)
+
+    def _record_duplicates(self, conn, table, pairs):
+        """Save (first id, second id, score) pairs of `table` whose rows both still exist; return the pair count
+
+        A pair already saved keeps its status and takes the new score.
+        """
+        pairs = list(pairs)
+        conn.executemany(
+            f"""
+            INSERT INTO duplicates (table_name, first_id, second_id, score)
+            SELECT '{table}', ?1, ?2, ?3
+            WHERE EXISTS (SELECT 1 FROM {table} WHERE id = ?1) AND EXISTS (SELECT 1 FROM {table} WHERE id = ?2)
+            ON CONFLICT (table_name, first_id, second_id) DO UPDATE SET score = excluded.score
+            """,
+            pairs,
+        )
+        return len(pairs)
+
+    def _forget_duplicates(self, conn, table, row_ids, dismissed=False):
+        """Remove the open (with dismissed, all) duplicate pairs involving any of `row_ids`"""
+        status = "" if dismissed else "AND status = 'open'"
+        conn.executemany(
+            f"DELETE FROM duplicates WHERE table_name = ?1 {status} AND (first_id = ?2 OR second_id = ?2)",
+            [(table, row_id) for row_id in row_ids],
+        )
+
+    def _check_listing(self, conn, property_id):
+        """Record the likely duplicates of one listing among the others in its block; return how many
+
+        The block is every listing with the same PIN code, type and bedrooms
+        priced within dedup.PRICE_TOLERANCE, read off idx_properties_type.
+        Listings without a PIN code or price aren't checked.
+        """
+        row = conn.execute(
+            "SELECT id, address, pincode, property_type, bedrooms, price FROM properties WHERE id = ?", (property_id,)
+        ).fetchone()
+        if row is None or row[2] is None or row[5] is None:
+            return 0
+        property_id, address, pincode, property_type, bedrooms, price = row
+        candidates = conn.execute(
+            """
+            SELECT id, address FROM properties
+            WHERE pincode = ? AND property_type = ? AND bedrooms IS ? AND price BETWEEN ? AND ? AND id <> ?
+            """,
+            (pincode, property_type, bedrooms) + price_window(price) + (property_id,),
+        )
+        return self._record_duplicates(
+            conn,
+            "properties",
+            [
+                (min(property_id, other_id), max(property_id, other_id), score)
+                for other_id, score in listing_matches(address, candidates)
+            ],
+        )
+
+    def _check_client(self, conn, inquiry_id):
+        """Record the other spellings of an inquiry's client that share a contact key with it; return how many"""
+        row = conn.execute("SELECT client_name, contact_info FROM inquiries WHERE id = ?", (inquiry_id,)).fetchone()
+        if row is None:
+            return 0
+        rows = conn.execute(
+            """
+            SELECT o.contact, i.id, i.client_name, i.contact_info
+            FROM client_contacts c
+            JOIN client_contacts o ON o.contact = c.contact
+            JOIN inquiries i ON i.id = o.inquiry_id
+            WHERE c.inquiry_id = ?
+            ORDER BY o.contact
+            """,
+            (inquiry_id,),
+        )
+        return self._record_duplicates(conn, "inquiries", client_pairs(rows, tuple(row)))
+
+    def backfill_contacts(self, limit=BACKFILL_ROWS):
+        """Save the contact keys of up to `limit` inquiries saved before the client_contacts table existed
+
+        Migration 9 queues the inquiries it finds; as in backfill_locations,
+        each call does the next chunk in its own short transaction. Returns
+        (inquiries done, an upper bound on the inquiries still to do).
+        """
+        with self.pool.writer() as conn:
+            progress = conn.execute("SELECT last_id, end_id FROM backfills WHERE name = 'client_contacts'").fetchone()
+            if progress is None:
+                return 0, 0
+            first_id, end_id = progress
+            rows = conn.execute(
+                "SELECT id, contact_info FROM inquiries WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                (first_id, end_id, limit),
+            ).fetchall()
+            last_id = rows[-1][0] if len(rows) == limit else end_id
+            self._add_contacts(conn, rows)
+            if last_id < end_id:
+                conn.execute("UPDATE backfills SET last_id = ? WHERE name = 'client_contacts'", (last_id,))
+            else:
+                conn.execute("DELETE FROM backfills WHERE name = 'client_contacts'")
+            self._commit(conn)
+        return len(rows), end_id - last_id
+
+    def find_duplicates(self, table):
+        """Scan all of `table` ("properties" or "inquiries") for likely duplicates and record them
+
+        The batch counterpart of the checks made as single rows are saved, and
+        what finds duplicates among rows added in bulk. Listings are read in
+        blocking index order and clients grouped by contact key (pending
+        contact keys are backfilled first), so Python only ever holds one
+        block; see dedup.listing_pairs and dedup.client_pairs. The open pairs
+        among the rows scanned are replaced by the ones found; dismissed pairs
+        stay dismissed. Returns the number of pairs found.
+        """
+        if table not in DUPLICATE_TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        if table == "inquiries":
+            while self.backfill_contacts()[1]:
+                pass
+        last_id = self.get_last_id(table)
+
+        with self.pool.reader() as conn:
+            if table == "properties":
+                rows = conn.execute(
+                    """
+                    SELECT id, address, pincode, property_type, bedrooms, price FROM properties
+                    WHERE pincode IS NOT NULL AND price IS NOT NULL
+                    ORDER BY property_type, bedrooms, pincode, price
+                    """
+                )
+                pairs = list(listing_pairs(rows))
+            else:
+                rows = conn.execute(
+                    """
+                    SELECT c.contact, i.id, i.client_name, i.contact_info
+                    FROM client_contacts c
+                    JOIN inquiries i ON i.id = c.inquiry_id
+                    ORDER BY c.contact
+                    """
+                )
+                pairs = list(client_pairs(rows))
+
+        with self.pool.writer() as conn:
+            # Rows added during the scan keep the pairs recorded when they were saved
+            conn.execute(
+                "DELETE FROM duplicates WHERE table_name = ? AND status = 'open' AND second_id <= ?", (table, last_id)
+            )
+            found = self._record_duplicates(conn, table, pairs)
+            self._commit(conn)
+        return found
+
+    def get_duplicates(self, table, limit=DUPLICATE_LIMIT):
+        """Return the open duplicate pairs of `table`, best match first (then newest first)
+
+        Listing rows are (first id, second id, score, then address, price and
+        agent name of each listing); client rows are (first id, second id,
+        score, then client name and contact info of each spelling).
+        """
+        if table not in DUPLICATE_TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        if table == "properties":
+            columns = "a.address, a.price, aa.name, b.address, b.price, ba.name"
+            joins = """
+                JOIN properties a ON a.id = d.first_id
+                LEFT JOIN agents aa ON aa.id = a.agent_id
+                JOIN properties b ON b.id = d.second_id
+                LEFT JOIN agents ba ON ba.id = b.agent_id
+                """
+        else:
+            columns = "a.client_name, a.contact_info, b.client_name, b.contact_info"
+            joins = """
+                JOIN inquiries a ON a.id = d.first_id
+                JOIN inquiries b ON b.id = d.second_id
+                """
+        return self._fetchall(
+            f"""
+            SELECT d.first_id, d.second_id, d.score, {columns}
+            FROM duplicates d
+            {joins}
+            WHERE d.table_name = ? AND d.status = 'open'
+            ORDER BY d.score DESC, d.first_id DESC, d.second_id DESC
+            LIMIT ?
+            """,
+            (table, limit),
+        )
+
+    def count_duplicates(self, table):
+        """Return the number of open duplicate pairs of `table`"""
+        return self._fetchone(
+            "SELECT COUNT(*) FROM duplicates WHERE table_name = ? AND status = 'open'", (table,)
+        )[0]
+
+    def get_duplicates_of(self, table, row_id):
+        """Return (other id, score) for the open duplicate pairs involving one row, best match first"""
+        return self._fetchall(
+            """
+            SELECT IIF(first_id = ?1, second_id, first_id), score FROM duplicates
+            WHERE table_name = ?2 AND status = 'open' AND (first_id = ?1 OR second_id = ?1)
+            ORDER BY score DESC
+            """,
+            (row_id, table),
+        )
+
+    def dismiss_duplicate(self, table, first_id, second_id):
+        """Mark a pair as not duplicates; it is never suggested again"""
+        self._execute(
+            "UPDATE duplicates SET status = 'dismissed' WHERE table_name = ? AND first_id = ? AND second_id = ?",
+            (table, min(first_id, second_id), max(first_id, second_id)),
+        )
+
+    def merge_duplicates(self, table, keep_id, drop_id):
+        """Merge row `drop_id` of `table` into `keep_id`; return the number of rows moved or respelt
+
+        Listings: the duplicate's inquiries and marketing campaigns move to
+        the kept listing and the duplicate is deleted. Clients: every inquiry
+        spelt like the duplicate (same client name and contact info, sharing
+        a contact key) takes the kept spelling. Raises ValueError when both ids
+        are the same or either row no longer exists.
+        """
+        if table not in DUPLICATE_TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        if keep_id == drop_id:
+            raise ValueError("A record can't be merged into itself")
+        with self.pool.writer() as conn:
+            columns = "address" if table == "properties" else "client_name, contact_info"
+            kept = conn.execute(f"SELECT {columns} FROM {table} WHERE id = ?", (keep_id,)).fetchone()
+            dropped = conn.execute(f"SELECT {columns} FROM {table} WHERE id = ?", (drop_id,)).fetchone()
+            if kept is None or dropped is None:
+                raise ValueError("One of the duplicates no longer exists")
+
+            if table == "properties":
+                changed = 0
+                for linked in ("inquiries", "marketing"):
+                    changed += conn.execute(
+                        f"UPDATE {linked} SET property_id = ? WHERE property_id = ?", (keep_id, drop_id)
+                    ).rowcount
+                conn.execute("DELETE FROM properties WHERE id = ?", (drop_id,))
+            else:
+                inquiry_ids = {drop_id} | {
+                    row[0]
+                    for row in conn.execute(
+                        """
+                        SELECT i.id FROM client_contacts c
+                        JOIN client_contacts o ON o.contact = c.contact
+                        JOIN inquiries i ON i.id = o.inquiry_id
+                        WHERE c.inquiry_id = ? AND i.client_name = ? AND i.contact_info IS ?
+                        """,
+                        (drop_id,) + tuple(dropped),
+                    )
+                }
+                conn.executemany(
+                    "UPDATE inquiries SET client_name = ?, contact_info = ? WHERE id = ?",
+                    [tuple(kept) + (inquiry_id,) for inquiry_id in inquiry_ids],
+                )
+                self._replace_contacts(conn, [(inquiry_id, kept[1]) for inquiry_id in inquiry_ids])
+                # Their pairs were with the old spelling; the kept one's are looked for again
+                self._forget_duplicates(conn, "inquiries", inquiry_ids, dismissed=True)
+                self._check_client(conn, keep_id)
+                changed = len(inquiry_ids)
+            self._commit(conn)
+        return changed
+
+    # Dashboard methods (read the trigger-maintained summary tables, never the base tables)
+    def get_listing_summary(self):
+        """Return (status, property type, listings, total price) per status and type
+
+        A missing status is reported as ''.
+        """
+        return self._fetchall(
+            """
+            SELECT status, property_type, listings, price_total
+            FROM listing_summary
+            ORDER BY status, property_type
+            """
+        )
+
+    def get_city_summary(self, city=None):
+        """Return (city, listings, available listings, total price) per city, most listings first
+
+        With a city, the rows are per locality of that city instead. A city or
+        locality the address didn't name is reported as ''.
+        """
+        if city is None:
+            return self._fetchall(
+                """
+                SELECT city, SUM(listings), SUM(available), SUM(price_total)
+                FROM city_summary
+                GROUP BY city
+                ORDER BY 2 DESC
+                """
+            )
+        return self._fetchall(
+            """
+            SELECT locality, listings, available, price_total
+            FROM city_summary
+            WHERE city = ?
+            ORDER BY 2 DESC
+            """,
+            (city,),
+        )
+
+    def get_inquiry_funnel(self, agent_id=None):
+        """Return (status, inquiries) per inquiry status, for all agents or just `agent_id`
+
+        Use agent_id 0 for the unassigned inquiries.
+        """
+        if agent_id is None:
+            return self._fetchall("SELECT status, inquiries FROM inquiry_summary ORDER BY status")
+        return self._fetchall(
+            "SELECT status, inquiries FROM agent_inquiry_summary WHERE agent_id = ? ORDER BY status",
+            (agent_id,),
+        )
+
+    def get_agent_summary(self, limit=DASHBOARD_AGENTS):
+        """Return the listing and inquiry counts of the agents with the most listings
+
+        Rows are (agent id, name, listings, available listings, total listed
+        price, open inquiries), most listings first. Unassigned listings come
+        as agent id 0 with no name.
+        """
+        closed = ", ".join("?" for _ in CLOSED_INQUIRY_STATUSES)
+        return self._fetchall(
+            f"""
+            SELECT s.agent_id, a.name, s.listings, s.available, s.price_total,
+                   (SELECT COALESCE(SUM(i.inquiries), 0) FROM agent_inquiry_summary i
+                    WHERE i.agent_id = s.agent_id AND i.status NOT IN ({closed}))
+            FROM agent_listing_summary s
+            LEFT JOIN agents a ON a.id = s.agent_id
+            ORDER BY s.listings DESC
+            LIMIT ?
+            """,
+            (*CLOSED_INQUIRY_STATUSES, limit),
+        )
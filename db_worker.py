@@ -0,0 +1,122 @@
+import queue
+import sys
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+# Number of background threads running database calls
+DEFAULT_WORKERS = 4
+
+# Milliseconds between checks for finished calls while any are pending
+POLL_INTERVAL = 15
+
+
+class QueryExecutor:
+    def __init__(self, root, workers=DEFAULT_WORKERS, on_busy=None):
+        """Run database calls on worker threads and deliver results on the Tk thread
+
+        on_busy(busy) is called on the Tk thread when the executor goes from
+        idle to busy and back, so the window can show a busy indicator.
+        """
+        self.root = root
+        self.on_busy = on_busy
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-worker")
+        self._finished = queue.SimpleQueue()
+        self._callbacks = {}
+        self._latest = {}
+        self._pending = 0
+        self._poll_id = None
+        self._polling = False
+        self._busy = False
+        self._closed = False
+
+    def submit(self, fn, *args, key=None, on_success=None, on_error=None, **kwargs):
+        """Run fn(*args, **kwargs) in the background and return its Future
+
+        Must be called from the Tk thread. on_success(result) or on_error(exc)
+        runs on the Tk thread via root.after. A newer submit with the same `key`
+        supersedes the older one: it is cancelled if it hasn't started yet and its
+        result is discarded otherwise, so only the latest request's callbacks run.
+        A call that raises CancelledError is dropped the same way.
+        """
+        if key is not None and key in self._latest:
+            self._latest[key].cancel()
+
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._callbacks[future] = (key, on_success, on_error)
+        if key is not None:
+            self._latest[key] = future
+
+        self._pending += 1
+        self._set_busy(True)
+        # Callbacks may submit follow-up calls; the running poll picks those up
+        if self._poll_id is None and not self._polling:
+            self._poll_id = self.root.after(POLL_INTERVAL, self._poll)
+
+        future.add_done_callback(self._finished.put)
+        return future
+
+    def cancel(self, key):
+        """Cancel (or discard the result of) the latest call submitted with `key`"""
+        future = self._latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def _poll(self):
+        """Dispatch finished calls on the Tk thread; keep polling while any are pending"""
+        self._poll_id = None
+        self._polling = True
+        try:
+            while True:
+                try:
+                    future = self._finished.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending -= 1
+                try:
+                    self._dispatch(future)
+                except Exception:
+                    # Report like any Tk callback error, but keep polling
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self._polling = False
+
+        if self._closed:
+            return
+        if self._pending:
+            self._poll_id = self.root.after(POLL_INTERVAL, self._poll)
+        else:
+            self._set_busy(False)
+
+    def _dispatch(self, future):
+        """Run the callback for one finished call unless it was cancelled or superseded"""
+        key, on_success, on_error = self._callbacks.pop(future)
+        if key is not None:
+            if self._latest.get(key) is not future:
+                return
+            del self._latest[key]
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if isinstance(error, CancelledError):
+            # The call stopped itself early (a query whose cancel event was set)
+            return
+        if error is not None:
+            if on_error:
+                on_error(error)
+        elif on_success:
+            on_success(future.result())
+
+    def _set_busy(self, busy):
+        """Notify the busy-indicator callback when the busy state changes"""
+        if busy != self._busy:
+            self._busy = busy
+            if self.on_busy:
+                self.on_busy(busy)
+
+    def shutdown(self):
+        """Stop polling and discard pending calls (call before destroying the root)"""
+        self._closed = True
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
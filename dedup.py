@@ -0,0 +1,258 @@
+import argparse
+import re
+import sys
+import time
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from locations import street_address
+from migrations import DUPLICATE_TABLES
+
+# Listings are only compared when their asking prices are within this share of each other
+PRICE_TOLERANCE = 0.05
+
+# Lowest scores (0 to 1) recorded as possible duplicates
+LISTING_THRESHOLD = 0.6
+CLIENT_THRESHOLD = 0.9
+
+# A contact shared by more client spellings than this (an office switchboard,
+# a placeholder number) says nothing about who the client is; it is skipped
+MAX_CLIENT_SPELLINGS = 50
+
+# Jaro-Winkler: weight given to a common prefix, and the longest prefix rewarded
+WINKLER_SCALE = 0.1
+WINKLER_PREFIX = 4
+
+# Digits kept of a phone number: Indian numbers are 10 digits after the 0 or +91 prefix
+PHONE_DIGITS = 10
+MIN_PHONE_DIGITS = 7
+
+# Street strings whose trigrams are remembered; a block compares each listing with several others
+TRIGRAM_CACHE_SIZE = 65536
+
+PHONE = re.compile(r"\+?\d[\d\s().-]*\d")
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+WORD = re.compile(r"[^\W_]+")
+UNIT = re.compile(r"\b(?:\d+|[^\W\d_])\b")
+
+# Mail domains that ignore dots in the user name
+DOTLESS_MAIL_DOMAINS = ("gmail.com", "googlemail.com")
+
+# Words left out of names and street addresses, and abbreviations spelt out
+NAME_TITLES = {"mr", "mrs", "ms", "miss", "dr", "shri", "sri", "smt", "kumari", "prof"}
+ADDRESS_NOISE = {"flat", "no", "unit", "door", "house", "wing"}
+ADDRESS_ABBREVIATIONS = {
+    "rd": "road", "st": "street", "ln": "lane", "apt": "apartment", "apts": "apartments", "bldg": "building",
+    "soc": "society", "chs": "society", "twr": "tower", "twrs": "towers", "blk": "block", "ngr": "nagar",
+    "nr": "near", "opp": "opposite", "sec": "sector",
+}
+
+
+def contact_keys(contact_info):
+    """Normalized phone numbers ("phone:9876543210") and email addresses ("email:amit@example.com") in contact text
+
+    A phone number keeps its last PHONE_DIGITS digits, so "+91 98765 43210"
+    and "098765-43210" agree. Email addresses are lowercased, lose any
+    "+tag", and on Gmail their dots.
+    """
+    keys = set()
+    text = contact_info or ""
+    for email in EMAIL.findall(text):
+        user, domain = email.lower().rsplit("@", 1)
+        user = user.split("+", 1)[0]
+        if domain in DOTLESS_MAIL_DOMAINS:
+            user = user.replace(".", "")
+        keys.add(f"email:{user}@{domain}")
+    for number in PHONE.findall(EMAIL.sub(" ", text)):
+        digits = re.sub(r"\D", "", number)
+        if len(digits) >= MIN_PHONE_DIGITS:
+            keys.add(f"phone:{digits[-PHONE_DIGITS:]}")
+    return sorted(keys)
+
+
+def name_key(name):
+    """A client name lowercased, without titles or punctuation, its words sorted ("Patel, Mr. Amit" -> "amit patel")"""
+    return " ".join(sorted(word for word in WORD.findall((name or "").casefold()) if word not in NAME_TITLES))
+
+
+def street_key(address):
+    """The street part of an address (see locations.street_address), normalized for comparison
+
+    "Flat B-1601, Green Residency Apts." -> "b 1601 green residency apartments"
+    """
+    words = WORD.findall(street_address(address).casefold())
+    return " ".join(ADDRESS_ABBREVIATIONS.get(word, word) for word in words if word not in ADDRESS_NOISE)
+
+
+def street_units(street):
+    """The house, flat and plot numbers and wing letters in a street key ("b 1601" -> {"b", "1601"})
+
+    Two listings of one home agree on them.
+    """
+    return frozenset(UNIT.findall(street))
+
+
+def jaro_winkler(a, b):
+    """Jaro-Winkler similarity of two strings, from 0 (nothing alike) to 1 (equal)"""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    window = max(len(a), len(b)) // 2 - 1
+    matched = [False] * len(b)
+    a_matches = []
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not matched[j] and b[j] == char:
+                matched[j] = True
+                a_matches.append(char)
+                break
+    if not a_matches:
+        return 0.0
+    b_matches = [char for char, hit in zip(b, matched) if hit]
+    transpositions = sum(x != y for x, y in zip(a_matches, b_matches)) / 2
+    count = len(a_matches)
+    jaro = (count / len(a) + count / len(b) + (count - transpositions) / count) / 3
+
+    prefix = 0
+    for x, y in zip(a[:WINKLER_PREFIX], b[:WINKLER_PREFIX]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * WINKLER_SCALE * (1 - jaro)
+
+
+@lru_cache(maxsize=TRIGRAM_CACHE_SIZE)
+def trigrams(text):
+    """The trigrams of each word in `text`, padded as in PostgreSQL's pg_trgm ("  b", " b ")"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def trigram_similarity(a, b):
+    """Share of trigrams two strings have in common (Jaccard), from 0 to 1"""
+    a, b = trigrams(a), trigrams(b)
+    if not a or not b:
+        return float(a == b)
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def listing_matches(address, candidates):
+    """Yield (id, score) for the (id, address) candidates likely to duplicate a listing at `address`
+
+    Candidates come from the listing's block (see listing_pairs). Addresses
+    with different house or flat numbers (or wings) are different homes;
+    the rest are scored by the trigram similarity of their street parts.
+    """
+    street = street_key(address)
+    units = street_units(street)
+    for other_id, other_address in candidates:
+        other_street = street_key(other_address)
+        if street_units(other_street) == units:
+            score = trigram_similarity(street, other_street)
+            if score >= LISTING_THRESHOLD:
+                yield other_id, score
+
+
+def client_similarity(name, other):
+    """Likeness of two client names, from 0 to 1 (Jaro-Winkler over name_key)"""
+    return jaro_winkler(name_key(name), name_key(other))
+
+
+def price_window(price):
+    """(lowest, highest) asking price of a listing that may duplicate one at `price`"""
+    return price / (1 + PRICE_TOLERANCE), price * (1 + PRICE_TOLERANCE)
+
+
+def listing_pairs(rows):
+    """Yield (first id, second id, score) for the likely duplicate listings among `rows`
+
+    rows are (id, address, pincode, property_type, bedrooms, price) sorted
+    by type, bedrooms, PIN code and price, as idx_properties_type keeps them.
+    A block (one PIN code, type and bedroom count) is split further by
+    street_units, and within that each listing is scored against those
+    priced no more than PRICE_TOLERANCE below it. Only a block's rows are
+    held in memory at a time.
+    """
+    for _, block in groupby(rows, key=itemgetter(2, 3, 4)):
+        by_units = defaultdict(list)
+        for property_id, address, _, _, _, price in block:
+            street = street_key(address)
+            by_units[street_units(street)].append((price, property_id, street))
+        for listings in by_units.values():
+            start = 0
+            for i, (price, property_id, street) in enumerate(listings):
+                lowest = price_window(price)[0]
+                while listings[start][0] < lowest:
+                    start += 1
+                for _, other_id, other_street in listings[start:i]:
+                    score = trigram_similarity(street, other_street)
+                    if score >= LISTING_THRESHOLD:
+                        yield min(property_id, other_id), max(property_id, other_id), score
+
+
+def client_pairs(rows, spelling=None):
+    """Yield (first id, second id, score) for the likely duplicate client spellings among `rows`
+
+    rows are (contact key, inquiry id, client_name, contact_info) sorted by
+    contact key. Inquiries sharing a contact key are one block; each
+    distinct (client_name, contact_info) spelling in it is represented by
+    its lowest inquiry id, and spellings whose names score at least
+    CLIENT_THRESHOLD are paired. With `spelling` set only pairs including
+    that spelling are scored. A pair found through several contacts is
+    yielded once.
+    """
+    seen = set()
+    for _, block in groupby(rows, key=itemgetter(0)):
+        spellings = {}
+        for _, inquiry_id, client_name, contact_info in block:
+            key = (client_name, contact_info)
+            spellings[key] = min(inquiry_id, spellings.get(key, inquiry_id))
+        if len(spellings) > MAX_CLIENT_SPELLINGS:
+            continue
+        found = list(spellings.items())
+        if spelling is None:
+            candidates = combinations(found, 2)
+        elif spelling in spellings:
+            candidates = [((spelling, spellings[spelling]), other) for other in found if other[0] != spelling]
+        else:
+            continue
+        for (key, inquiry_id), (other_key, other_id) in candidates:
+            pair = (min(inquiry_id, other_id), max(inquiry_id, other_id))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            score = client_similarity(key[0], other_key[0])
+            if score >= CLIENT_THRESHOLD:
+                yield pair + (score,)
+
+
+def main(argv=None):
+    """Run the batch duplicate scan from the command line"""
+    # Imported here so the matching functions don't need the database layer
+    from database import Database
+
+    parser = argparse.ArgumentParser(description="Find likely duplicate listings and clients")
+    parser.add_argument("tables", nargs="*", choices=DUPLICATE_TABLES, help="tables to scan (default: both)")
+    parser.add_argument("--db", default="real_estate.db", help="database file (default: real_estate.db)")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    try:
+        for table in args.tables or DUPLICATE_TABLES:
+            started = time.perf_counter()
+            found = db.find_duplicates(table)
+            print(f"{table}: {found} possible duplicates ({time.perf_counter() - started:.1f} s)")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+
+class DiagnosticsWindow:
+    def __init__(self, root, stats):
+        """Show per-method query statistics and the slow-call log in a window"""
+        self.stats = stats
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Query Diagnostics")
+        self.window.geometry("900x500")
+
+        # Toolbar
+        toolbar = ttk.Frame(self.window)
+        toolbar.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(toolbar, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Reset", command=self.reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Save JSON...", command=self.save_json).pack(side=tk.LEFT, padx=5)
+        self.summary_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.summary_var).pack(side=tk.RIGHT, padx=5)
+
+        # Treeview for per-method statistics
+        columns = ("method", "calls", "mean", "p50", "p95", "p99", "max", "total")
+        self.stats_tree = ttk.Treeview(self.window, columns=columns, show="headings", height=12)
+
+        # Define headings and columns
+        headings = {
+            "method": ("Method", 220),
+            "calls": ("Calls", 70),
+            "mean": ("Mean (ms)", 80),
+            "p50": ("p50 (ms)", 80),
+            "p95": ("p95 (ms)", 80),
+            "p99": ("p99 (ms)", 80),
+            "max": ("Max (ms)", 80),
+            "total": ("Total (ms)", 90),
+        }
+        for column, (text, width) in headings.items():
+            self.stats_tree.heading(column, text=text)
+            self.stats_tree.column(column, width=width)
+        self.stats_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # Slow-call log with query plans
+        ttk.Label(self.window, text="Slow calls").pack(anchor=tk.W, padx=10)
+        self.slow_text = tk.Text(self.window, height=10, wrap=tk.NONE)
+        self.slow_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """Reload the statistics from the collector"""
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for method, summary in self.stats.summary().items():
+            self.stats_tree.insert(
+                "",
+                "end",
+                values=(
+                    method,
+                    summary["calls"],
+                    summary["mean_ms"],
+                    summary["p50_ms"],
+                    summary["p95_ms"],
+                    summary["p99_ms"],
+                    summary["max_ms"],
+                    summary["total_ms"],
+                ),
+            )
+
+        data = self.stats.to_dict()
+        self.slow_text.delete("1.0", tk.END)
+        for entry in reversed(data["slow_queries"]):
+            self.slow_text.insert(tk.END, f"{entry['at']}  {entry['method']}  {entry['elapsed_ms']:.1f} ms\n")
+            for query in entry["queries"]:
+                self.slow_text.insert(tk.END, f"    {query['sql']}\n")
+                for line in query["plan"] or []:
+                    self.slow_text.insert(tk.END, f"        {line}\n")
+
+        self.summary_var.set(
+            f"Since {data['started']}  |  slow threshold {data['slow_query_ms']:.0f} ms  |  {len(data['slow_queries'])} slow calls"
+        )
+
+    def reset(self):
+        """Clear the collected statistics"""
+        self.stats.reset()
+        self.refresh()
+
+    def save_json(self):
+        """Dump the statistics to a JSON file chosen by the user"""
+        path = filedialog.asksaveasfilename(
+            parent=self.window, defaultextension=".json", filetypes=[("JSON files", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            self.stats.dump(path)
+            messagebox.showinfo("Success", f"Diagnostics saved to {path}", parent=self.window)
+        except OSError as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}", parent=self.window)
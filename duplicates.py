@@ -0,0 +1,158 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from events import BULK, DELETE
+from presenters import format_client_duplicate_rows, format_listing_duplicate_rows
+
+# Per table: (window title, noun, tree columns as (column, heading, width), row formatter)
+DUPLICATE_VIEWS = {
+    "properties": (
+        "Duplicate Listings",
+        "listing",
+        (
+            ("score", "Match", 60),
+            ("first_id", "ID", 60),
+            ("first_address", "Address", 220),
+            ("first_price", "Price", 90),
+            ("first_agent", "Agent", 110),
+            ("second_id", "ID", 60),
+            ("second_address", "Address", 220),
+            ("second_price", "Price", 90),
+            ("second_agent", "Agent", 110),
+        ),
+        format_listing_duplicate_rows,
+    ),
+    "inquiries": (
+        "Duplicate Clients",
+        "client",
+        (
+            ("score", "Match", 60),
+            ("first_id", "Inquiry", 60),
+            ("first_name", "Client", 160),
+            ("first_contact", "Contact", 200),
+            ("second_id", "Inquiry", 60),
+            ("second_name", "Client", 160),
+            ("second_contact", "Contact", 200),
+        ),
+        format_client_duplicate_rows,
+    ),
+}
+
+
+class DuplicatesWindow:
+    def __init__(self, root, app, table):
+        """List the likely duplicate listings or clients, best match first, to merge or dismiss
+
+        Pairs are recorded as rows are saved; Scan All looks through the whole
+        table (see Database.find_duplicates), which also covers imports.
+        """
+        self.app = app
+        self.db = app.db
+        self.table = table
+        title, self.noun, columns, self.format_rows = DUPLICATE_VIEWS[table]
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("1100x500")
+
+        # Toolbar
+        toolbar = ttk.Frame(self.window)
+        toolbar.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(toolbar, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Scan All", command=self.scan).pack(side=tk.LEFT, padx=5)
+        self.summary_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.summary_var).pack(side=tk.RIGHT, padx=5)
+
+        # Treeview of pairs: the first row of the pair on the left, the second on the right
+        self.pair_tree = ttk.Treeview(
+            self.window, columns=[column for column, _, _ in columns], show="headings", selectmode="browse"
+        )
+        for column, heading, width in columns:
+            self.pair_tree.heading(column, text=heading)
+            self.pair_tree.column(column, width=width)
+        self.pair_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # Actions on the selected pair
+        button_frame = ttk.Frame(self.window)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(button_frame, text="Keep Left", command=lambda: self.merge(first=True)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Keep Right", command=lambda: self.merge(first=False)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Not Duplicates", command=self.dismiss).pack(side=tk.LEFT, padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """Reload the open pairs"""
+        self.app.run_in_background(
+            lambda: (self.db.get_duplicates(self.table), self.db.count_duplicates(self.table)),
+            key=(self, "load"),
+            on_success=self.show_pairs,
+        )
+
+    def show_pairs(self, result):
+        """Fill the tree with (pairs, number of open pairs)"""
+        rows, count = result
+        self.pair_tree.delete(*self.pair_tree.get_children())
+        for row, values in zip(rows, self.format_rows(rows)):
+            # The item id is "first id:second id"
+            self.pair_tree.insert("", "end", iid=f"{row[0]}:{row[1]}", values=values)
+        shown = f"showing the best {len(rows):,} of " if len(rows) < count else ""
+        self.summary_var.set(f"{shown}{count:,} possible duplicates")
+
+    def scan(self):
+        """Look through the whole table for duplicates in the background"""
+
+        def scanned(found):
+            self.app.set_status(f"Duplicate scan found {found:,} possible duplicate {self.noun}s")
+            self.refresh()
+
+        self.summary_var.set("Scanning...")
+        self.app.set_status(f"Scanning for duplicate {self.noun}s...")
+        self.app.run_in_background(self.db.find_duplicates, self.table, key=(self, "scan"), on_success=scanned)
+
+    def selected_pair(self):
+        """(first id, second id) of the selected pair, or None after telling the user to pick one"""
+        selected_item = self.pair_tree.selection()
+        if not selected_item:
+            messagebox.showerror("Error", "Please select a pair", parent=self.window)
+            return None
+        first_id, second_id = selected_item[0].split(":")
+        return int(first_id), int(second_id)
+
+    def merge(self, first):
+        """Merge the selected pair, keeping the left (first) or the right row"""
+        pair = self.selected_pair()
+        if pair is None:
+            return
+        keep_id, drop_id = pair if first else pair[::-1]
+        if self.table == "properties":
+            question = (
+                f"Keep listing #{keep_id} and delete listing #{drop_id}? Its inquiries and campaigns move to "
+                f"#{keep_id}. This action cannot be undone."
+            )
+        else:
+            question = f"Respell the client of inquiry #{drop_id} (and their other inquiries) as in inquiry #{keep_id}?"
+        if not messagebox.askyesno("Confirm Merge", question, parent=self.window):
+            return
+
+        def merged(changed):
+            if self.table == "properties":
+                self.app.events.publish("properties", drop_id, DELETE)
+                self.app.events.publish("inquiries", None, BULK)
+                self.app.events.publish("marketing", None, BULK)
+                self.app.set_status(
+                    f"Merged listing #{drop_id} into #{keep_id} ({changed} inquiries and campaigns moved)"
+                )
+            else:
+                self.app.events.publish("inquiries", None, BULK)
+                self.app.set_status(f"Merged client spellings ({changed} inquiries updated)")
+            self.refresh()
+
+        self.app.run_in_background(self.db.merge_duplicates, self.table, keep_id, drop_id, on_success=merged)
+
+    def dismiss(self):
+        """Mark the selected pair as not duplicates"""
+        pair = self.selected_pair()
+        if pair is None:
+            return
+        self.app.run_in_background(self.db.dismiss_duplicate, self.table, *pair, on_success=lambda _: self.refresh())
@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+from migrations import TRACKED_TABLES
+
+# Kinds of change, as recorded in change_log (BULK: many rows at once, row_id None)
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+BULK = "bulk"
+KINDS = (INSERT, UPDATE, DELETE, BULK)
+
+# Entities (tables) changes are published for
+ENTITIES = TRACKED_TABLES
+
+
+class ChangeEvent(namedtuple("ChangeEvent", "entity row_id kind")):
+    """One change to a row of `entity`, published after it was committed"""
+
+    __slots__ = ()
+
+
+class Subscription:
+    def __init__(self, root, entities, callback, widget=None):
+        """Collect the events for `entities` and pass them to callback(events) in batches
+
+        Events published in one burst are delivered together once Tk is idle.
+        While `widget` is not on screen (a tab that isn't selected) they are
+        held until it is shown.
+        """
+        self.root = root
+        self.entities = set(entities)
+        self.callback = callback
+        self.widget = widget
+        self._pending = []
+        self._idle_id = None
+
+        if widget is not None:
+            widget.bind("<Map>", lambda event: self._schedule(), add="+")
+
+    def add(self, event):
+        """Queue an event for the next delivery"""
+        self._pending.append(event)
+        self._schedule()
+
+    def _schedule(self):
+        """Deliver pending events when Tk is next idle (once, however many arrive)"""
+        if self._pending and self._idle_id is None:
+            self._idle_id = self.root.after_idle(self._deliver)
+
+    def _deliver(self):
+        """Pass the pending events on, unless the widget is hidden"""
+        self._idle_id = None
+        if self.widget is not None and not self.widget.winfo_ismapped():
+            # Shown later: <Map> schedules the delivery again
+            return
+        events, self._pending = self._pending, []
+        if events:
+            self.callback(events)
+
+
+class EventBus:
+    def __init__(self, root):
+        """Publish row changes from the tabs to the tabs that show those rows"""
+        self.root = root
+        self._subscriptions = []
+
+    def subscribe(self, entities, callback, widget=None):
+        """Call callback(events) with batches of ChangeEvents for `entities` (see Subscription)"""
+        subscription = Subscription(self.root, entities, callback, widget)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def publish(self, entity, row_id=None, kind=UPDATE):
+        """Announce a committed change to one row of `entity` (row_id None for BULK)"""
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity '{entity}'")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown change kind '{kind}'")
+        event = ChangeEvent(entity, row_id, kind)
+        for subscription in self._subscriptions:
+            if entity in subscription.entities:
+                subscription.add(event)
@@ -0,0 +1,217 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+
+from database import Database, build_match_query
+from migrations import FTS_COLUMNS
+
+# Rows pulled from the cursor per fetchmany() call
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# File dialog choices for the export buttons
+EXPORT_FILE_TYPES = [
+    ("CSV files", "*.csv"),
+    ("Compressed CSV files", "*.csv.gz"),
+    ("JSON Lines files", "*.jsonl"),
+    ("Compressed JSON Lines files", "*.jsonl.gz"),
+]
+
+# Per table: (SELECT ... FROM ... clause, table alias, has a status column)
+EXPORT_QUERIES = {
+    "properties": (
+        """
+        SELECT p.id, p.address, p.city, p.locality, p.pincode, p.latitude, p.longitude, p.property_type,
+               p.bedrooms, p.bathrooms, p.price, p.listing_date, p.status, p.agent_id, a.name AS agent_name,
+               p.description
+        FROM properties p
+        LEFT JOIN agents a ON p.agent_id = a.id
+        """,
+        "p",
+        True,
+    ),
+    "agents": (
+        """
+        SELECT a.id, a.name, a.phone, a.email, a.license_number, a.join_date, a.commission_rate
+        FROM agents a
+        """,
+        "a",
+        False,
+    ),
+    "inquiries": (
+        """
+        SELECT i.id, i.client_name, i.contact_info, i.property_id, p.address AS property_address,
+               i.inquiry_date, i.status, i.notes, i.agent_id, a.name AS agent_name
+        FROM inquiries i
+        LEFT JOIN properties p ON i.property_id = p.id
+        LEFT JOIN agents a ON i.agent_id = a.id
+        """,
+        "i",
+        True,
+    ),
+    "marketing": (
+        """
+        SELECT m.id, m.property_id, COALESCE(p.address, m.address) AS address, m.marketing_type, m.channel,
+               m.registration_fee, m.spend, m.start_date, m.end_date, m.bedrooms, m.bathrooms, m.price,
+               m.listing_date, m.status, m.agent_id, a.name AS agent_name, m.description
+        FROM marketing m
+        LEFT JOIN properties p ON m.property_id = p.id
+        LEFT JOIN agents a ON m.agent_id = a.id
+        """,
+        "m",
+        True,
+    ),
+}
+
+
+def build_export_query(db, table, search=None, status=None, filters=None):
+    """Return (sql, params) selecting the rows of `table` that match the filters
+
+    `search` matches the same columns as the Database.search_* methods (via the
+    FTS index when present) and `status` mirrors filter_inquiries_by_status.
+    `filters`, a PropertyFilter, applies to properties only. Rows come back in
+    id order, which SQLite can stream without sorting.
+    """
+    if table not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown table '{table}'. Choose from: {', '.join(EXPORT_QUERIES)}")
+    select, alias, has_status = EXPORT_QUERIES[table]
+
+    conditions = []
+    params = []
+    if search:
+        match = build_match_query(search) if f"{table}_fts" in db.fts_tables else None
+        if match:
+            conditions.append(f"{alias}.id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)")
+            params.append(match)
+        else:
+            pattern = f"%{search}%"
+            columns = FTS_COLUMNS[table]
+            conditions.append("(" + " OR ".join(f"{alias}.{column} LIKE ?" for column in columns) + ")")
+            params.extend([pattern] * len(columns))
+    if status:
+        if not has_status:
+            raise ValueError(f"'{table}' has no status column to filter on")
+        conditions.append(f"{alias}.status = ?")
+        params.append(status)
+    if filters is not None and not filters.is_empty():
+        if table != "properties":
+            raise ValueError("Structured filters apply to properties only")
+        where, filter_params = db.property_filter_sql(filters)
+        conditions.append(where)
+        params.extend(filter_params)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{select} {where} ORDER BY {alias}.id", params
+
+
+def stream_rows(db, table, search=None, status=None, chunk_size=EXPORT_CHUNK_SIZE, filters=None):
+    """Return a generator of the column names, then every matching row
+
+    Rows are fetched chunk_size at a time from a read-only cursor, so memory
+    stays constant however large the table is. Invalid filters raise ValueError
+    here rather than on first iteration.
+    """
+    sql, params = build_export_query(db, table, search, status, filters)
+    return _stream(db, sql, params, chunk_size)
+
+
+def _stream(db, sql, params, chunk_size):
+    """Hold a reader connection and yield the header and rows until exhausted"""
+    with db.pool.reader() as conn:
+        cursor = conn.execute(sql, params)
+        yield [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+
+def write_csv(rows, f):
+    """Write a header row followed by data rows as CSV; return the data row count"""
+    writer = csv.writer(f)
+    writer.writerow(next(rows))
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(rows, f):
+    """Write one JSON object per data row, keyed by the header; return the row count"""
+    columns = next(rows)
+    count = 0
+    for row in rows:
+        f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def detect_format(path):
+    """Infer (format, compressed) from a file name like listings.csv.gz"""
+    name = path.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    fmt = "jsonl" if name.endswith((".jsonl", ".json")) else "csv"
+    return fmt, compressed
+
+
+def export_table(db, table, path, fmt=None, compress=None, search=None, status=None, filters=None):
+    """Stream the matching rows of `table` into a CSV or JSONL file; return the row count
+
+    fmt and compress default to what the file name suggests (.csv, .jsonl, .gz).
+    """
+    detected_fmt, detected_compress = detect_format(path)
+    fmt = fmt or detected_fmt
+    compress = detected_compress if compress is None else compress
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+
+    writer = write_csv if fmt == "csv" else write_jsonl
+    rows = stream_rows(db, table, search, status, filters=filters)
+    try:
+        if compress:
+            with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+                return writer(rows, f)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            return writer(rows, f)
+    finally:
+        # Release the reader connection even if writing failed
+        rows.close()
+
+
+def main(argv=None):
+    """Export a table from the command line"""
+    parser = argparse.ArgumentParser(description="Export real estate data to CSV or JSON Lines")
+    parser.add_argument("table", choices=sorted(EXPORT_QUERIES))
+    parser.add_argument("output", help="output file; a .gz suffix compresses it")
+    parser.add_argument("--db", default="real_estate.db", help="database file (default: real_estate.db)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="output format (default: from the file name)")
+    parser.add_argument("--gzip", action="store_true", default=None, help="gzip the output")
+    parser.add_argument("--search", help="only rows matching this search term")
+    parser.add_argument("--status", help="only rows with this status")
+    args = parser.parse_args(argv)
+
+    # Opening a missing file would create (and migrate) an empty database
+    if not os.path.exists(args.db):
+        parser.error(f"database file not found: {args.db}")
+    db = Database(args.db)
+    try:
+        count = export_table(db, args.table, args.output, args.format, args.gzip, args.search, args.status)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        db.close()
+    print(f"Exported {count} {args.table} rows to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import argparse
+import csv
+import gzip
+import os
+import sys
+from datetime import date
+from operator import itemgetter
+
+from database import Database
+from locations import valid_coordinates
+from presenters import parse_number
+
+# Valid rows written per add_*_bulk call (one transaction each)
+IMPORT_BATCH_SIZE = 50000
+
+IMPORT_TABLES = ("properties", "agents")
+
+# File dialog choices for the import buttons
+IMPORT_FILE_TYPES = [
+    ("CSV files", "*.csv"),
+    ("Compressed CSV files", "*.csv.gz"),
+]
+
+# Status given to imported listings that leave the column blank
+DEFAULT_PROPERTY_STATUS = "Available"
+
+# Alternative header spellings, mapped to the column names used below
+HEADER_ALIASES = {
+    "type": "property_type",
+    "beds": "bedrooms",
+    "baths": "bathrooms",
+    "agent_name": "agent",
+    "agent_license": "agent",
+    "agent_licence": "agent",
+    "license": "license_number",
+    "licence": "license_number",
+    "licence_number": "license_number",
+    "commission": "commission_rate",
+    "mobile": "phone",
+    "lat": "latitude",
+    "lon": "longitude",
+    "lng": "longitude",
+}
+
+# Columns each import needs in the header
+REQUIRED_COLUMNS = {
+    "properties": ("address", "property_type"),
+    "agents": ("name",),
+}
+
+
+def normalize_header(header):
+    """Map header cells like 'Property Type' or 'Licence' to column names"""
+    columns = []
+    for cell in header:
+        column = cell.strip().lower().replace(" ", "_")
+        columns.append(HEADER_ALIASES.get(column, column))
+    return columns
+
+
+def build_agent_lookup(db):
+    """Return {name or licence number (lowercased): agent id} for every agent
+
+    Licence numbers win over names. A name shared by several agents maps to
+    None, so a row naming it is rejected as ambiguous rather than guessed.
+    """
+    with db.pool.reader() as conn:
+        agents = conn.execute("SELECT id, name, license_number FROM agents").fetchall()
+
+    lookup = {}
+    for agent_id, name, _ in agents:
+        key = (name or "").strip().lower()
+        if key:
+            lookup[key] = None if key in lookup else agent_id
+    for agent_id, _, license_number in agents:
+        key = (license_number or "").strip().lower()
+        if key:
+            lookup[key] = agent_id
+    return lookup
+
+
+def _field_getter(columns, names):
+    """Return a function mapping a CSV row to the stripped values of `names`
+
+    Columns missing from the file, and cells missing from short rows, read as ''.
+    """
+    width = len(columns) + 1
+    fields = itemgetter(*[columns.index(name) if name in columns else len(columns) for name in names])
+
+    def get(row):
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        return [cell.strip() for cell in fields(row)]
+
+    return get
+
+
+def _parse_date(value, default):
+    """Return an ISO date string, `default` when blank (raises ValueError)"""
+    if not value:
+        return default
+    return date.fromisoformat(value).isoformat()
+
+
+def property_row_parser(columns, agent_lookup):
+    """Return a function turning one CSV row into an add_properties_bulk tuple
+
+    It applies the same rules as the Property tab: address and type are
+    required, bedrooms must be a whole number and bathrooms and price finite
+    numbers (blank means 0). The agent column may hold a name or licence number; an
+    agent_id column is used as-is. Latitude and longitude are optional, but
+    go together; without them the listing is placed at its locality's
+    centre. Invalid rows raise ValueError.
+    """
+    get = _field_getter(
+        columns,
+        (
+            "address", "property_type", "bedrooms", "bathrooms", "price", "listing_date", "status", "agent", "agent_id",
+            "description", "latitude", "longitude",
+        ),
+    )
+    known_agent_ids = {value for value in agent_lookup.values() if value is not None}
+    today = date.today().isoformat()
+
+    def parse(row):
+        (
+            address, property_type, bedrooms, bathrooms, price, listing_date, status, agent, agent_id, description,
+            latitude, longitude,
+        ) = get(row)
+        if not address or not property_type:
+            raise ValueError("Address and Property Type are required fields")
+        if bool(latitude) != bool(longitude):
+            raise ValueError("Latitude and longitude go together")
+        coordinates = (float(latitude), float(longitude)) if latitude else ()
+        if coordinates and not valid_coordinates(*coordinates):
+            raise ValueError(f"Coordinates out of range: {latitude}, {longitude}")
+
+        if agent:
+            key = agent.lower()
+            if key not in agent_lookup:
+                raise ValueError(f"Unknown agent '{agent}'")
+            agent_id = agent_lookup[key]
+            if agent_id is None:
+                raise ValueError(f"Agent name '{agent}' is ambiguous; use the licence number")
+        elif agent_id:
+            agent_id = int(agent_id)
+            if agent_id not in known_agent_ids:
+                raise ValueError(f"Unknown agent id {agent_id}")
+        else:
+            agent_id = None
+
+        return (
+            address,
+            property_type,
+            int(bedrooms or 0),
+            parse_number(bathrooms, "Bathrooms"),
+            parse_number(price, "Price"),
+            _parse_date(listing_date, today),
+            status or DEFAULT_PROPERTY_STATUS,
+            agent_id,
+            description,
+        ) + coordinates
+
+    return parse
+
+
+def agent_row_parser(columns):
+    """Return a function turning one CSV row into an add_agents_bulk tuple
+
+    Mirrors the Agent tab: the name is required and the commission rate must
+    be a finite number (blank means 0). Invalid rows raise ValueError.
+    """
+    get = _field_getter(columns, ("name", "phone", "email", "license_number", "join_date", "commission_rate"))
+    today = date.today().isoformat()
+
+    def parse(row):
+        name, phone, email, license_number, join_date, commission_rate = get(row)
+        if not name:
+            raise ValueError("Agent Name is a required field")
+        return (name, phone, email, license_number, _parse_date(join_date, today), parse_number(commission_rate, "Commission rate"))
+
+    return parse
+
+
+class RejectWriter:
+    def __init__(self, path, header):
+        """Write rejected rows with their line number and reason; the file is created on first use"""
+        self.path = path
+        self.header = header
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, line, error, row):
+        """Record one rejected row"""
+        self.count += 1
+        if self.path is None:
+            return
+        if self._writer is None:
+            self._file = open(self.path, "w", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["line", "error"] + self.header)
+        self._writer.writerow([line, error] + row)
+
+    def close(self):
+        """Close the report file if one was written"""
+        if self._file is not None:
+            self._file.close()
+
+
+def default_reject_path(path):
+    """Return the report path used for `path`, e.g. units.csv -> units.rejected.csv"""
+    base = path[:-3] if path.lower().endswith(".gz") else path
+    base, _ = os.path.splitext(base)
+    return f"{base}.rejected.csv"
+
+
+def open_csv(path):
+    """Open a CSV file (optionally gzipped) for streaming, skipping any UTF-8 BOM"""
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+def import_rows(db, table, rows, reject_path=None, batch_size=IMPORT_BATCH_SIZE):
+    """Validate and insert CSV rows (header first) into `table`; return (imported, rejected)
+
+    Valid rows are written batch_size at a time through the Database bulk
+    methods, each batch in one transaction. Invalid rows are skipped and, when
+    reject_path is given, written there with the line number and reason.
+    """
+    if table not in IMPORT_TABLES:
+        raise ValueError(f"Unknown table '{table}'. Choose from: {', '.join(IMPORT_TABLES)}")
+
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty")
+    columns = normalize_header(header)
+    missing = [column for column in REQUIRED_COLUMNS[table] if column not in columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    if table == "properties":
+        parse = property_row_parser(columns, build_agent_lookup(db))
+        insert = db.add_properties_bulk
+    else:
+        parse = agent_row_parser(columns)
+        insert = db.add_agents_bulk
+
+    rejects = RejectWriter(reject_path, header)
+    imported = 0
+    batch = []
+    try:
+        # Line 1 is the header
+        for line, row in enumerate(rows, 2):
+            if not any(row):
+                continue
+            try:
+                batch.append(parse(row))
+            except ValueError as e:
+                rejects.write(line, str(e), row)
+                continue
+            if len(batch) >= batch_size:
+                imported += insert(batch)
+                batch = []
+        if batch:
+            imported += insert(batch)
+    finally:
+        rejects.close()
+    return imported, rejects.count
+
+
+def import_file(db, table, path, reject_path=None, batch_size=IMPORT_BATCH_SIZE):
+    """Stream a CSV (or .csv.gz) file into `table`; return (imported, rejected)"""
+    with open_csv(path) as f:
+        return import_rows(db, table, csv.reader(f), reject_path, batch_size)
+
+
+def main(argv=None):
+    """Import a CSV file from the command line"""
+    parser = argparse.ArgumentParser(description="Import listings or agents from a CSV file")
+    parser.add_argument("table", choices=IMPORT_TABLES)
+    parser.add_argument("input", help="CSV file with a header row; a .gz suffix is decompressed")
+    parser.add_argument("--db", default="real_estate.db", help="database file (default: real_estate.db)")
+    parser.add_argument("--rejects", help="rejected-rows report (default: <input>.rejected.csv)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="rows per transaction")
+    args = parser.parse_args(argv)
+
+    # Opening a missing file would create (and migrate) an empty database to import into
+    if not os.path.exists(args.db):
+        parser.error(f"database file not found: {args.db}")
+    reject_path = args.rejects or default_reject_path(args.input)
+    db = Database(args.db)
+    try:
+        imported, rejected = import_file(db, args.table, args.input, reject_path, args.batch_size)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    finally:
+        db.close()
+    print(f"Imported {imported} {args.table} rows from {args.input}")
+    if rejected:
+        print(f"Rejected {rejected} rows; see {reject_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
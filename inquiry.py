@@ -1,6 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from events import DELETE, INSERT, UPDATE
+from live_search import FIRST_RESULTS, LiveSearch
+from picker import Picker
+from presenters import format_duplicate_note, format_inquiry_rows
+from virtual_tree import VirtualTreeview
+
 class InquiryTab:
     def __init__(self, parent, database, app):
         """Initialize the Client Inquiry Tracking tab"""
@@ -18,13 +24,15 @@ class InquiryTab:
         self.inquiry_filter_var = tk.StringVar()
         self.inquiry_filter_var.set("All")
 
-        # Create the tab UI
-        self.create_tab()
+        # Add the tab's frame now; its widgets and data are built when it is first shown
+        self.frame = ttk.Frame(self.parent)
+        self.parent.add(self.frame, text="Client Inquiry Tracking")
+        self.built = False
 
     def create_tab(self):
-        """Create the Client Inquiry Tracking tab UI"""
-        inquiry_frame = ttk.Frame(self.parent)
-        self.parent.add(inquiry_frame, text="Client Inquiry Tracking")
+        """Create the Client Inquiry Tracking tab UI and load its data (called when the tab is first shown)"""
+        self.built = True
+        inquiry_frame = self.frame
 
         # Left frame for inquiry entry
         left_frame = ttk.Frame(inquiry_frame)
@@ -44,14 +52,22 @@ class InquiryTab:
         ttk.Entry(left_frame, textvariable=self.contact_info_var, width=30).grid(row=2, column=1, pady=5, sticky=tk.W)
 
         ttk.Label(left_frame, text="Property:").grid(row=3, column=0, sticky=tk.W, pady=5)
-        self.property_combo = ttk.Combobox(left_frame, textvariable=self.property_id_var, width=30)
+        self.property_combo = Picker(
+            left_frame, textvariable=self.property_id_var, width=30,
+            search=self.db.search_property_ids, run=self.app.run_in_background,
+            load=self.db.get_property_combo_data, fetch=self.db.get_properties_by_ids,
+        )
         self.property_combo.grid(row=3, column=1, pady=5, sticky=tk.W)
-        self.update_property_combo()
+        self.property_combo.reload()
 
         ttk.Label(left_frame, text="Assigned Agent:").grid(row=4, column=0, sticky=tk.W, pady=5)
-        self.agent_combo = ttk.Combobox(left_frame, textvariable=self.inquiry_agent_id_var, width=25)
+        self.agent_combo = Picker(
+            left_frame, textvariable=self.inquiry_agent_id_var, width=25,
+            search=self.db.search_agent_ids, run=self.app.run_in_background,
+            load=self.db.get_agent_combo_data, fetch=self.db.get_agents_by_ids,
+        )
         self.agent_combo.grid(row=4, column=1, pady=5, sticky=tk.W)
-        self.update_agent_combo()
+        self.agent_combo.reload()
 
         ttk.Label(left_frame, text="Status:").grid(row=5, column=0, sticky=tk.W, pady=5)
         status_types = ["New", "Contacted", "Viewing Scheduled", "Offer Made", "Closed", "Cancelled"]
@@ -78,9 +94,13 @@ class InquiryTab:
         search_frame.pack(fill=tk.X, pady=5)
 
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
-        ttk.Entry(search_frame, textvariable=self.inquiry_search_var, width=20).pack(side=tk.LEFT, padx=5)
-        ttk.Button(search_frame, text="Search", command=self.search_inquiries).pack(side=tk.LEFT, padx=5)
-        ttk.Button(search_frame, text="Show All", command=self.load_inquiries).pack(side=tk.LEFT, padx=5)
+        search_entry = ttk.Entry(search_frame, textvariable=self.inquiry_search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        # Search as the user types, once typing pauses
+        self.inquiry_search = LiveSearch(search_entry, self.inquiry_search_var, self.search_inquiries)
+        search_entry.bind("<Return>", self.inquiry_search.run)
+        ttk.Button(search_frame, text="Search", command=self.inquiry_search.run).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="Show All", command=self.inquiry_search.clear).pack(side=tk.LEFT, padx=5)
 
         # Filter by status
         filter_frame = ttk.Frame(right_frame)
@@ -90,10 +110,17 @@ class InquiryTab:
         status_filter = ["All"] + status_types
         ttk.Combobox(filter_frame, textvariable=self.inquiry_filter_var, values=status_filter, width=15).pack(side=tk.LEFT, padx=5)
         ttk.Button(filter_frame, text="Apply Filter", command=self.filter_inquiries).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filter_frame, text="Export", command=self.export_inquiries).pack(side=tk.LEFT, padx=5)
+        ttk.Button(filter_frame, text="Duplicates", command=self.show_duplicates).pack(side=tk.LEFT, padx=5)
 
         # Treeview for inquiry listing
         columns = ("id", "client", "property", "date", "status", "agent")
-        self.inquiry_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=15)
+        # Only the rows on screen exist as Tk items; the rest are fetched as the list scrolls
+        self.inquiry_tree = VirtualTreeview(
+            right_frame, format_inquiry_rows, self.app.executor, self.app.show_error,
+            changes=lambda after_seq: self.db.get_changes("inquiries", after_seq),
+            columns=columns, show="headings", height=15,
+        )
 
         # Define headings
         self.inquiry_tree.heading("id", text="ID")
@@ -122,39 +149,18 @@ class InquiryTab:
         # Bind select event
         self.inquiry_tree.bind("<<TreeviewSelect>>", self.inquiry_selected)
 
+        # Follow changes made on any tab; applied once per burst, while the tab is shown
+        self.app.events.subscribe(("inquiries", "properties", "agents"), self.records_changed, inquiry_frame)
+
         # Load data
         self.load_inquiries()
 
-    def update_property_combo(self):
-        """Update the property combobox with current data"""
-        self.property_combo.set("")
-        properties = self.db.get_property_combo_data()
-        property_list = [f"{prop[0]} - {prop[1]}" for prop in properties]
-        self.property_combo["values"] = property_list
-
-    def update_agent_combo(self):
-        """Update the agent combobox with current data"""
-        self.agent_combo.set("")
-        agents = self.db.get_agent_combo_data()
-        agent_list = [f"{agent[0]} - {agent[1]}" for agent in agents]
-        self.agent_combo["values"] = agent_list
-
-    def get_id_from_combobox(self, combo_value):
-        """Extract ID from combobox value (format: "ID - Value")"""
-        if not combo_value:
-            return None
-
-        try:
-            return int(combo_value.split(" - ")[0])
-        except (ValueError, IndexError):
-            return None
-
     def add_inquiry(self):
         """Add a new inquiry to the database"""
         client_name = self.client_name_var.get()
         contact_info = self.contact_info_var.get()
-        property_id = self.get_id_from_combobox(self.property_id_var.get())
-        agent_id = self.get_id_from_combobox(self.inquiry_agent_id_var.get())
+        property_id = self.property_combo.get_id()
+        agent_id = self.agent_combo.get_id()
         status = self.inquiry_status_var.get()
         notes = self.notes_text.get("1.0", tk.END).strip()
 
@@ -162,14 +168,23 @@ class InquiryTab:
             messagebox.showerror("Error", "Client Name is a required field")
             return
 
-        try:
-            self.db.add_inquiry(client_name, contact_info, property_id, status, notes, agent_id)
+        def inquiry_added(inquiry_id):
+            self.app.events.publish("inquiries", inquiry_id, INSERT)
             self.clear_fields()
-            self.load_inquiries()
 
-            messagebox.showinfo("Success", "Inquiry added successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            # Mention other spellings of the client (recorded as it was added)
+            def duplicates_found(matches):
+                note = format_duplicate_note(matches, "The client looks like the one in inquiry")
+                messagebox.showinfo("Success", "Inquiry added successfully" + note)
+
+            self.app.run_in_background(
+                self.db.get_duplicates_of, "inquiries", inquiry_id, on_success=duplicates_found
+            )
+
+        self.app.run_in_background(
+            self.db.add_inquiry, client_name, contact_info, property_id, status, notes, agent_id,
+            on_success=inquiry_added,
+        )
 
     def update_inquiry(self):
         """Update an existing inquiry in the database"""
@@ -181,8 +196,8 @@ class InquiryTab:
         inquiry_id = self.inquiry_tree.item(selected_item, "values")[0]
         client_name = self.client_name_var.get()
         contact_info = self.contact_info_var.get()
-        property_id = self.get_id_from_combobox(self.property_id_var.get())
-        agent_id = self.get_id_from_combobox(self.inquiry_agent_id_var.get())
+        property_id = self.property_combo.get_id()
+        agent_id = self.agent_combo.get_id()
         status = self.inquiry_status_var.get()
         notes = self.notes_text.get("1.0", tk.END).strip()
 
@@ -190,13 +205,15 @@ class InquiryTab:
             messagebox.showerror("Error", "Client Name is a required field")
             return
 
-        try:
-            self.db.update_inquiry(inquiry_id, client_name, contact_info, property_id, status, notes, agent_id)
-            self.load_inquiries()
+        def inquiry_updated(_):
+            self.app.events.publish("inquiries", int(inquiry_id), UPDATE)
 
             messagebox.showinfo("Success", "Inquiry updated successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+        self.app.run_in_background(
+            self.db.update_inquiry, inquiry_id, client_name, contact_info, property_id, status, notes, agent_id,
+            on_success=inquiry_updated,
+        )
 
     def delete_inquiry(self):
         """Delete an inquiry from the database"""
@@ -211,45 +228,51 @@ class InquiryTab:
         if not confirm:
             return
 
-        try:
-            self.db.delete_inquiry(inquiry_id)
+        def inquiry_deleted(_):
+            self.app.events.publish("inquiries", int(inquiry_id), DELETE)
             self.clear_fields()
-            self.load_inquiries()
 
             messagebox.showinfo("Success", "Inquiry deleted successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+        self.app.run_in_background(self.db.delete_inquiry, inquiry_id, on_success=inquiry_deleted)
 
     def load_inquiries(self):
         """Load all inquiries into the treeview"""
-        # Clear existing data
-        for i in self.inquiry_tree.get_children():
-            self.inquiry_tree.delete(i)
-
-        # Load data from database
-        inquiries = self.db.get_inquiries()
-
-        for row in inquiries:
-            # Add to treeview
-            self.inquiry_tree.insert("", "end", values=(row[0], row[1], row[2] or "N/A", row[3], row[4] or "New", row[5] or "Unassigned"))
-
-    def search_inquiries(self):
-        """Search inquiries by client name"""
-        search_term = self.inquiry_search_var.get()
+        # Load the ids in listing order; rows are fetched as they scroll into view
+        self.inquiry_tree.load(self.db.get_inquiry_ids, self.db.get_inquiries_by_ids)
+
+    def refresh_inquiries(self):
+        """Apply inquiry changes to the treeview without reloading it"""
+        self.inquiry_tree.refresh()
+
+    def records_changed(self, events):
+        """Bring the tab up to date after inquiries, properties or agents changed (on any tab)"""
+        entities = {event.entity for event in events}
+        if "agents" in entities:
+            self.agent_combo.records_changed([event for event in events if event.entity == "agents"])
+        if "properties" in entities:
+            self.property_combo.records_changed([event for event in events if event.entity == "properties"])
+        if entities & {"agents", "properties"}:
+            # Inquiries show the property's address and the agent's name
+            self.inquiry_tree.invalidate()
+        self.refresh_inquiries()
+
+    def search_inquiries(self, search_term, cancel):
+        """Search inquiries by client name, contact info or notes
+
+        Called by the live search; cancel is set once the term changes again.
+        """
         if not search_term:
             self.load_inquiries()
             return
 
-        # Clear existing data
-        for i in self.inquiry_tree.get_children():
-            self.inquiry_tree.delete(i)
-
-        # Search inquiries
-        inquiries = self.db.search_inquiries(search_term)
-
-        for row in inquiries:
-            # Add to treeview
-            self.inquiry_tree.insert("", "end", values=(row[0], row[1], row[2] or "N/A", row[3], row[4] or "New", row[5] or "Unassigned"))
+        # Show the first matches straight away, then the rest of the ids
+        self.inquiry_tree.load(
+            lambda: self.db.search_inquiry_ids(search_term, cancel=cancel),
+            self.db.get_inquiries_by_ids,
+            incremental=False,
+            first_ids=lambda: self.db.search_inquiry_ids(search_term, FIRST_RESULTS, cancel),
+        )
 
     def filter_inquiries(self):
         """Filter inquiries by status"""
@@ -258,16 +281,22 @@ class InquiryTab:
             self.load_inquiries()
             return
 
-        # Clear existing data
-        for i in self.inquiry_tree.get_children():
-            self.inquiry_tree.delete(i)
+        # Filter inquiries on the status index
+        self.inquiry_tree.load(
+            lambda: self.db.get_inquiry_ids(status),
+            lambda inquiry_ids: self.db.get_inquiries_by_ids(inquiry_ids, status),
+        )
 
-        # Filter inquiries
-        inquiries = self.db.filter_inquiries_by_status(status)
+    def export_inquiries(self):
+        """Export the inquiries matching the current search and status filter to a file"""
+        status = self.inquiry_filter_var.get()
+        self.app.export_table(
+            "inquiries", search=self.inquiry_search_var.get(), status=None if status == "All" else status
+        )
 
-        for row in inquiries:
-            # Add to treeview
-            self.inquiry_tree.insert("", "end", values=(row[0], row[1], row[2] or "N/A", row[3], row[4] or "New", row[5] or "Unassigned"))
+    def show_duplicates(self):
+        """Open the duplicate clients window"""
+        self.app.show_duplicates("inquiries")
 
     def inquiry_selected(self, event):
         """Handle inquiry selection in the treeview"""
@@ -277,39 +306,34 @@ class InquiryTab:
             inquiry_id = self.inquiry_tree.item(selected_item, "values")[0]
 
             # Get inquiry details from database
-            inquiry_data = self.db.get_inquiry(inquiry_id)
-            if inquiry_data:
-                # Clear current fields
-                self.clear_fields()
-
-                # Populate fields with selected inquiry data
-                self.client_name_var.set(inquiry_data[1])
-                self.contact_info_var.set(inquiry_data[2] or "")
-
-                # Set property if exists
-                if inquiry_data[3]:
-                    # Find property in combobox values
-                    property_values = self.property_combo["values"]
-                    for property_value in property_values:
-                        if property_value.startswith(f"{inquiry_data[3]} - "):
-                            self.property_id_var.set(property_value)
-                            break
-
-                self.inquiry_status_var.set(inquiry_data[5] or "New")
-
-                # Set agent if exists
-                if inquiry_data[7]:
-                    # Find agent in combobox values
-                    agent_values = self.agent_combo["values"]
-                    for agent_value in agent_values:
-                        if agent_value.startswith(f"{inquiry_data[7]} - "):
-                            self.inquiry_agent_id_var.set(agent_value)
-                            break
-
-                # Set notes
-                self.notes_text.delete("1.0", tk.END)
-                if inquiry_data[6]:
-                    self.notes_text.insert("1.0", inquiry_data[6])
+            self.app.run_in_background(
+                self.db.get_inquiry, inquiry_id, key=(self, "selected"), on_success=self.show_inquiry
+            )
+
+    def show_inquiry(self, inquiry_data):
+        """Populate the input fields with an inquiry row"""
+        if inquiry_data:
+            # Clear current fields
+            self.clear_fields()
+
+            # Populate fields with selected inquiry data
+            self.client_name_var.set(inquiry_data[1])
+            self.contact_info_var.set(inquiry_data[2] or "")
+
+            # Set property if exists
+            if inquiry_data[3]:
+                self.property_combo.set_id(inquiry_data[3])
+
+            self.inquiry_status_var.set(inquiry_data[5] or "New")
+
+            # Set agent if exists
+            if inquiry_data[7]:
+                self.agent_combo.set_id(inquiry_data[7])
+
+            # Set notes
+            self.notes_text.delete("1.0", tk.END)
+            if inquiry_data[6]:
+                self.notes_text.insert("1.0", inquiry_data[6])
 
     def clear_fields(self):
         """Clear all input fields"""
@@ -0,0 +1,236 @@
+import atexit
+import functools
+import inspect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger("realestate.slow_queries")
+
+# Environment switches (instrumentation is off unless REALESTATE_PROFILE is set)
+PROFILE_ENV = "REALESTATE_PROFILE"
+SLOW_QUERY_MS_ENV = "REALESTATE_SLOW_QUERY_MS"
+PROFILE_FILE_ENV = "REALESTATE_PROFILE_FILE"
+
+DEFAULT_SLOW_QUERY_MS = 100.0
+
+# Latency histogram resolution: 8 buckets per doubling (about 9% wide each)
+BUCKETS_PER_OCTAVE = 8
+
+# Number of slow calls kept for the diagnostics view and the JSON dump
+SLOW_LOG_SIZE = 200
+
+# Database methods that manage the connection rather than run queries
+SKIPPED_METHODS = {"connect", "close", "create_tables", "transaction"}
+
+# Statements kept per call for the slow-call log
+CAPTURED_STATEMENTS = 50
+
+
+class LatencyHistogram:
+    def __init__(self):
+        """Log-scale latency histogram with constant memory per method"""
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """Record one latency sample"""
+        micros = max(seconds * 1e6, 1.0)
+        bucket = int(math.log2(micros) * BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """Return the latency (ms) below which `fraction` of samples fall"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                upper_micros = 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE)
+                return min(upper_micros / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def summary(self):
+        """Return call count and latency figures in milliseconds"""
+        return {
+            "calls": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class QueryStats:
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS):
+        """Per-method call counts, latency histograms and a slow-call log"""
+        self.slow_query_ms = slow_query_ms
+        self.histograms = {}
+        self.slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+        self.started = datetime.now()
+        self._lock = threading.Lock()
+
+    def record(self, method, seconds, statements, explain):
+        """Record one call; log it with its query plans if it crossed the threshold"""
+        with self._lock:
+            histogram = self.histograms.get(method)
+            if histogram is None:
+                histogram = self.histograms[method] = LatencyHistogram()
+            histogram.add(seconds)
+
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.slow_query_ms:
+            return
+
+        entry = {
+            "method": method,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "queries": [{"sql": " ".join(sql.split()), "plan": explain(sql, params)} for sql, params in statements],
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+
+        logger.warning("Slow call %s took %.1f ms", method, elapsed_ms)
+        for query in entry["queries"]:
+            logger.warning("  %s", query["sql"])
+            for line in query["plan"] or []:
+                logger.warning("    %s", line)
+
+    def summary(self):
+        """Return {method: latency summary}, slowest total time first"""
+        with self._lock:
+            items = [(method, histogram.summary()) for method, histogram in self.histograms.items()]
+        items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        return dict(items)
+
+    def to_dict(self):
+        """Return everything collected so far as JSON-serializable data"""
+        with self._lock:
+            slow_queries = list(self.slow_queries)
+        return {
+            "started": self.started.strftime("%Y-%m-%d %H:%M:%S"),
+            "dumped": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "slow_query_ms": self.slow_query_ms,
+            "methods": self.summary(),
+            "slow_queries": slow_queries,
+        }
+
+    def dump(self, path):
+        """Write the collected statistics to a JSON file"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def reset(self):
+        """Discard everything collected so far"""
+        with self._lock:
+            self.histograms.clear()
+            self.slow_queries.clear()
+            self.started = datetime.now()
+
+
+def explain_query_plan(db, sql, params):
+    """Return the EXPLAIN QUERY PLAN lines for one statement, or None if unavailable"""
+    if params is None:
+        return None
+    if sql.lstrip().split(None, 1)[0].upper() in ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE"):
+        return None
+    try:
+        with db.pool.reader() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except Exception as e:
+        return [f"(plan unavailable: {e})"]
+    return [row[-1] for row in rows]
+
+
+def instrument(db, stats):
+    """Time every public Database method on this instance and capture its SQL
+
+    Wrappers are installed on the instance only, so an uninstrumented
+    Database pays nothing beyond a check per statement. The SQL is captured
+    with a statement hook on the pool's connections, so statements a method
+    runs on a connection directly are logged too. Statements are kept as
+    written, with placeholders: the bound values are only used to explain
+    the plan and never logged. Returns `stats`, also available as
+    db.query_stats.
+    """
+    local = threading.local()
+
+    def explain(sql, params):
+        # The plan's own EXPLAIN statement isn't part of any call
+        local.explaining = True
+        try:
+            return explain_query_plan(db, sql, params)
+        finally:
+            local.explaining = False
+
+    def capture(sql, params):
+        # Runs on the thread that runs the statement, which holds its connection
+        stack = getattr(local, "stack", None)
+        if not stack or getattr(local, "explaining", False):
+            return
+        statements = stack[-1]
+        # A statement run in a loop is kept once
+        if len(statements) < CAPTURED_STATEMENTS and (not statements or statements[-1][0] != sql):
+            statements.append((sql, params))
+
+    def timed(name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = local.stack = []
+            statements = []
+            stack.append(statements)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                stats.record(name, elapsed, statements, explain)
+
+        return wrapper
+
+    db.pool.set_statement_hook(capture)
+
+    for name, _ in inspect.getmembers(type(db), inspect.isfunction):
+        if name.startswith("_") or name in SKIPPED_METHODS:
+            continue
+        setattr(db, name, timed(name, getattr(db, name)))
+
+    db.query_stats = stats
+    return stats
+
+
+def instrument_from_env(db):
+    """Instrument `db` if REALESTATE_PROFILE is set; return the QueryStats or None
+
+    REALESTATE_SLOW_QUERY_MS sets the slow-call threshold and
+    REALESTATE_PROFILE_FILE names a JSON file written at exit.
+    """
+    if not os.environ.get(PROFILE_ENV):
+        return None
+
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s: %(message)s")
+
+    stats = instrument(db, QueryStats(float(os.environ.get(SLOW_QUERY_MS_ENV, DEFAULT_SLOW_QUERY_MS))))
+    dump_path = os.environ.get(PROFILE_FILE_ENV)
+    if dump_path:
+        atexit.register(stats.dump, dump_path)
+    return stats
@@ -0,0 +1,50 @@
+import threading
+
+# Milliseconds typing has to pause before the search runs
+SEARCH_DELAY = 150
+
+# Results shown straight away while the rest of a search is still loading
+FIRST_RESULTS = 200
+
+
+class LiveSearch:
+    def __init__(self, widget, variable, search, delay=SEARCH_DELAY):
+        """Run search(term, cancel) once typing in `variable` pauses for `delay` ms
+
+        cancel is a threading.Event that is set as soon as the term changes
+        again, so queries still running for the old term stop early (see
+        Database.search_property_ids). widget provides after() scheduling.
+        """
+        self.widget = widget
+        self.variable = variable
+        self.search = search
+        self.delay = delay
+        self._after_id = None
+        self._cancel = None
+
+        variable.trace_add("write", self._changed)
+
+    def _changed(self, *args):
+        """Restart the delay on every keystroke; the previous term's search is stale"""
+        self.cancel()
+        self._after_id = self.widget.after(self.delay, self.run)
+
+    def run(self, event=None):
+        """Search for the current term now (the Search button and the Return key)"""
+        self.cancel()
+        self._cancel = threading.Event()
+        self.search(self.variable.get().strip(), self._cancel)
+
+    def clear(self):
+        """Empty the search box and show everything straight away"""
+        self.variable.set("")
+        self.run()
+
+    def cancel(self):
+        """Drop a pending search and stop the one running, if any"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self._cancel is not None:
+            self._cancel.set()
+            self._cancel = None
@@ -0,0 +1,358 @@
+import re
+from math import asin, cos, degrees, radians, sin
+from collections import defaultdict
+from functools import lru_cache
+
+# Offline PIN code lookup: city -> ((locality, PIN code), ...). A locality may
+# be listed under more than one PIN code and a PIN code may cover several
+# localities. Add rows here to recognise more places.
+LOCALITIES = {
+    "Mumbai": (
+        ("Powai", "400076"), ("Andheri West", "400058"), ("Andheri East", "400069"), ("Bandra West", "400050"),
+        ("Bandra East", "400051"), ("Goregaon East", "400063"), ("Goregaon West", "400062"),
+        ("Malad West", "400064"), ("Kandivali West", "400067"), ("Borivali West", "400092"),
+        ("Chembur", "400071"), ("Ghatkopar East", "400077"), ("Mulund West", "400080"), ("Juhu", "400049"),
+        ("Worli", "400018"), ("Lower Parel", "400013"), ("Dadar West", "400028"), ("Colaba", "400005"),
+        ("Marine Drive", "400020"), ("Thane West", "400601"), ("Vashi", "400703"),
+    ),
+    "Bangalore": (
+        ("Whitefield", "560066"), ("Whitefield", "560048"), ("Koramangala", "560034"), ("Indiranagar", "560038"),
+        ("HSR Layout", "560102"), ("Electronic City", "560100"), ("Hebbal", "560024"), ("Jayanagar", "560041"),
+        ("Sarjapur Road", "560035"), ("Marathahalli", "560037"), ("Bellandur", "560103"), ("BTM Layout", "560076"),
+        ("JP Nagar", "560078"), ("Malleshwaram", "560003"), ("Yelahanka", "560064"),
+    ),
+    "Delhi": (
+        ("Dwarka", "110075"), ("Dwarka", "110078"), ("Vasant Kunj", "110070"), ("Rohini", "110085"),
+        ("Saket", "110017"), ("Lajpat Nagar", "110024"), ("Defence Colony", "110024"), ("Janakpuri", "110058"),
+        ("Connaught Place", "110001"), ("Karol Bagh", "110005"), ("Hauz Khas", "110016"),
+        ("Greater Kailash", "110048"), ("Rajouri Garden", "110027"), ("Pitampura", "110034"),
+        ("Mayur Vihar", "110091"),
+    ),
+    "Hyderabad": (
+        ("Banjara Hills", "500034"), ("Jubilee Hills", "500033"), ("Gachibowli", "500032"), ("Kondapur", "500084"),
+        ("Madhapur", "500081"), ("Hitech City", "500081"), ("Kukatpally", "500072"), ("Begumpet", "500016"),
+        ("Secunderabad", "500003"), ("Manikonda", "500089"),
+    ),
+    "Pune": (
+        ("Aundh", "411007"), ("Hinjewadi", "411057"), ("Wakad", "411057"), ("Kharadi", "411014"),
+        ("Viman Nagar", "411014"), ("Baner", "411045"), ("Kothrud", "411038"), ("Koregaon Park", "411001"),
+        ("Hadapsar", "411028"), ("Magarpatta", "411013"), ("Pimple Saudagar", "411027"),
+    ),
+    "Chennai": (
+        ("Adyar", "600020"), ("Anna Nagar", "600040"), ("Velachery", "600042"), ("OMR", "600097"),
+        ("T Nagar", "600017"), ("Mylapore", "600004"), ("Nungambakkam", "600034"), ("Besant Nagar", "600090"),
+        ("Porur", "600116"), ("Tambaram", "600045"),
+    ),
+    "Kolkata": (
+        ("Salt Lake", "700091"), ("New Town", "700156"), ("Rajarhat", "700135"), ("Ballygunge", "700019"),
+        ("Behala", "700034"), ("Park Street", "700016"), ("Alipore", "700027"), ("Tollygunge", "700033"),
+    ),
+    "Gurugram": (
+        ("DLF Phase 1", "122002"), ("DLF Phase 2", "122002"), ("Sohna Road", "122018"), ("Sector 49", "122018"),
+        ("Golf Course Road", "122011"), ("Sector 56", "122011"), ("Sushant Lok", "122009"),
+    ),
+    "Ahmedabad": (
+        ("Satellite", "380015"), ("Prahlad Nagar", "380015"), ("Vastrapur", "380015"), ("Bopal", "380058"),
+        ("Navrangpura", "380009"), ("Maninagar", "380008"), ("Thaltej", "380054"),
+    ),
+    "Noida": (("Sector 18", "201301"), ("Sector 62", "201309"), ("Sector 150", "201310"), ("Sector 137", "201305")),
+    "Jaipur": (
+        ("Malviya Nagar", "302017"), ("Vaishali Nagar", "302021"), ("Mansarovar", "302020"), ("C Scheme", "302001"),
+        ("Raja Park", "302004"),
+    ),
+    "Kochi": (
+        ("Kakkanad", "682030"), ("Edappally", "682024"), ("Panampilly Nagar", "682036"), ("Vyttila", "682019"),
+        ("Fort Kochi", "682001"),
+    ),
+    "Lucknow": (("Gomti Nagar", "226010"), ("Hazratganj", "226001"), ("Aliganj", "226024"), ("Indira Nagar", "226016")),
+    "Chandigarh": (("Sector 17", "160017"), ("Sector 35", "160022")),
+    "Ludhiana": (("Model Town", "141002"), ("Sarabha Nagar", "141001")),
+}
+
+# Approximate centre (latitude, longitude) of each locality in LOCALITIES;
+# listings without coordinates of their own are placed there
+LOCALITY_CENTRES = {
+    "Mumbai": {
+        "Powai": (19.1176, 72.9060), "Andheri West": (19.1364, 72.8296), "Andheri East": (19.1136, 72.8697),
+        "Bandra West": (19.0596, 72.8295), "Bandra East": (19.0622, 72.8478), "Goregaon East": (19.1663, 72.8526),
+        "Goregaon West": (19.1627, 72.8370), "Malad West": (19.1860, 72.8400), "Kandivali West": (19.2047, 72.8410),
+        "Borivali West": (19.2290, 72.8520), "Chembur": (19.0522, 72.9005), "Ghatkopar East": (19.0790, 72.9080),
+        "Mulund West": (19.1726, 72.9425), "Juhu": (19.1075, 72.8263), "Worli": (19.0176, 72.8162),
+        "Lower Parel": (18.9953, 72.8300), "Dadar West": (19.0186, 72.8424), "Colaba": (18.9067, 72.8147),
+        "Marine Drive": (18.9430, 72.8238), "Thane West": (19.2183, 72.9781), "Vashi": (19.0771, 72.9986),
+    },
+    "Bangalore": {
+        "Whitefield": (12.9698, 77.7500), "Koramangala": (12.9352, 77.6245), "Indiranagar": (12.9784, 77.6408),
+        "HSR Layout": (12.9116, 77.6474), "Electronic City": (12.8452, 77.6602), "Hebbal": (13.0358, 77.5970),
+        "Jayanagar": (12.9308, 77.5838), "Sarjapur Road": (12.9100, 77.6860), "Marathahalli": (12.9569, 77.7011),
+        "Bellandur": (12.9260, 77.6762), "BTM Layout": (12.9166, 77.6101), "JP Nagar": (12.9063, 77.5857),
+        "Malleshwaram": (13.0031, 77.5643), "Yelahanka": (13.1007, 77.5963),
+    },
+    "Delhi": {
+        "Dwarka": (28.5921, 77.0460), "Vasant Kunj": (28.5200, 77.1580), "Rohini": (28.7383, 77.0822),
+        "Saket": (28.5245, 77.2066), "Lajpat Nagar": (28.5677, 77.2433), "Defence Colony": (28.5733, 77.2310),
+        "Janakpuri": (28.6219, 77.0878), "Connaught Place": (28.6315, 77.2167), "Karol Bagh": (28.6519, 77.1909),
+        "Hauz Khas": (28.5494, 77.2001), "Greater Kailash": (28.5482, 77.2380), "Rajouri Garden": (28.6492, 77.1226),
+        "Pitampura": (28.7033, 77.1322), "Mayur Vihar": (28.6077, 77.2930),
+    },
+    "Hyderabad": {
+        "Banjara Hills": (17.4156, 78.4347), "Jubilee Hills": (17.4326, 78.4071), "Gachibowli": (17.4401, 78.3489),
+        "Kondapur": (17.4622, 78.3568), "Madhapur": (17.4483, 78.3915), "Hitech City": (17.4435, 78.3772),
+        "Kukatpally": (17.4849, 78.4138), "Begumpet": (17.4440, 78.4627), "Secunderabad": (17.4399, 78.4983),
+        "Manikonda": (17.4050, 78.3860),
+    },
+    "Pune": {
+        "Aundh": (18.5580, 73.8075), "Hinjewadi": (18.5913, 73.7389), "Wakad": (18.5987, 73.7688),
+        "Kharadi": (18.5515, 73.9348), "Viman Nagar": (18.5679, 73.9143), "Baner": (18.5590, 73.7868),
+        "Kothrud": (18.5074, 73.8077), "Koregaon Park": (18.5362, 73.8940), "Hadapsar": (18.5089, 73.9260),
+        "Magarpatta": (18.5158, 73.9272), "Pimple Saudagar": (18.5990, 73.7990),
+    },
+    "Chennai": {
+        "Adyar": (13.0012, 80.2565), "Anna Nagar": (13.0850, 80.2101), "Velachery": (12.9815, 80.2180),
+        "OMR": (12.9010, 80.2279), "T Nagar": (13.0418, 80.2341), "Mylapore": (13.0368, 80.2676),
+        "Nungambakkam": (13.0569, 80.2425), "Besant Nagar": (13.0002, 80.2668), "Porur": (13.0382, 80.1565),
+        "Tambaram": (12.9249, 80.1000),
+    },
+    "Kolkata": {
+        "Salt Lake": (22.5867, 88.4171), "New Town": (22.5926, 88.4849), "Rajarhat": (22.6200, 88.4500),
+        "Ballygunge": (22.5280, 88.3650), "Behala": (22.4980, 88.3100), "Park Street": (22.5535, 88.3520),
+        "Alipore": (22.5330, 88.3330), "Tollygunge": (22.4986, 88.3454),
+    },
+    "Gurugram": {
+        "DLF Phase 1": (28.4720, 77.0930), "DLF Phase 2": (28.4880, 77.0880), "Sohna Road": (28.4090, 77.0420),
+        "Sector 49": (28.4120, 77.0530), "Golf Course Road": (28.4530, 77.1000), "Sector 56": (28.4240, 77.1040),
+        "Sushant Lok": (28.4610, 77.0730),
+    },
+    "Ahmedabad": {
+        "Satellite": (23.0300, 72.5170), "Prahlad Nagar": (23.0120, 72.5100), "Vastrapur": (23.0370, 72.5290),
+        "Bopal": (23.0330, 72.4640), "Navrangpura": (23.0370, 72.5600), "Maninagar": (22.9960, 72.6030),
+        "Thaltej": (23.0500, 72.5070),
+    },
+    "Noida": {
+        "Sector 18": (28.5700, 77.3210), "Sector 62": (28.6270, 77.3650), "Sector 150": (28.4440, 77.4800),
+        "Sector 137": (28.5100, 77.4080),
+    },
+    "Jaipur": {
+        "Malviya Nagar": (26.8530, 75.8050), "Vaishali Nagar": (26.9110, 75.7430), "Mansarovar": (26.8690, 75.7600),
+        "C Scheme": (26.9090, 75.8000), "Raja Park": (26.8980, 75.8270),
+    },
+    "Kochi": {
+        "Kakkanad": (10.0159, 76.3419), "Edappally": (10.0261, 76.3086), "Panampilly Nagar": (9.9580, 76.2950),
+        "Vyttila": (9.9680, 76.3180), "Fort Kochi": (9.9658, 76.2421),
+    },
+    "Lucknow": {
+        "Gomti Nagar": (26.8540, 81.0000), "Hazratganj": (26.8500, 80.9450), "Aliganj": (26.8900, 80.9400),
+        "Indira Nagar": (26.8800, 80.9900),
+    },
+    "Chandigarh": {"Sector 17": (30.7410, 76.7820), "Sector 35": (30.7240, 76.7610)},
+    "Ludhiana": {"Model Town": (30.8900, 75.8400), "Sarabha Nagar": (30.8800, 75.8200)},
+}
+
+
+# Other names addresses use for a city or locality
+CITY_ALIASES = {
+    "Bombay": "Mumbai",
+    "Bengaluru": "Bangalore",
+    "New Delhi": "Delhi",
+    "Gurgaon": "Gurugram",
+    "Calcutta": "Kolkata",
+    "Madras": "Chennai",
+    "Cochin": "Kochi",
+    "Ernakulam": "Kochi",
+}
+LOCALITY_ALIASES = {
+    "Bidhannagar": "Salt Lake",
+    "Thyagaraya Nagar": "T Nagar",
+    "Old Mahabalipuram Road": "OMR",
+    "HITEC City": "Hitech City",
+    "Electronics City": "Electronic City",
+}
+
+# Trailing address parts (between commas) looked at for the city and locality
+ADDRESS_PARTS = 4
+
+# Address parts whose lookup keys are remembered; localities and cities repeat
+PART_CACHE_SIZE = 65536
+
+# Address endings ("Kaveri Park, Velachery, Chennai 600042") whose parse is
+# remembered; listings in one building or street share them
+ENDING_CACHE_SIZE = 65536
+
+# A six-digit PIN code, possibly written with a space after the third digit
+PIN_CODE = re.compile(r"(?<!\d)([1-9]\d{2}) ?(\d{3})(?!\d)")
+
+# Characters a place_key leaves out
+NOT_KEY = re.compile(r"[\W_]+")
+
+# Mean radius of the Earth, for distances between coordinates
+EARTH_RADIUS_KM = 6371.0088
+
+# "latitude, longitude" typed as a place, e.g. "19.1176, 72.906"
+COORDINATES = re.compile(r"^\s*([-+]?\d+(?:\.\d*)?)\s*[,\s]\s*([-+]?\d+(?:\.\d*)?)\s*$")
+
+
+def place_key(name):
+    """Lookup key for a place name: case, spaces and punctuation ignored ("T. Nagar" -> "tnagar")"""
+    return NOT_KEY.sub("", name).casefold()
+
+
+def _build_lookups():
+    """Index LOCALITIES by city name, locality name, PIN code and PIN prefix"""
+    cities = {place_key(city): city for city in LOCALITIES}
+    cities.update((place_key(alias), city) for alias, city in CITY_ALIASES.items())
+
+    localities = defaultdict(set)  # locality key -> {(city, locality)}
+    pin_codes = defaultdict(set)  # locality (city, locality) -> {PIN code}
+    by_pin_code = defaultdict(set)  # PIN code -> {(city, locality)}
+    prefixes = defaultdict(set)  # first three digits (the sorting district) -> {city}
+    for city, places in LOCALITIES.items():
+        for locality, pin_code in places:
+            localities[place_key(locality)].add((city, locality))
+            pin_codes[city, locality].add(pin_code)
+            by_pin_code[pin_code].add((city, locality))
+            prefixes[pin_code[:3]].add(city)
+    for alias, locality in LOCALITY_ALIASES.items():
+        localities[place_key(alias)] |= localities[place_key(locality)]
+
+    # Only a district served by a single city tells the city
+    city_prefixes = {prefix: next(iter(found)) for prefix, found in prefixes.items() if len(found) == 1}
+    return cities, dict(localities), dict(pin_codes), dict(by_pin_code), city_prefixes
+
+
+CITY_KEYS, LOCALITY_KEYS, LOCALITY_PIN_CODES, PIN_CODE_LOCALITIES, PIN_PREFIX_CITIES = _build_lookups()
+
+# A city's centre, for searches near it: the middle of its localities' centres
+CITY_CENTRES = {
+    city: tuple(sum(values) / len(values) for values in zip(*centres.values()))
+    for city, centres in LOCALITY_CENTRES.items()
+}
+
+
+def parse_address(address):
+    """Return (city, locality, PIN code) read from a free-text address, each None when unknown
+
+    The PIN code is the last six-digit number. The city is the last part
+    (between commas) naming a known city, else the one the PIN code belongs
+    to. The locality is the last part naming one of that city's localities
+    (a PIN code often spans localities the table doesn't list, so it never
+    decides the locality); a known locality fills in a missing PIN code when
+    it has just one. Names come back spelt as in LOCALITIES.
+    """
+    if not address:
+        return None, None, None
+    # The first part is most often a house or flat number, new in every address.
+    # When it names no place and has no PIN code, the rest decides on its own.
+    first, comma, ending = address.partition(",")
+    if comma and not PIN_CODE.search(first):
+        key = place_key(first)
+        if key not in CITY_KEYS and key not in LOCALITY_KEYS:
+            return _parse_ending(ending)
+    return _parse_parts(address)
+
+
+def _parse_parts(address):
+    """parse_address of a non-empty address, looking at every part"""
+    pin_codes = PIN_CODE.findall(address)
+    pin_code = "".join(pin_codes[-1]) if pin_codes else None
+    # Addresses end "..., locality, city PIN"; the last few parts are looked at, last first
+    parts = [_part_key(part) for part in reversed(address.split(",")[-ADDRESS_PARTS:])]
+
+    city = next((CITY_KEYS[part] for part in parts if part in CITY_KEYS), None)
+    if city is None and pin_code is not None:
+        cities = {place[0] for place in PIN_CODE_LOCALITIES.get(pin_code, ())}
+        city = cities.pop() if len(cities) == 1 else PIN_PREFIX_CITIES.get(pin_code[:3])
+
+    locality = None
+    for part in parts:
+        places = LOCALITY_KEYS.get(part, ())
+        if city is not None:
+            places = [place for place in places if place[0] == city]
+        if len(places) == 1:
+            city, locality = next(iter(places))
+            break
+
+    if pin_code is None and locality is not None:
+        known = LOCALITY_PIN_CODES[city, locality]
+        if len(known) == 1:
+            pin_code = next(iter(known))
+    return city, locality, pin_code
+
+
+_parse_ending = lru_cache(maxsize=ENDING_CACHE_SIZE)(_parse_parts)
+
+
+def street_address(address):
+    """The address without its trailing place parts: those naming a known locality or city, or just a PIN code
+
+    "B-1601, Green Residency, Madhapur, Hyderabad 500081" -> "B-1601, Green Residency"
+    """
+    parts = (address or "").split(",")
+    end = len(parts)
+    while end > max(len(parts) - ADDRESS_PARTS, 1):
+        key = _part_key(parts[end - 1])
+        if key and key not in CITY_KEYS and key not in LOCALITY_KEYS:
+            break
+        end -= 1
+    return ",".join(parts[:end]).strip()
+
+
+@lru_cache(maxsize=PART_CACHE_SIZE)
+def _part_key(part):
+    """place_key of one comma-separated address part, without its PIN code"""
+    return place_key(PIN_CODE.sub("", part))
+
+
+def valid_coordinates(latitude, longitude):
+    """True when latitude lies in [-90, 90] and longitude in [-180, 180]"""
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+def locality_centre(city, locality):
+    """(latitude, longitude) of a known locality's centre, else (None, None)"""
+    return LOCALITY_CENTRES.get(city, {}).get(locality, (None, None))
+
+
+def place_coordinates(place):
+    """(latitude, longitude) for typed coordinates or a place name ("Powai, Mumbai", "Pune"), else None
+
+    A name is read as an address (see parse_address): a known locality gives
+    its centre and a city alone the city's centre.
+    """
+    match = COORDINATES.match(place or "")
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        return (latitude, longitude) if valid_coordinates(latitude, longitude) else None
+    city, locality, _ = parse_address(place)
+    if locality is not None:
+        return locality_centre(city, locality)
+    return CITY_CENTRES.get(city)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(south, north, [(west, east), ...]): the smallest box around a circle on the Earth
+
+    The longitude range is split in two where the circle crosses the 180th
+    meridian, and covers every longitude when the circle holds a pole.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    south, north = latitude - degrees(angle), latitude + degrees(angle)
+    if south <= -90 or north >= 90:
+        return max(south, -90), min(north, 90), [(-180, 180)]
+    # The meridians touching the circle, where it is widest
+    spread = degrees(asin(min(sin(angle) / cos(radians(latitude)), 1)))
+    west, east = longitude - spread, longitude + spread
+    if west < -180:
+        return south, north, [(west + 360, 180), (-180, east)]
+    if east > 180:
+        return south, north, [(west, 180), (-180, east - 360)]
+    return south, north, [(west, east)]
+
+
+def localities_in_box(south, north, spans):
+    """The (city, locality) pairs whose centre lies in a bounding_box result"""
+    return [
+        (city, locality)
+        for city, centres in LOCALITY_CENTRES.items()
+        for locality, (latitude, longitude) in centres.items()
+        if south <= latitude <= north and any(west <= longitude <= east for west, east in spans)
+    ]
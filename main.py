@@ -1,19 +1,105 @@
+import time
+
+# Startup phases are timed from here (see --startup-timing)
+STARTED = time.perf_counter()
+
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database import Database
-from app import RealEstateApp
-from seed_data import seed_database
 import os
 import sqlite3
 
+# The app, sample data and instrumentation modules are imported only when
+# needed, so the login window doesn't wait for them
+
+DB_PATH = "real_estate.db"
+
+
+class StartupTimer:
+    def __init__(self, enabled=False):
+        """Record how long each startup phase takes; report() prints them if enabled"""
+        self.enabled = enabled
+        self.phases = []
+        self._last = STARTED
+
+    def restart(self):
+        """Start timing a new sequence of phases"""
+        self.phases = []
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """End `phase`: it took the time since the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self, title="Startup timing"):
+        """Print the phase-by-phase breakdown"""
+        if not self.enabled:
+            return
+        print(f"{title}:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<24}{seconds * 1000:9.1f} ms")
+        total = sum(seconds for _, seconds in self.phases)
+        print(f"  {'total':<24}{total * 1000:9.1f} ms")
+
+
+def profile_database(db):
+    """Per-method query timing, enabled with REALESTATE_PROFILE=1"""
+    if os.environ.get("REALESTATE_PROFILE"):
+        from instrumentation import instrument_from_env
+
+        instrument_from_env(db)
+
+
+def open_database(path=DB_PATH, timer=None):
+    """Open the database (creating or upgrading it if needed) and seed it if it's empty
+
+    The one connection pool opened here is used for the rest of the session.
+    """
+    timer = timer or StartupTimer()
+    created = not os.path.exists(path)
+    if created:
+        print("Database not found. Creating and seeding with sample data...")
+    db = Database(path)
+    timer.mark("open database")
+
+    try:
+        empty = db.is_empty()
+    except sqlite3.OperationalError as e:
+        print(f"Database error: {e}")
+        print("Recreating the database and seeding with sample data...")
+        db.close()  # Ensure the connection is closed before deleting the file
+        os.remove(path)
+        db = Database(path)
+        created = empty = True
+    timer.mark("emptiness check")
+
+    if empty:
+        # A new database was announced above
+        if not created:
+            print("Database is empty. Seeding with sample data...")
+        from seed_data import seed_database
+
+        seed_database(db=db)
+        timer.mark("seed sample data")
+
+    profile_database(db)
+    return db
+
+
 class LoginApp:
-    def __init__(self, root):
+    def __init__(self, root, db=None, timer=None):
         """Initialize the login application"""
         self.root = root
-        self.db = Database("real_estate.db")
+        if db is None:
+            db = Database(DB_PATH)
+            profile_database(db)
+        self.db = db
+        self.timer = timer or StartupTimer()
         self.current_user = None
         self.configure_window()
-        self.create_users_table()
         self.login_screen()
 
     def configure_window(self):
@@ -22,21 +108,6 @@ class LoginApp:
         self.root.geometry("400x300")
         self.root.configure(bg="#f0f0f0")
 
-    def create_users_table(self):
-        """Create the users table if it doesn't exist"""
-        self.db.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                address TEXT,
-                mobile TEXT NOT NULL UNIQUE,
-                password TEXT NOT NULL
-            )
-            """
-        )
-        self.db.conn.commit()
-
     def clear(self):
         """Clear all widgets from the root window"""
         for widget in self.root.winfo_children():
@@ -59,8 +130,7 @@ class LoginApp:
             """Handle login logic"""
             mobile = self.mobile_entry.get()
             password = self.password_entry.get()
-            self.db.cursor.execute("SELECT * FROM users WHERE mobile=? AND password=?", (mobile, password))
-            if self.db.cursor.fetchone():
+            if self.db.authenticate_user(mobile, password):
                 self.current_user = mobile
                 self.start_main_app()
             else:
@@ -90,8 +160,7 @@ class LoginApp:
                 messagebox.showerror("Error", "Passwords do not match")
                 return
             try:
-                self.db.cursor.execute("INSERT INTO users (name, address, mobile, password) VALUES (?, ?, ?, ?)", (name, address, mobile, pwd))
-                self.db.conn.commit()
+                self.db.add_user(name, address, mobile, pwd)
                 messagebox.showinfo("Success", "Registered successfully!")
                 self.login_screen()
             except sqlite3.IntegrityError:
@@ -101,49 +170,37 @@ class LoginApp:
 
     def start_main_app(self):
         """Start the main application after successful login"""
+        self.timer.restart()
+        from app import RealEstateApp
+
+        self.timer.mark("import main window")
         self.root.destroy()  # Close the login window
         root = tk.Tk()  # Create a new root window for the main application
         app = RealEstateApp(root, self.db)  # Initialize the main application
+        self.timer.mark("build main window")
+        root.after_idle(self.timer.report, "Main window timing")
         root.mainloop()  # Run the main application
 
-def main():
-    # Check if database exists, if not, create and seed it
-    if not os.path.exists("real_estate.db"):
-        print("Database not found. Creating and seeding with sample data...")
-        seed_database()
-    else:
-        # Check if database is empty
-        db = Database("real_estate.db")
-        try:
-            db.cursor.execute("SELECT COUNT(*) FROM properties")
-            property_count = db.cursor.fetchone()[0]
-
-            db.cursor.execute("SELECT COUNT(*) FROM agents")
-            agent_count = db.cursor.fetchone()[0]
-
-            db.cursor.execute("SELECT COUNT(*) FROM inquiries")
-            inquiry_count = db.cursor.fetchone()[0]
-
-            db.cursor.execute("SELECT COUNT(*) FROM marketing")
-            marketing_count = db.cursor.fetchone()[0]
-
-            if property_count == 0 and agent_count == 0 and inquiry_count == 0 and marketing_count == 0:
-                print("Database is empty. Seeding with sample data...")
-                db.close()  # Close the connection before seeding
-                seed_database()
-            else:
-                db.close()  # Close the connection
-        except sqlite3.OperationalError as e:
-            print(f"Database error: {e}")
-            print("Recreating the database...")
-            db.close()  # Ensure the connection is closed before deleting the file
-            os.remove("real_estate.db")
-            seed_database()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Real Estate Management System")
+    parser.add_argument(
+        "--startup-timing", action="store_true", help="print how long each startup phase takes"
+    )
+    args = parser.parse_args(argv)
+    timer = StartupTimer(args.startup_timing)
+    timer.mark("imports")
+
+    # Create, upgrade or seed the database as needed, on the connection the app keeps using
+    db = open_database(DB_PATH, timer)
 
     # Initialize the root window for login
     root = tk.Tk()
-    login_app = LoginApp(root)
+    timer.mark("Tk root window")
+    login_app = LoginApp(root, db, timer)
+    timer.mark("login window")
+    # Printed once the login window is up and Tk goes idle
+    root.after_idle(timer.report)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from datetime import date
+
+from events import DELETE, INSERT, UPDATE
+from live_search import FIRST_RESULTS, LiveSearch
+from picker import Picker
+from presenters import format_marketing_rows, parse_number
+from virtual_tree import VirtualTreeview
+
+# Where a campaign runs
+CHANNELS = ["Property Portal", "Social Media", "Newspaper", "Email", "SMS", "Hoarding", "Referral"]
 
 class MarketingTab:
     def __init__(self, parent, database, app):
@@ -9,7 +19,12 @@ class MarketingTab:
         self.app = app
 
         # Variables for entry fields
-        self.registration_fee_var = tk.StringVar()  # Changed from address_var
+        self.property_id_var = tk.StringVar()
+        self.channel_var = tk.StringVar()
+        self.registration_fee_var = tk.StringVar()
+        self.spend_var = tk.StringVar()
+        self.start_date_var = tk.StringVar()
+        self.end_date_var = tk.StringVar()
         self.property_type_var = tk.StringVar()
         self.bedrooms_var = tk.StringVar()
         self.bathrooms_var = tk.StringVar()
@@ -18,13 +33,15 @@ class MarketingTab:
         self.agent_id_var = tk.StringVar()
         self.property_search_var = tk.StringVar()
 
-        # Create the tab UI
-        self.create_tab()
+        # Add the tab's frame now; its widgets and data are built when it is first shown
+        self.frame = ttk.Frame(self.parent)
+        self.parent.add(self.frame, text="Marketing")
+        self.built = False
 
     def create_tab(self):
-        """Create the marketing tab UI"""
-        marketing_frame = ttk.Frame(self.parent)
-        self.parent.add(marketing_frame, text="Marketing")
+        """Create the marketing tab UI and load its data (called when the tab is first shown)"""
+        self.built = True
+        marketing_frame = self.frame
 
         # Left frame for property entry
         left_frame = ttk.Frame(marketing_frame)
@@ -39,16 +56,49 @@ class MarketingTab:
             left_frame, text="Marketing", font=("Arial", 14, "bold")
         ).grid(row=0, column=0, columnspan=2, pady=10)
 
-        # Changed from Address to Registration Fee
-        ttk.Label(left_frame, text="Registration Fee:").grid(
-            row=1, column=0, sticky=tk.W, pady=5
+        ttk.Label(left_frame, text="Property:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.property_combo = Picker(
+            left_frame, textvariable=self.property_id_var, width=30,
+            search=self.db.search_property_ids, run=self.app.run_in_background,
+            load=self.db.get_property_combo_data, fetch=self.db.get_properties_by_ids,
+        )
+        self.property_combo.grid(row=1, column=1, pady=5, sticky=tk.W)
+        self.property_combo.reload()
+
+        ttk.Label(left_frame, text="Channel:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(
+            left_frame, textvariable=self.channel_var, values=CHANNELS, width=15
+        ).grid(row=2, column=1, pady=5, sticky=tk.W)
+
+        ttk.Label(left_frame, text="Registration Fee (₹):").grid(
+            row=3, column=0, sticky=tk.W, pady=5
         )
         ttk.Entry(left_frame, textvariable=self.registration_fee_var, width=15).grid(
-            row=1, column=1, pady=5, sticky=tk.W
+            row=3, column=1, pady=5, sticky=tk.W
+        )
+
+        ttk.Label(left_frame, text="Spend (₹):").grid(row=4, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(left_frame, textvariable=self.spend_var, width=15).grid(
+            row=4, column=1, pady=5, sticky=tk.W
         )
 
+        ttk.Label(left_frame, text="Start Date (YYYY-MM-DD):").grid(
+            row=5, column=0, sticky=tk.W, pady=5
+        )
+        ttk.Entry(left_frame, textvariable=self.start_date_var, width=15).grid(
+            row=5, column=1, pady=5, sticky=tk.W
+        )
+
+        ttk.Label(left_frame, text="End Date (YYYY-MM-DD):").grid(
+            row=6, column=0, sticky=tk.W, pady=5
+        )
+        ttk.Entry(left_frame, textvariable=self.end_date_var, width=15).grid(
+            row=6, column=1, pady=5, sticky=tk.W
+        )
+
+        # Blank type and address are taken from the linked property
         ttk.Label(left_frame, text="Property Type:").grid(
-            row=2, column=0, sticky=tk.W, pady=5
+            row=7, column=0, sticky=tk.W, pady=5
         )
         property_types = [
             "Apartment",
@@ -63,17 +113,17 @@ class MarketingTab:
             textvariable=self.property_type_var,
             values=property_types,
             width=15,
-        ).grid(row=2, column=1, pady=5, sticky=tk.W)
+        ).grid(row=7, column=1, pady=5, sticky=tk.W)
 
         ttk.Label(left_frame, text="Bedrooms:").grid(
-            row=3, column=0, sticky=tk.W, pady=5
+            row=8, column=0, sticky=tk.W, pady=5
         )
         ttk.Spinbox(
             left_frame, from_=0, to=10, textvariable=self.bedrooms_var, width=5
-        ).grid(row=3, column=1, pady=5, sticky=tk.W)
+        ).grid(row=8, column=1, pady=5, sticky=tk.W)
 
         ttk.Label(left_frame, text="Bathrooms:").grid(
-            row=4, column=0, sticky=tk.W, pady=5
+            row=9, column=0, sticky=tk.W, pady=5
         )
         ttk.Spinbox(
             left_frame,
@@ -82,46 +132,48 @@ class MarketingTab:
             increment=0.5,
             textvariable=self.bathrooms_var,
             width=5,
-        ).grid(row=4, column=1, pady=5, sticky=tk.W)
+        ).grid(row=9, column=1, pady=5, sticky=tk.W)
 
-        ttk.Label(left_frame, text="Price ($):").grid(
-            row=5, column=0, sticky=tk.W, pady=5
+        ttk.Label(left_frame, text="Price (₹):").grid(
+            row=10, column=0, sticky=tk.W, pady=5
         )
         ttk.Entry(left_frame, textvariable=self.price_var, width=15).grid(
-            row=5, column=1, pady=5, sticky=tk.W
+            row=10, column=1, pady=5, sticky=tk.W
         )
 
-        ttk.Label(left_frame, text="Status:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        ttk.Label(left_frame, text="Status:").grid(row=11, column=0, sticky=tk.W, pady=5)
         status_types = ["Available", "Pending", "Sold", "Off Market"]
         ttk.Combobox(
             left_frame, textvariable=self.status_var, values=status_types, width=15
-        ).grid(row=6, column=1, pady=5, sticky=tk.W)
+        ).grid(row=11, column=1, pady=5, sticky=tk.W)
 
-        ttk.Label(left_frame, text="Agent:").grid(row=7, column=0, sticky=tk.W, pady=5)
-        self.agent_combo = ttk.Combobox(
-            left_frame, textvariable=self.agent_id_var, width=25
+        ttk.Label(left_frame, text="Agent:").grid(row=12, column=0, sticky=tk.W, pady=5)
+        self.agent_combo = Picker(
+            left_frame, textvariable=self.agent_id_var, width=25,
+            search=self.db.search_agent_ids, run=self.app.run_in_background,
+            load=self.db.get_agent_combo_data, fetch=self.db.get_agents_by_ids,
         )
-        self.agent_combo.grid(row=7, column=1, pady=5, sticky=tk.W)
-        self.update_agent_combo()
+        self.agent_combo.grid(row=12, column=1, pady=5, sticky=tk.W)
+        self.agent_combo.reload()
 
         ttk.Label(left_frame, text="Description:").grid(
-            row=8, column=0, sticky=tk.W, pady=5
+            row=13, column=0, sticky=tk.W, pady=5
         )
         self.description_text = tk.Text(left_frame, width=40, height=5)
-        self.description_text.grid(row=8, column=1, pady=5, sticky=tk.W)
+        self.description_text.grid(row=13, column=1, pady=5, sticky=tk.W)
 
         # Buttons
         button_frame = ttk.Frame(left_frame)
-        button_frame.grid(row=9, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=14, column=0, columnspan=2, pady=10)
 
-        ttk.Button(button_frame, text="Add Property", command=self.add_property).pack(
+        ttk.Button(button_frame, text="Add Campaign", command=self.add_property).pack(
             side=tk.LEFT, padx=5
         )
         ttk.Button(
-            button_frame, text="Update Property", command=self.update_property
+            button_frame, text="Update Campaign", command=self.update_property
         ).pack(side=tk.LEFT, padx=5)
         ttk.Button(
-            button_frame, text="Delete Property", command=self.delete_property
+            button_frame, text="Delete Campaign", command=self.delete_property
         ).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Clear Fields", command=self.clear_fields).pack(
             side=tk.LEFT, padx=5
@@ -137,39 +189,49 @@ class MarketingTab:
         search_frame.pack(fill=tk.X, pady=5)
 
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
-        ttk.Entry(search_frame, textvariable=self.property_search_var, width=20).pack(
+        search_entry = ttk.Entry(search_frame, textvariable=self.property_search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        # Search as the user types, once typing pauses
+        self.property_search = LiveSearch(search_entry, self.property_search_var, self.search_properties)
+        search_entry.bind("<Return>", self.property_search.run)
+        ttk.Button(search_frame, text="Search", command=self.property_search.run).pack(
             side=tk.LEFT, padx=5
         )
-        ttk.Button(search_frame, text="Search", command=self.search_properties).pack(
+        ttk.Button(search_frame, text="Show All", command=self.property_search.clear).pack(
             side=tk.LEFT, padx=5
         )
-        ttk.Button(search_frame, text="Show All", command=self.load_properties).pack(
+        ttk.Button(search_frame, text="Export", command=self.export_properties).pack(
             side=tk.LEFT, padx=5
         )
 
         # Treeview for property listing
-        columns = ("id", "registration_fee", "type", "beds", "baths", "price", "status", "agent")  # Changed from address to registration_fee
-        self.property_tree = ttk.Treeview(
-            right_frame, columns=columns, show="headings", height=15
+        columns = ("id", "property", "channel", "registration_fee", "spend", "start", "end", "status", "agent")
+        # Only the rows on screen exist as Tk items; the rest are fetched as the list scrolls
+        self.property_tree = VirtualTreeview(
+            right_frame, format_marketing_rows, self.app.executor, self.app.show_error,
+            changes=lambda after_seq: self.db.get_changes("marketing", after_seq),
+            columns=columns, show="headings", height=15,
         )
 
         # Define headings
         self.property_tree.heading("id", text="ID")
-        self.property_tree.heading("registration_fee", text="Registration Fee")  # Changed from address to registration_fee
-        self.property_tree.heading("type", text="Type")
-        self.property_tree.heading("beds", text="Beds")
-        self.property_tree.heading("baths", text="Baths")
-        self.property_tree.heading("price", text="Price ($)")
+        self.property_tree.heading("property", text="Property")
+        self.property_tree.heading("channel", text="Channel")
+        self.property_tree.heading("registration_fee", text="Registration Fee")
+        self.property_tree.heading("spend", text="Spend")
+        self.property_tree.heading("start", text="Start")
+        self.property_tree.heading("end", text="End")
         self.property_tree.heading("status", text="Status")
         self.property_tree.heading("agent", text="Agent")
 
         # Define columns
         self.property_tree.column("id", width=40)
-        self.property_tree.column("registration_fee", width=150)  # Changed from address to registration_fee
-        self.property_tree.column("type", width=80)
-        self.property_tree.column("beds", width=50)
-        self.property_tree.column("baths", width=50)
-        self.property_tree.column("price", width=100)
+        self.property_tree.column("property", width=200)
+        self.property_tree.column("channel", width=100)
+        self.property_tree.column("registration_fee", width=100)
+        self.property_tree.column("spend", width=100)
+        self.property_tree.column("start", width=80)
+        self.property_tree.column("end", width=80)
         self.property_tree.column("status", width=80)
         self.property_tree.column("agent", width=150)
 
@@ -186,245 +248,161 @@ class MarketingTab:
         # Bind select event
         self.property_tree.bind("<<TreeviewSelect>>", self.property_selected)
 
+        # Follow changes made on any tab; applied once per burst, while the tab is shown
+        self.app.events.subscribe(("marketing", "properties", "agents"), self.records_changed, marketing_frame)
+
         # Load data
         self.load_properties()
 
-    def update_agent_combo(self):
-        """Update the agent combobox with current data"""
-        self.agent_combo.set("")
-        agents = self.db.get_agent_combo_data()
-        agent_list = [f"{agent[0]} - {agent[1]}" for agent in agents]
-        self.agent_combo["values"] = agent_list
-
-    def get_id_from_combobox(self, combo_value):
-        """Extract ID from combobox value (format: "ID - Value")"""
-        if not combo_value:
-            return None
-
-        try:
-            return int(combo_value.split(" - ")[0])
-        except (ValueError, IndexError):
-            return None
-
-    def add_property(self):
-        """Add a new property to the database"""
-        registration_fee = self.registration_fee_var.get()  # Changed from address
+    def campaign_fields(self):
+        """Validated form values as add_marketing/update_marketing arguments, or None after showing an error"""
+        property_id = self.property_combo.get_id()
+        channel = self.channel_var.get()
+        registration_fee = self.registration_fee_var.get()
+        spend = self.spend_var.get()
+        start_date = self.start_date_var.get().strip()
+        end_date = self.end_date_var.get().strip()
         property_type = self.property_type_var.get()
         bedrooms = self.bedrooms_var.get()
         bathrooms = self.bathrooms_var.get()
         price = self.price_var.get()
         status = self.status_var.get()
-        agent_id = self.get_id_from_combobox(self.agent_id_var.get())
+        agent_id = self.agent_combo.get_id()
         description = self.description_text.get("1.0", tk.END).strip()
 
-        if not registration_fee or not property_type:  # Changed from address to registration_fee
-            messagebox.showerror(
-                "Error", "Registration Fee and Property Type are required fields"  # Changed from Address to Registration Fee
-            )
-            return
+        if property_id is None or not channel:
+            messagebox.showerror("Error", "Property and Channel are required fields")
+            return None
 
         try:
-            bedrooms = int(bedrooms) if bedrooms else 0
-            bathrooms = float(bathrooms) if bathrooms else 0
-            price = float(price) if price else 0
-            registration_fee = float(registration_fee) if registration_fee else 0  # Ensure registration_fee is a float
-
-            self.db.add_marketing(
-                registration_fee,  # Changed from address to registration_fee
-                property_type,
-                bedrooms,
-                bathrooms,
-                price,
-                status,
-                agent_id,
-                description,
-            )
+            bedrooms = int(bedrooms) if bedrooms else None
+            bathrooms = parse_number(bathrooms, "Bathrooms") if bathrooms else None
+            price = parse_number(price, "Price") if price else None
+            registration_fee = parse_number(registration_fee, "Registration fee") if registration_fee else None
+            spend = parse_number(spend, "Spend") if spend else None
+            start_date = date.fromisoformat(start_date).isoformat() if start_date else None
+            end_date = date.fromisoformat(end_date).isoformat() if end_date else None
+        except ValueError as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            return None
+
+        if start_date and end_date and end_date < start_date:
+            messagebox.showerror("Error", "End Date cannot be before Start Date")
+            return None
+
+        # The address is always taken from the linked property
+        return (
+            ("", property_type, bedrooms, bathrooms, price, status, agent_id, description),
+            dict(
+                property_id=property_id, channel=channel, registration_fee=registration_fee,
+                spend=spend, start_date=start_date, end_date=end_date,
+            ),
+        )
+
+    def add_property(self):
+        """Add a new marketing campaign to the database"""
+        fields = self.campaign_fields()
+        if fields is None:
+            return
+        args, campaign = fields
+
+        def property_added(marketing_id):
+            self.app.events.publish("marketing", marketing_id, INSERT)
             self.clear_fields()
-            self.load_properties()
-            self.app.inquiry_tab.update_property_combo()
 
-            messagebox.showinfo("Success", "Property added successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            messagebox.showinfo("Success", "Campaign added successfully")
+
+        self.app.run_in_background(self.db.add_marketing, *args, on_success=property_added, **campaign)
 
     def update_property(self):
-        """Update an existing property in the database"""
+        """Update the selected marketing campaign in the database"""
         selected_item = self.property_tree.selection()
         if not selected_item:
-            messagebox.showerror("Error", "Please select a property to update")
+            messagebox.showerror("Error", "Please select a campaign to update")
             return
 
-        property_id = self.property_tree.item(selected_item, "values")[0]
-        registration_fee = self.registration_fee_var.get()  # Changed from address
-        property_type = self.property_type_var.get()
-        bedrooms = self.bedrooms_var.get()
-        bathrooms = self.bathrooms_var.get()
-        price = self.price_var.get()
-        status = self.status_var.get()
-        agent_id = self.get_id_from_combobox(self.agent_id_var.get())
-        description = self.description_text.get("1.0", tk.END).strip()
-
-        if not registration_fee or not property_type:  # Changed from address to registration_fee
-            messagebox.showerror(
-                "Error", "Registration Fee and Property Type are required fields"  # Changed from Address to Registration Fee
-            )
+        marketing_id = self.property_tree.item(selected_item, "values")[0]
+        fields = self.campaign_fields()
+        if fields is None:
             return
+        args, campaign = fields
 
-        try:
-            bedrooms = int(bedrooms) if bedrooms else 0
-            bathrooms = float(bathrooms) if bathrooms else 0
-            price = float(price) if price else 0
-            registration_fee = float(registration_fee) if registration_fee else 0  # Ensure registration_fee is a float
+        def property_updated(_):
+            self.app.events.publish("marketing", int(marketing_id), UPDATE)
 
-            self.db.update_marketing(
-                property_id,
-                registration_fee,  # Changed from address to registration_fee
-                property_type,
-                bedrooms,
-                bathrooms,
-                price,
-                status,
-                agent_id,
-                description,
-            )
-            self.load_properties()
-            self.app.inquiry_tab.update_property_combo()
+            messagebox.showinfo("Success", "Campaign updated successfully")
 
-            messagebox.showinfo("Success", "Property updated successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+        self.app.run_in_background(
+            self.db.update_marketing, marketing_id, *args, on_success=property_updated, **campaign
+        )
 
     def delete_property(self):
-        """Delete a property and its associated inquiries from the database"""
+        """Delete the selected marketing campaign from the database"""
         selected_item = self.property_tree.selection()
         if not selected_item:
-            messagebox.showerror("Error", "Please select a property to delete")
+            messagebox.showerror("Error", "Please select a campaign to delete")
             return
 
         property_id = self.property_tree.item(selected_item, "values")[0]
 
         confirm = messagebox.askyesno(
             "Confirm Delete",
-            "Are you sure you want to delete this property? This action cannot be undone.",
+            "Are you sure you want to delete this campaign? This action cannot be undone.",
         )
         if not confirm:
             return
 
-        try:
-            self.db.delete_marketing(property_id)
+        def property_deleted(_):
+            self.app.events.publish("marketing", int(property_id), DELETE)
             self.clear_fields()
-            self.load_properties()
-            self.app.inquiry_tab.load_inquiries()
-            self.app.inquiry_tab.update_property_combo()
 
-            messagebox.showinfo("Success", "Property deleted successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            messagebox.showinfo("Success", "Campaign deleted successfully")
 
-    def load_properties(self):
-        """Load all properties into the treeview"""
-        # Clear existing data
-        for i in self.property_tree.get_children():
-            self.property_tree.delete(i)
-
-        # Load data from database
-        properties = self.db.get_marketing_entries()
-
-        for row in properties:
-            try:
-                # Ensure registration_fee is a float
-                registration_fee = float(row[1]) if row[1] else 0.0
-            except (ValueError, TypeError):
-                registration_fee = 0.0  # Default value if conversion fails
-
-            # Format registration_fee as currency
-            formatted_fee = f"₹{registration_fee:.2f}"
-
-            # Format price as INR currency
-            price_in_lakhs = row[5] / 100000
-            if price_in_lakhs >= 100:
-                # Display in crores if >= 1 crore
-                price_in_crores = price_in_lakhs / 100
-                price_formatted = f"₹{price_in_crores:.2f} Cr"
-            else:
-                # Display in lakhs
-                price_formatted = f"₹{price_in_lakhs:.2f} L"
-
-            # Format bedrooms and bathrooms
-            beds = int(row[3]) if row[3] else 0
-            baths = float(row[4]) if row[4] else 0
-            baths_formatted = int(baths) if baths.is_integer() else baths
-
-            # Add to treeview with formatted values
-            self.property_tree.insert(
-                "",
-                "end",
-                values=(
-                    row[0],  # ID
-                    formatted_fee,  # Registration Fee
-                    row[2],  # Type
-                    beds,  # Beds
-                    baths_formatted,  # Baths
-                    price_formatted,  # Price
-                    row[6],  # Status
-                    row[7] or "None",  # Agent
-                ),
-            )
+        self.app.run_in_background(
+            self.db.delete_marketing, property_id, on_success=property_deleted
+        )
 
-    def search_properties(self):
-        """Search properties by registration fee or property type"""
-        search_term = self.property_search_var.get()
+    def load_properties(self):
+        """Load all marketing campaigns into the treeview"""
+        # Load the ids in listing order; rows are fetched as they scroll into view
+        self.property_tree.load(self.db.get_marketing_ids, self.db.get_marketing_entries_by_ids)
+
+    def refresh_properties(self):
+        """Apply marketing changes to the treeview without reloading it"""
+        self.property_tree.refresh()
+
+    def records_changed(self, events):
+        """Bring the tab up to date after campaigns, properties or agents changed (on any tab)"""
+        entities = {event.entity for event in events}
+        if "agents" in entities:
+            self.agent_combo.records_changed([event for event in events if event.entity == "agents"])
+        if "properties" in entities:
+            self.property_combo.records_changed([event for event in events if event.entity == "properties"])
+        if entities & {"agents", "properties"}:
+            # Campaigns show the property's address and the agent's name
+            self.property_tree.invalidate()
+        self.refresh_properties()
+
+    def search_properties(self, search_term, cancel):
+        """Search marketing campaigns by address, type or description
+
+        Called by the live search; cancel is set once the term changes again.
+        """
         if not search_term:
             self.load_properties()
             return
 
-        # Clear existing data
-        for i in self.property_tree.get_children():
-            self.property_tree.delete(i)
-
-        # Search properties
-        properties = self.db.search_marketing_entries(search_term)
-
-        for row in properties:
-            try:
-                # Ensure registration_fee is a float
-                registration_fee = float(row[1]) if row[1] else 0.0
-            except (ValueError, TypeError):
-                registration_fee = 0.0  # Default value if conversion fails
-
-            # Format registration_fee as currency
-            formatted_fee = f"₹{registration_fee:.2f}"
-
-            # Format price as INR currency
-            price_in_lakhs = row[5] / 100000
-            if price_in_lakhs >= 100:
-                # Display in crores if >= 1 crore
-                price_in_crores = price_in_lakhs / 100
-                price_formatted = f"₹{price_in_crores:.2f} Cr"
-            else:
-                # Display in lakhs
-                price_formatted = f"₹{price_in_lakhs:.2f} L"
-
-            # Format bedrooms and bathrooms
-            beds = int(row[3]) if row[3] else 0
-            baths = float(row[4]) if row[4] else 0
-            baths_formatted = int(baths) if baths.is_integer() else baths
-
-            # Add to treeview with formatted values
-            self.property_tree.insert(
-                "",
-                "end",
-                values=(
-                    row[0],  # ID
-                    formatted_fee,  # Registration Fee
-                    row[2],  # Type
-                    beds,  # Beds
-                    baths_formatted,  # Baths
-                    price_formatted,  # Price
-                    row[6],  # Status
-                    row[7] or "None",  # Agent
-                ),
-            )
+        # Show the first matches straight away, then the rest of the ids
+        self.property_tree.load(
+            lambda: self.db.search_marketing_ids(search_term, cancel=cancel),
+            self.db.get_marketing_entries_by_ids,
+            incremental=False,
+            first_ids=lambda: self.db.search_marketing_ids(search_term, FIRST_RESULTS, cancel),
+        )
+
+    def export_properties(self):
+        """Export the marketing entries matching the current search to a file"""
+        self.app.export_table("marketing", search=self.property_search_var.get())
 
     def property_selected(self, event):
         """Handle property selection in the treeview"""
@@ -434,36 +412,50 @@ class MarketingTab:
             property_id = self.property_tree.item(selected_item, "values")[0]
 
             # Get property details from database
-            property_data = self.db.get_marketing(property_id)
-            if property_data:
-                # Clear current fields
-                self.clear_fields()
-
-                # Populate fields with selected property data
-                self.registration_fee_var.set(property_data[1])  # Changed from address to registration_fee
-                self.property_type_var.set(property_data[2])
-                self.bedrooms_var.set(property_data[3])
-                self.bathrooms_var.set(property_data[4])
-                self.price_var.set(property_data[5])
-                self.status_var.set(property_data[7])
-
-                # Set agent if exists
-                if property_data[8]:
-                    # Find agent in combobox values
-                    agent_values = self.agent_combo["values"]
-                    for agent_value in agent_values:
-                        if agent_value.startswith(f"{property_data[8]} - "):
-                            self.agent_id_var.set(agent_value)
-                            break
-
-                # Set description
-                self.description_text.delete("1.0", tk.END)
-                if property_data[9]:
-                    self.description_text.insert("1.0", property_data[9])
+            self.app.run_in_background(
+                self.db.get_marketing,
+                property_id,
+                key=(self, "selected"),
+                on_success=self.show_property,
+            )
+
+    def show_property(self, property_data):
+        """Populate the input fields with a marketing row"""
+        if property_data:
+            # Clear current fields
+            self.clear_fields()
+
+            # Populate fields with selected campaign data
+            if property_data[10]:
+                self.property_combo.set_id(property_data[10])
+            self.channel_var.set(property_data[11] or "")
+            self.registration_fee_var.set("" if property_data[12] is None else property_data[12])
+            self.spend_var.set("" if property_data[13] is None else property_data[13])
+            self.start_date_var.set(property_data[14] or "")
+            self.end_date_var.set(property_data[15] or "")
+            self.property_type_var.set(property_data[2] or "")
+            self.bedrooms_var.set("" if property_data[3] is None else property_data[3])
+            self.bathrooms_var.set("" if property_data[4] is None else property_data[4])
+            self.price_var.set("" if property_data[5] is None else property_data[5])
+            self.status_var.set(property_data[7] or "")
+
+            # Set agent if exists
+            if property_data[8]:
+                self.agent_combo.set_id(property_data[8])
+
+            # Set description
+            self.description_text.delete("1.0", tk.END)
+            if property_data[9]:
+                self.description_text.insert("1.0", property_data[9])
 
     def clear_fields(self):
         """Clear all input fields"""
-        self.registration_fee_var.set("")  # Changed from address to registration_fee
+        self.property_id_var.set("")
+        self.channel_var.set("")
+        self.registration_fee_var.set("")
+        self.spend_var.set("")
+        self.start_date_var.set("")
+        self.end_date_var.set("")
         self.property_type_var.set("")
         self.bedrooms_var.set("")
         self.bathrooms_var.set("")
@@ -0,0 +1,750 @@
+import re
+import sqlite3
+from datetime import datetime
+
+
+def _create_secondary_indexes(cursor):
+    """Index the foreign keys, status filters and date orderings used by the tabs"""
+    # Joins and cascades on agent / property references
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_properties_agent_id ON properties (agent_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inquiries_property_id ON inquiries (property_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inquiries_agent_id ON inquiries (agent_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_marketing_agent_id ON marketing (agent_id)")
+
+    # Status filters and date orderings. Listing status filters match too many
+    # listings for an index to pay off; they read the table newest first, and
+    # nothing orders listings by date.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inquiries_inquiry_date ON inquiries (inquiry_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inquiries_status_date ON inquiries (status, inquiry_date)")
+
+    # Agent directory and combobox ordering
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agents_name ON agents (name)")
+
+
+# Columns indexed for full-text search, per base table
+FTS_COLUMNS = {
+    "properties": ("address", "property_type", "description"),
+    "agents": ("name", "email", "license_number"),
+    "inquiries": ("client_name", "contact_info", "notes"),
+    "marketing": ("address", "marketing_type", "description"),
+}
+
+
+def fts5_available(cursor):
+    """Return True if this SQLite build ships the FTS5 extension"""
+    options = [row[0] for row in cursor.execute("PRAGMA compile_options")]
+    return "ENABLE_FTS5" in options
+
+
+def _create_fts_index(cursor, table, columns):
+    """Create an external-content FTS5 table over `table` and the triggers that sync it"""
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+
+    # prefix='2 3' keeps short type-ahead prefixes on an index instead of a scan
+    cursor.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id', tokenize='unicode61', prefix='2 3'
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        """
+    )
+    # Index the rows that already exist
+    cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _create_full_text_indexes(cursor):
+    """Create FTS5 indexes for every searchable table (skipped without FTS5)
+
+    Marketing campaigns are indexed by migration 4, which links each one to
+    the listing whose address it is searched by.
+    """
+    if not fts5_available(cursor):
+        return
+    for table, columns in FTS_COLUMNS.items():
+        if table != "marketing":
+            _create_fts_index(cursor, table, columns)
+
+
+# A campaign's indexed values: its linked listing's current address, else its own
+MARKETING_FTS_VALUES = (
+    "COALESCE((SELECT address FROM properties WHERE id = {row}.property_id), {row}.address), "
+    "{row}.marketing_type, {row}.description"
+)
+
+
+def fts_insert_sql(table):
+    """Insert into `table`'s full-text index the rows with id > ?"""
+    columns = ", ".join(FTS_COLUMNS[table])
+    values = MARKETING_FTS_VALUES.format(row=table) if table == "marketing" else columns
+    return f"INSERT INTO {table}_fts (rowid, {columns}) SELECT id, {values} FROM {table} WHERE id > ?"
+
+
+def _create_marketing_fts_index(cursor):
+    """Index campaigns by their listing's address, marketing type and description
+
+    The address shown for a linked campaign is its listing's, and the
+    listing can be edited later, so the index keeps its own copy of the
+    values (it isn't an external-content index like the others) and a
+    trigger on properties reindexes the campaigns of a listing whose address
+    changes.
+    """
+    columns = ", ".join(FTS_COLUMNS["marketing"])
+    cursor.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS marketing_fts USING fts5(
+            {columns}, tokenize='unicode61', prefix='2 3'
+        )
+        """
+    )
+    insert = f"INSERT INTO marketing_fts (rowid, {columns}) VALUES (new.id, {MARKETING_FTS_VALUES.format(row='new')});"
+    delete = "DELETE FROM marketing_fts WHERE rowid = old.id;"
+    for suffix, event, body in (
+        ("ai", "INSERT", insert),
+        ("ad", "DELETE", delete),
+        ("au", f"UPDATE OF {columns}, property_id", delete + insert),
+    ):
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS marketing_fts_{suffix} AFTER {event} ON marketing BEGIN
+                {body}
+            END
+            """
+        )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS marketing_fts_property_au AFTER UPDATE OF address ON properties
+        WHEN old.address IS NOT new.address BEGIN
+            DELETE FROM marketing_fts WHERE rowid IN (SELECT id FROM marketing WHERE property_id = new.id);
+            INSERT INTO marketing_fts (rowid, {columns})
+            SELECT id, new.address, marketing_type, description FROM marketing WHERE property_id = new.id;
+        END
+        """
+    )
+    # Index the campaigns that already exist
+    cursor.execute(fts_insert_sql("marketing"), (0,))
+
+
+# Tables whose row changes are recorded in change_log for incremental refreshes
+TRACKED_TABLES = ("properties", "agents", "inquiries", "marketing")
+
+
+def _create_change_log(cursor):
+    """Create the change_log table and the triggers that record every row change"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            kind TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_table_seq ON change_log (table_name, seq)")
+
+    for table in TRACKED_TABLES:
+        for suffix, event, row, kind in (
+            ("ai", "INSERT", "new", "insert"),
+            ("au", "UPDATE", "new", "update"),
+            ("ad", "DELETE", "old", "delete"),
+        ):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_changes_{suffix} AFTER {event} ON {table} BEGIN
+                    INSERT INTO change_log (table_name, row_id, kind) VALUES ('{table}', {row}.id, '{kind}');
+                END
+                """
+            )
+
+
+# Campaign columns added to the marketing table, with their types
+MARKETING_CAMPAIGN_COLUMNS = (
+    ("property_id", "INTEGER"),
+    ("channel", "TEXT"),
+    ("registration_fee", "REAL"),
+    ("spend", "REAL"),
+    ("start_date", "TEXT"),
+    ("end_date", "TEXT"),
+)
+
+
+def _add_marketing_campaigns(cursor):
+    """Give marketing entries campaign columns and move fees out of the address column
+
+    The marketing form used to save the registration fee in `address`; such
+    purely numeric addresses move to registration_fee. Entries whose address
+    is a listing's address are linked to that listing, and every existing
+    entry starts on its listing date.
+    """
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(marketing)")}
+    for column, column_type in MARKETING_CAMPAIGN_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE marketing ADD COLUMN {column} {column_type}")
+
+    cursor.execute(
+        """
+        UPDATE marketing SET registration_fee = CAST(address AS REAL), address = ''
+        WHERE address GLOB '*[0-9]*' AND address NOT GLOB '*[^0-9.]*'
+        """
+    )
+
+    # One pass over properties for all addresses (properties.address has no index)
+    cursor.execute("CREATE TEMP TABLE marketing_links (address TEXT PRIMARY KEY, property_id INTEGER)")
+    cursor.execute(
+        """
+        INSERT INTO temp.marketing_links (address, property_id)
+        SELECT address, MIN(id) FROM properties
+        WHERE address IN (SELECT address FROM marketing WHERE property_id IS NULL AND address <> '')
+        GROUP BY address
+        """
+    )
+    cursor.execute(
+        """
+        UPDATE marketing SET property_id = (
+            SELECT property_id FROM temp.marketing_links l WHERE l.address = marketing.address
+        )
+        WHERE property_id IS NULL AND address <> ''
+        """
+    )
+    cursor.execute("DROP TABLE temp.marketing_links")
+
+    cursor.execute("UPDATE marketing SET start_date = listing_date WHERE start_date IS NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_marketing_property_id ON marketing (property_id)")
+
+    if fts5_available(cursor):
+        _create_marketing_fts_index(cursor)
+
+
+# Aggregates kept exact by triggers: summary table -> (base table, grouping
+# keys, ((summary column, per-row value), ...)). Values are SQL over the
+# base row, written with {row}; the first is always the row count, and a
+# group whose count drops to 0 is removed.
+SUMMARY_TABLES = {
+    "listing_summary": (
+        "properties",
+        ("status", "property_type"),
+        (("listings", "1"), ("price_total", "COALESCE({row}.price, 0)")),
+    ),
+    "agent_listing_summary": (
+        "properties",
+        ("agent_id",),
+        (
+            ("listings", "1"),
+            ("available", "{row}.status IS 'Available'"),
+            ("price_total", "COALESCE({row}.price, 0)"),
+        ),
+    ),
+    "inquiry_summary": ("inquiries", ("status",), (("inquiries", "1"),)),
+    "agent_inquiry_summary": ("inquiries", ("agent_id", "status"), (("inquiries", "1"),)),
+    "property_facets": (
+        "properties",
+        ("status", "property_type", "bedrooms", "bathrooms", "price_band"),
+        (("listings", "1"),),
+    ),
+    "agent_facets": (
+        "properties",
+        ("agent_id", "status", "property_type", "bedrooms", "bathrooms", "price_band"),
+        (("listings", "1"),),
+    ),
+    "location_facets": (
+        "properties",
+        ("city", "locality", "status", "property_type", "bedrooms", "bathrooms", "price_band"),
+        (("listings", "1"),),
+    ),
+    "city_summary": (
+        "properties",
+        ("city", "locality"),
+        (
+            ("listings", "1"),
+            ("available", "{row}.status IS 'Available'"),
+            ("price_total", "COALESCE({row}.price, 0)"),
+        ),
+    ),
+}
+
+# Lower edges of the price bands listings are counted in, in rupees
+PRICE_BANDS = (0, 2500000, 5000000, 7500000, 10000000, 15000000, 20000000, 30000000, 50000000, 100000000)
+
+
+def price_band_sql(row):
+    """SQL for the lower edge of the price band of `row`'s price (-1 without a price)"""
+    bands = " ".join(f"WHEN {row}.price >= {edge} THEN {edge}" for edge in reversed(PRICE_BANDS[1:]))
+    return f"CASE WHEN {row}.price IS NULL THEN -1 {bands} ELSE 0 END"
+
+
+# Grouping keys other than plain text columns: key -> (column type, value).
+# Upserts can't match NULL keys, so an unassigned agent is grouped under 0,
+# unknown rooms and prices under -1, and a missing text value under ''.
+SUMMARY_KEYS = {
+    "agent_id": ("INTEGER", "COALESCE({row}.agent_id, 0)"),
+    "bedrooms": ("INTEGER", "COALESCE({row}.bedrooms, -1)"),
+    "bathrooms": ("REAL", "COALESCE({row}.bathrooms, -1)"),
+    "price_band": ("INTEGER", price_band_sql("{row}")),
+}
+
+
+def summaries_of(table):
+    """Names of the summary tables kept for base table `table`"""
+    return [summary for summary, (base, _, _) in SUMMARY_TABLES.items() if base == table]
+
+
+def _summary_key(row, key):
+    """Grouping value of `row` ("new", "old" or the table name) for a summary key"""
+    _, value = SUMMARY_KEYS.get(key, ("TEXT", f"COALESCE({{row}}.{key}, '')"))
+    return value.format(row=row)
+
+
+def summary_insert_sql(summary):
+    """Upsert adding the base table rows with id > ? to `summary`, one row per group"""
+    return _summary_upsert_sql(summary, "id > ?")
+
+
+def summary_range_sql(summary, sign):
+    """Upsert adding (sign 1) or taking away (sign -1) the base table rows with ? < id <= ?
+
+    Taking rows away can leave groups counting 0; delete those afterwards.
+    """
+    return _summary_upsert_sql(summary, "id > ? AND id <= ?", sign)
+
+
+def _summary_group_columns(table):
+    """(grouping keys, per-row values) of every summary of base table `table`, without repeats"""
+    summaries = [SUMMARY_TABLES[summary] for summary in summaries_of(table)]
+    keys = list(dict.fromkeys(key for _, summary_keys, _ in summaries for key in summary_keys))
+    values = list(dict.fromkeys(value for _, _, summary_values in summaries for _, value in summary_values))
+    return keys, values
+
+
+def summary_groups_sql(table):
+    """Create temp.summary_groups: the `table` rows with id > ? added up per group of all its summaries' keys
+
+    Each summary is then added up from these groups (see
+    summary_groups_insert_sql), so a bulk insert reads its new rows once
+    rather than once per summary.
+    """
+    keys, values = _summary_group_columns(table)
+    groups = ", ".join(f"{_summary_key(table, key)} AS {key}" for key in keys)
+    sums = ", ".join(f"SUM({value.format(row=table)}) AS value_{position}" for position, value in enumerate(values))
+    positions = ", ".join(str(position) for position in range(1, len(keys) + 1))
+    return f"""
+        CREATE TEMP TABLE summary_groups AS
+        SELECT {groups}, {sums} FROM {table} WHERE id > ? GROUP BY {positions}
+        """
+
+
+def summary_groups_insert_sql(summary):
+    """Upsert adding the rows added up in temp.summary_groups (see summary_groups_sql) to `summary`"""
+    table, keys, values = SUMMARY_TABLES[summary]
+    _, group_values = _summary_group_columns(table)
+    columns = ", ".join(keys)
+    measures = ", ".join(column for column, _ in values)
+    sums = ", ".join(f"SUM(value_{group_values.index(value)})" for _, value in values)
+    positions = ", ".join(str(position) for position in range(1, len(keys) + 1))
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column, _ in values)
+    return f"""
+        INSERT INTO {summary} ({columns}, {measures})
+        SELECT {columns}, {sums} FROM temp.summary_groups GROUP BY {positions}
+        ON CONFLICT ({columns}) DO UPDATE SET {updates}
+        """
+
+
+def _summary_upsert_sql(summary, where, sign=1):
+    """Upsert adding `sign` times the base table rows matching `where` to `summary`, one row per group"""
+    table, keys, values = SUMMARY_TABLES[summary]
+    columns = ", ".join(keys)
+    measures = ", ".join(column for column, _ in values)
+    groups = ", ".join(_summary_key(table, key) for key in keys)
+    sums = ", ".join(f"{'-' if sign < 0 else ''}SUM({value.format(row=table)})" for _, value in values)
+    positions = ", ".join(str(position) for position in range(1, len(keys) + 1))
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column, _ in values)
+    return f"""
+        INSERT INTO {summary} ({columns}, {measures})
+        SELECT {groups}, {sums} FROM {table} WHERE {where} GROUP BY {positions}
+        ON CONFLICT ({columns}) DO UPDATE SET {updates}
+        """
+
+
+def _summary_statements(summary, row, sign):
+    """Trigger statements adding (sign 1) or removing (sign -1) `row` from `summary`"""
+    table, keys, values = SUMMARY_TABLES[summary]
+    if sign > 0:
+        columns = ", ".join(keys)
+        measures = ", ".join(column for column, _ in values)
+        groups = ", ".join(_summary_key(row, key) for key in keys)
+        row_values = ", ".join(value.format(row=row) for _, value in values)
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column, _ in values)
+        return f"""
+            INSERT INTO {summary} ({columns}, {measures}) VALUES ({groups}, {row_values})
+            ON CONFLICT ({columns}) DO UPDATE SET {updates};
+            """
+
+    match = " AND ".join(f"{key} = {_summary_key(row, key)}" for key in keys)
+    updates = ", ".join(f"{column} = {column} - ({value.format(row=row)})" for column, value in values)
+    return f"""
+        UPDATE {summary} SET {updates} WHERE {match};
+        DELETE FROM {summary} WHERE {match} AND {values[0][0]} = 0;
+        """
+
+
+def _create_summary_table(cursor, summary):
+    """Create one summary table and the triggers that keep it exact, and fill it"""
+    table, keys, values = SUMMARY_TABLES[summary]
+    key_columns = ", ".join(f"{key} {SUMMARY_KEYS.get(key, ('TEXT',))[0]} NOT NULL" for key in keys)
+    measure_columns = ", ".join(
+        f"{column} {'REAL' if column.endswith('_total') else 'INTEGER'} NOT NULL DEFAULT 0"
+        for column, _ in values
+    )
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {summary} (
+            {key_columns},
+            {measure_columns},
+            PRIMARY KEY ({", ".join(keys)})
+        ) WITHOUT ROWID
+        """
+    )
+
+    # Only changes to the columns the keys and values read matter
+    sql = " ".join([_summary_key("{row}", key) for key in keys] + [value for _, value in values])
+    watched = ", ".join(dict.fromkeys(re.findall(r"\{row\}\.(\w+)", sql)))
+    for suffix, event, body in (
+        ("ai", "INSERT", _summary_statements(summary, "new", 1)),
+        ("ad", "DELETE", _summary_statements(summary, "old", -1)),
+        (
+            "au",
+            f"UPDATE OF {watched}",
+            _summary_statements(summary, "old", -1) + _summary_statements(summary, "new", 1),
+        ),
+    ):
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {summary}_{suffix} AFTER {event} ON {table} BEGIN
+                {body}
+            END
+            """
+        )
+
+    # Count the rows that already exist
+    cursor.execute(f"DELETE FROM {summary}")
+    cursor.execute(summary_insert_sql(summary), (0,))
+
+
+def _create_summary_tables(cursor):
+    """Create the dashboard's summary tables"""
+    for summary in ("listing_summary", "agent_listing_summary", "inquiry_summary", "agent_inquiry_summary"):
+        _create_summary_table(cursor, summary)
+
+    # The dashboard lists the agents with the most listings first
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_agent_listing_summary_listings ON agent_listing_summary (listings)"
+    )
+
+
+def _create_property_facets(cursor):
+    """Create the facet count tables of the structured property search
+
+    The counts come from these tables, so the filters need no covering
+    indexes: the listings themselves are found through the agent index,
+    the place index (migration 7) and the type index (migration 9).
+    """
+    _create_summary_table(cursor, "property_facets")
+    _create_summary_table(cursor, "agent_facets")
+
+
+# Location columns added to the properties table, parsed from the address
+PROPERTY_LOCATION_COLUMNS = (("city", "TEXT"), ("locality", "TEXT"), ("pincode", "TEXT"))
+
+
+def queue_backfill(cursor, name, after_id, end_id):
+    """Record that rows with after_id < id <= end_id still need backfill `name`"""
+    cursor.execute(
+        "INSERT OR REPLACE INTO backfills (name, last_id, end_id) VALUES (?, ?, ?)", (name, after_id, end_id)
+    )
+
+
+def _add_property_locations(cursor):
+    """Give listings indexed city, locality and PIN code columns and count listings per place
+
+    The existing listings' addresses are parsed afterwards, a chunk at a time
+    (see Database.backfill_locations): the migration only queues them in the
+    backfills table, so it stays quick on large databases.
+    """
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(properties)")}
+    for column, column_type in PROPERTY_LOCATION_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE properties ADD COLUMN {column} {column_type}")
+    # For the city and locality filters; PIN codes are indexed with the type (migration 9)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_properties_location ON properties (city, locality)")
+
+    # Kept exact as the backfill fills the columns in
+    _create_summary_table(cursor, "location_facets")
+    _create_summary_table(cursor, "city_summary")
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backfills (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            end_id INTEGER NOT NULL
+        )
+        """
+    )
+    end_id = cursor.execute("SELECT MAX(id) FROM properties").fetchone()[0]
+    if end_id is not None:
+        queue_backfill(cursor, "property_locations", 0, end_id)
+
+
+# Coordinate columns added to the properties table; coordinates_manual is 1
+# for coordinates typed in rather than taken from the listing's locality
+PROPERTY_COORDINATE_COLUMNS = (
+    ("latitude", "REAL"),
+    ("longitude", "REAL"),
+    ("coordinates_manual", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+
+def rtree_available(cursor):
+    """Return True if this SQLite build ships the R*Tree extension"""
+    options = [row[0] for row in cursor.execute("PRAGMA compile_options")]
+    return "ENABLE_RTREE" in options
+
+
+def coordinate_index_sql(where):
+    """Insert into properties_rtree the listings with coordinates of their own matching `where` (over properties)"""
+    return f"""
+        INSERT INTO properties_rtree (id, min_latitude, max_latitude, min_longitude, max_longitude)
+        SELECT id, latitude, latitude, longitude, longitude FROM properties
+        WHERE coordinates_manual AND latitude IS NOT NULL AND longitude IS NOT NULL AND {where}
+        """
+
+
+def _create_coordinate_index(cursor):
+    """Create the R*Tree of listing coordinates and the triggers that sync it
+
+    Each listing is a point (a box with equal edges). R*Tree edges are
+    rounded outwards to 32-bit floats, so the box only narrows the search
+    down; distances are worked out from the listing's own columns. Only
+    listings with coordinates of their own are indexed: those placed at a
+    locality's centre, most of them, share a few hundred points, which
+    nearby searches find through the locality instead.
+    """
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS properties_rtree USING rtree(
+            id, min_latitude, max_latitude, min_longitude, max_longitude
+        )
+        """
+    )
+    insert = """
+        INSERT INTO properties_rtree (id, min_latitude, max_latitude, min_longitude, max_longitude)
+        SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.coordinates_manual AND new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        """
+    delete = "DELETE FROM properties_rtree WHERE id = old.id;"
+    # An update only moves the point when the coordinates, or where they came from, change
+    moved = (
+        "WHEN old.latitude IS NOT new.latitude OR old.longitude IS NOT new.longitude "
+        "OR old.coordinates_manual IS NOT new.coordinates_manual"
+    )
+    for suffix, event, condition, body in (
+        ("ai", "INSERT", "WHEN new.coordinates_manual", insert),
+        ("ad", "DELETE", "WHEN old.coordinates_manual", delete),
+        ("au", "UPDATE OF latitude, longitude, coordinates_manual", moved, delete + insert),
+    ):
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS properties_rtree_{suffix} AFTER {event} ON properties {condition} BEGIN
+                {body}
+            END
+            """
+        )
+
+
+def _add_property_coordinates(cursor):
+    """Give listings latitude and longitude columns and a spatial index over them
+
+    Without R*Tree support a plain (latitude, longitude) index stands in.
+    Existing listings are placed at their locality's centre by the location
+    backfill, which the migration queues again over every listing.
+    """
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(properties)")}
+    for column, column_type in PROPERTY_COORDINATE_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE properties ADD COLUMN {column} {column_type}")
+    if rtree_available(cursor):
+        _create_coordinate_index(cursor)
+    else:
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_properties_coordinates ON properties (latitude, longitude)")
+
+    end_id = cursor.execute("SELECT MAX(id) FROM properties").fetchone()[0]
+    if end_id is not None:
+        queue_backfill(cursor, "property_locations", 0, end_id)
+
+
+# Tables checked for duplicates: listings, and clients (the spellings of a
+# client's name and contact details across inquiries)
+DUPLICATE_TABLES = ("properties", "inquiries")
+
+
+def _create_duplicate_tables(cursor):
+    """Create the duplicate candidate table, the client contact keys and the listing type index
+
+    A candidate pair is stored once, lowest id first, and removed by trigger
+    when either row is deleted. status is 'open' until the pair is merged or
+    dismissed ('dismissed' pairs are never suggested again). Contact keys
+    are normalized phone numbers and emails (see dedup.contact_keys); the
+    existing inquiries' keys are filled in by a queued backfill.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS duplicates (
+            table_name TEXT NOT NULL,
+            first_id INTEGER NOT NULL,
+            second_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open',
+            PRIMARY KEY (table_name, first_id, second_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_duplicates_second_id ON duplicates (table_name, second_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_duplicates_status_score ON duplicates (table_name, status, score)")
+    for table in DUPLICATE_TABLES:
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS duplicates_{table}_ad AFTER DELETE ON {table} BEGIN
+                DELETE FROM duplicates WHERE table_name = '{table}' AND (first_id = old.id OR second_id = old.id);
+            END
+            """
+        )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS client_contacts (
+            contact TEXT NOT NULL,
+            inquiry_id INTEGER NOT NULL,
+            PRIMARY KEY (contact, inquiry_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_client_contacts_inquiry_id ON client_contacts (inquiry_id)")
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS client_contacts_ad AFTER DELETE ON inquiries BEGIN
+            DELETE FROM client_contacts WHERE inquiry_id = old.id;
+        END
+        """
+    )
+
+    # Listings are blocked by type, bedrooms, PIN code and price, read in that
+    # order; the type and bedroom filters use the same index
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_properties_type ON properties (property_type, bedrooms, pincode, price)"
+    )
+
+    end_id = cursor.execute("SELECT MAX(id) FROM inquiries").fetchone()[0]
+    if end_id is not None:
+        queue_backfill(cursor, "client_contacts", 0, end_id)
+
+
+# Ordered list of (version, description, function). Append new migrations to the
+# end; never edit or reorder one that has already shipped.
+MIGRATIONS = [
+    (1, "Secondary indexes on agent, property, status and date columns", _create_secondary_indexes),
+    (2, "FTS5 full-text indexes kept in sync by triggers", _create_full_text_indexes),
+    (3, "Row change log for incremental list refreshes", _create_change_log),
+    (4, "Marketing campaign columns and search; registration fees moved out of address", _add_marketing_campaigns),
+    (5, "Trigger-maintained listing and inquiry summary tables for the dashboard", _create_summary_tables),
+    (6, "Facet count tables for structured property search", _create_property_facets),
+    (7, "City, locality and PIN code columns parsed from listing addresses", _add_property_locations),
+    (8, "Listing coordinates with an R*Tree index for nearby search", _add_property_coordinates),
+    (9, "Duplicate candidate pairs, client contact keys and a listing type index", _create_duplicate_tables),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def create_version_table(cursor):
+    """Create the schema_version bookkeeping table if it doesn't exist"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+        """
+    )
+
+
+def get_schema_version(conn):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def run_migrations(conn):
+    """Apply every pending migration in order and return the resulting version
+
+    Each migration runs in its own short IMMEDIATE transaction, so other
+    connections only ever wait on one step rather than on the whole upgrade.
+    A failing migration is rolled back and re-raised, leaving the database at
+    the last version that applied cleanly.
+
+    Some steps are single statements over a whole table and can't be split:
+    CREATE INDEX (migrations 1, 7 and 9) and the FTS5 'rebuild' of
+    migration 2. Work that rewrites rows one by one is queued with
+    queue_backfill instead and done in chunks after startup
+    (Database.backfill_locations and backfill_contacts).
+    """
+    cursor = conn.cursor()
+    create_version_table(cursor)
+    conn.commit()
+
+    current = get_schema_version(conn)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = version
+
+    return current
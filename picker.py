@@ -0,0 +1,200 @@
+from bisect import bisect_left, insort
+from tkinter import ttk
+
+from database import CHANGE_LIMIT
+from events import BULK
+
+# Choices listed in a picker's drop-down for the text typed so far
+PICKER_MATCHES = 20
+
+
+class PrefixIndex:
+    def __init__(self, rows):
+        """Index (id, label) rows for type-ahead lookup
+
+        labels maps each id to its display text ("ID - label"). Lower-cased
+        labels are kept sorted, so the labels starting with a prefix are found
+        with a binary search instead of a scan.
+        """
+        self.labels = {}
+        keys = []
+        for row_id, label in rows:
+            label = label or ""
+            self.labels[row_id] = f"{row_id} - {label}"
+            keys.append((label.lower(), row_id))
+        keys.sort()
+        self._keys = keys
+
+    def update(self, rows):
+        """Add new (id, label) rows and relabel existing ones"""
+        rows = list(rows)
+        self.remove(row_id for row_id, _ in rows)
+        for row_id, label in rows:
+            label = label or ""
+            self.labels[row_id] = f"{row_id} - {label}"
+            insort(self._keys, (label.lower(), row_id))
+
+    def remove(self, ids):
+        """Drop the rows with the given ids"""
+        for row_id in ids:
+            text = self.labels.pop(row_id, None)
+            if text is None:
+                continue
+            key = (text.split(" - ", 1)[1].lower(), row_id)
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def matches(self, text, limit=PICKER_MATCHES):
+        """Return the display texts of up to `limit` choices matching `text`
+
+        An id typed in full comes first, then labels starting with the text in
+        alphabetical order. Labels merely containing the text are left to the
+        picker's search, which runs off the Tk thread.
+        """
+        text = text.strip().lower()
+        found = []
+        if text.isdigit() and int(text) in self.labels:
+            found.append(int(text))
+
+        start = bisect_left(self._keys, (text,))
+        for key, row_id in self._keys[start:start + limit]:
+            if not key.startswith(text) or len(found) >= limit:
+                break
+            if row_id not in found:
+                found.append(row_id)
+        return [self.labels[row_id] for row_id in found]
+
+
+class Picker(ttk.Combobox):
+    def __init__(self, master, limit=PICKER_MATCHES, search=None, run=None, load=None, fetch=None, **kw):
+        """A Combobox listing only the top matches for the typed text
+
+        Fill it with set_index(PrefixIndex(rows)), or give it load() returning
+        every (id, label) row and call reload(); fetch(ids) returns the rows
+        (id, label, ...) of the given ids that still exist, for refresh(ids).
+        get_id() and set_id() read and set the chosen id without searching the
+        choices. When the prefix matches leave room, search(text, limit) (e.g.
+        Database.search_property_ids) is run and the ids it finds are listed
+        after them. load, fetch and search run through run
+        (App.run_in_background).
+        """
+        super().__init__(master, postcommand=self._update_values, **kw)
+        self.limit = limit
+        self.search = search
+        self.run = run
+        self.load = load
+        self.fetch = fetch
+        self._search_text = None
+        self.index = PrefixIndex(())
+        # Whether the index is loaded, and the ids whose rows are being fetched (see refresh)
+        self._loaded = False
+        self._changed_ids = set()
+        self.bind("<KeyRelease>", self._typed, add="+")
+
+    def set_index(self, index):
+        """Replace the choices, keeping the choice made if it is still one of them"""
+        chosen = self._chosen_id()
+        self.index = index
+        self._keep_choice(chosen)
+        self._update_values()
+
+    def reload(self):
+        """Rebuild the choices from load() in the background"""
+        self._loaded = False
+        self.run(lambda: PrefixIndex(self.load()), key=(self, "load"), on_success=self._index_loaded)
+
+    def _index_loaded(self, index):
+        """Install a freshly built index"""
+        self._loaded = True
+        self._changed_ids.clear()
+        self.set_index(index)
+
+    def refresh(self, ids):
+        """Update the choices for just the given ids instead of reloading them"""
+        if not self._loaded:
+            # The index being built may predate these changes
+            self.reload()
+            return
+
+        self._changed_ids.update(ids)
+        ids = list(self._changed_ids)
+
+        def fetched(rows):
+            self._changed_ids.difference_update(ids)
+            chosen = self._chosen_id()
+            # Deleted rows don't come back
+            self.index.remove(ids)
+            self.index.update((row[0], row[1]) for row in rows)
+            self._keep_choice(chosen)
+
+        self.run(self.fetch, ids, key=(self, "fetch"), on_success=fetched)
+
+    def records_changed(self, events):
+        """Bring the choices up to date after changes to their records (events.ChangeEvent list)"""
+        if len(events) > CHANGE_LIMIT or any(event.kind == BULK for event in events):
+            self.reload()
+        else:
+            self.refresh({event.row_id for event in events})
+
+    def _chosen_id(self):
+        """The id of the choice shown, or None while the text isn't one of the choices"""
+        row_id = self.get_id()
+        return row_id if row_id is not None and self.index.labels.get(row_id) == self.get() else None
+
+    def _keep_choice(self, row_id):
+        """Show the current label of choice `row_id`, or clear the choice if its record is gone"""
+        if row_id is not None:
+            self.set(self.index.labels.get(row_id, ""))
+
+    def _update_values(self):
+        """List the choices matching the current text"""
+        text = self.get()
+        if text and self.index.labels.get(self.get_id()) == text:
+            # A choice is already made: match on its label, not the "ID - " text
+            text = text.split(" - ", 1)[1]
+        matches = self.index.matches(text, self.limit)
+        self["values"] = matches
+        # Results of an earlier search no longer apply
+        self._search_text = None
+        if self.search and text.strip() and len(matches) < self.limit:
+            self._search_text = text
+            self.run(
+                self.search, text, self.limit, key=(self, "search"),
+                on_success=lambda ids: self._searched(text, matches, ids),
+            )
+
+    def _searched(self, text, matches, ids):
+        """List the search results after the prefix matches, unless the text has changed since"""
+        if text != self._search_text:
+            return
+        matches = list(matches)
+        for row_id in ids:
+            label = self.index.labels.get(row_id)
+            if label is not None and label not in matches:
+                matches.append(label)
+                if len(matches) >= self.limit:
+                    break
+        self["values"] = matches
+
+    def _typed(self, event):
+        """Narrow the choices as the user types"""
+        if event.keysym not in ("Up", "Down", "Return", "Escape", "Tab"):
+            self._update_values()
+
+    def get_id(self):
+        """Return the chosen id, or None when nothing is chosen
+
+        The text is "ID - label" as listed, or just an id typed by hand.
+        """
+        text = self.get()
+        if not text:
+            return None
+        try:
+            return int(text.split(" - ")[0])
+        except ValueError:
+            return None
+
+    def set_id(self, row_id):
+        """Show the choice for `row_id` (just the id if it isn't loaded yet)"""
+        self.set(self.index.labels.get(row_id, str(row_id)))
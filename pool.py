@@ -0,0 +1,187 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# How long a connection waits on a lock held by another connection (ms)
+DEFAULT_BUSY_TIMEOUT = 5000
+
+# Number of read-only connections kept for concurrent readers
+DEFAULT_READERS = 4
+
+
+class Connection(sqlite3.Connection):
+    """A connection that reports the statements it runs to its statement_hook
+
+    statement_hook(sql, parameters), when set, is called before each
+    statement run through the connection or its cursors, with the statement
+    as written (placeholders and all). parameters is None for executemany
+    and executescript, whose rows can't be replayed.
+    """
+
+    statement_hook = None
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or Cursor)
+
+    def execute(self, sql, parameters=()):
+        if self.statement_hook is not None:
+            self.statement_hook(sql, parameters)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        if self.statement_hook is not None:
+            self.statement_hook(sql, None)
+        return super().executemany(sql, parameters)
+
+    def executescript(self, sql_script):
+        if self.statement_hook is not None:
+            self.statement_hook(sql_script, None)
+        return super().executescript(sql_script)
+
+
+class Cursor(sqlite3.Cursor):
+    """Cursor of a pool Connection, reporting to the connection's statement_hook"""
+
+    def execute(self, sql, parameters=()):
+        hook = self.connection.statement_hook
+        if hook is not None:
+            hook(sql, parameters)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        hook = self.connection.statement_hook
+        if hook is not None:
+            hook(sql, None)
+        return super().executemany(sql, parameters)
+
+
+class ConnectionPool:
+    def __init__(self, db_file, readers=DEFAULT_READERS, busy_timeout=DEFAULT_BUSY_TIMEOUT):
+        """Open one writer connection and prepare up to `readers` reader connections
+
+        The database is switched to WAL journaling so readers never block the
+        writer and the writer never blocks readers. In-memory databases are
+        private to a single connection, so there every checkout shares the writer.
+        """
+        self.db_file = db_file
+        self.busy_timeout = busy_timeout
+        self.max_readers = 0 if self.is_memory(db_file) else readers
+
+        self._write_lock = threading.RLock()
+        self._writer_owner = None
+        self._writer_depth = 0
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._closed = False
+        self._statement_hook = None
+
+        self.writer_connection = self._open()
+        if self.max_readers:
+            self.writer_connection.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps NORMAL durable across application crashes
+            self.writer_connection.execute("PRAGMA synchronous=NORMAL")
+
+    @staticmethod
+    def is_memory(db_file):
+        """Return True for SQLite in-memory database names"""
+        return db_file == ":memory:" or str(db_file).startswith("file::memory:")
+
+    def _open(self, read_only=False):
+        """Open a connection usable from any thread (access is serialized by the pool)"""
+        conn = sqlite3.connect(
+            self.db_file, timeout=self.busy_timeout / 1000, check_same_thread=False, factory=Connection
+        )
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        conn.statement_hook = self._statement_hook
+        return conn
+
+    def set_statement_hook(self, hook):
+        """Call hook(sql, parameters) before every statement any pool connection runs (None to stop)
+
+        See Connection.statement_hook. It applies to the writer, the idle
+        readers and readers opened later; a reader checked out at the time
+        keeps its old hook.
+        """
+        self._statement_hook = hook
+        self.writer_connection.statement_hook = hook
+        idle = []
+        while True:
+            try:
+                idle.append(self._readers.get_nowait())
+            except queue.Empty:
+                break
+        for conn in idle:
+            conn.statement_hook = hook
+            self._readers.put(conn)
+
+    def owns_writer(self):
+        """Return True if the calling thread currently holds the writer"""
+        return self._writer_owner == threading.get_ident()
+
+    @contextmanager
+    def writer(self):
+        """Check out the single writer connection (re-entrant per thread)"""
+        with self._write_lock:
+            self._writer_owner = threading.get_ident()
+            self._writer_depth += 1
+            try:
+                yield self.writer_connection
+            finally:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer_owner = None
+
+    @contextmanager
+    def reader(self):
+        """Check out a read-only connection
+
+        A thread that is already holding the writer (for example inside an
+        open transaction) reads through it so it sees its own uncommitted rows.
+        """
+        if not self.max_readers or self.owns_writer():
+            with self.writer() as conn:
+                yield conn
+            return
+
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def _acquire_reader(self):
+        """Take an idle reader, opening a new one while under the pool limit"""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._reader_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                return self._open(read_only=True)
+
+        try:
+            return self._readers.get(timeout=self.busy_timeout / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("timed out waiting for a reader connection")
+
+    def close(self):
+        """Close the writer and every idle reader"""
+        self._closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            self.writer_connection.close()
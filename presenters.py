@@ -0,0 +1,182 @@
+import math
+from functools import lru_cache
+
+# Distinct values remembered per formatter; listings repeat the same round prices
+FORMAT_CACHE_SIZE = 4096
+
+# Shown for missing values
+NO_AGENT = "None"
+UNASSIGNED = "Unassigned"
+NO_PROPERTY = "N/A"
+DEFAULT_INQUIRY_STATUS = "New"
+NO_STATUS = "Not set"
+NO_LOCATION = "Unknown"
+
+# Inquiry statuses in sales funnel order; the dashboard lists them this way
+INQUIRY_FUNNEL = ("New", "Contacted", "Viewing Scheduled", "Offer Made", "Closed", "Cancelled")
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_price(price):
+    """Format a rupee price in lakhs (₹85.00 L) or, from one crore up, in crores (₹1.20 Cr)"""
+    if price is None:
+        return ""
+    price_in_lakhs = price / 100000
+    if price_in_lakhs >= 100:
+        return f"₹{price_in_lakhs / 100:.2f} Cr"
+    return f"₹{price_in_lakhs:.2f} L"
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_amount(amount):
+    """Format a rupee amount in full (₹25000.00; blank when not given)"""
+    if amount is None:
+        return ""
+    return f"₹{amount:.2f}"
+
+
+def format_beds(bedrooms):
+    """Bedrooms as a whole number (0 when not given)"""
+    return int(bedrooms) if bedrooms else 0
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_baths(bathrooms):
+    """Bathrooms without a trailing .0 (2, 2.5; 0 when not given)"""
+    baths = float(bathrooms) if bathrooms else 0.0
+    return int(baths) if baths.is_integer() else baths
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_commission(rate):
+    """Commission rate as a percentage (2.5%)"""
+    return f"{float(rate):.1f}%" if rate is not None else "0.0%"
+
+
+def format_facet_choices(rows, label=str):
+    """Filter choices for facet rows, as {"Apartment (52,043)": "Apartment"} in the rows' order
+
+    Missing values (None) can't be chosen and are left out.
+    """
+    return {f"{label(value)} ({count:,})": value for value, count in rows if value is not None}
+
+
+def format_property_rows(rows):
+    """Display values for listing rows (id, address, type, beds, baths, price, status, agent name)
+
+    Search results may carry extra trailing columns; they are ignored.
+    """
+    return [
+        (row[0], row[1], row[2], format_beds(row[3]), format_baths(row[4]), format_price(row[5]), row[6], row[7] or NO_AGENT)
+        for row in rows
+    ]
+
+
+def format_marketing_rows(rows):
+    """Display values for marketing rows (id, property address, channel, fee, spend, start, end, status, agent name)"""
+    return [
+        (
+            row[0], row[1] or NO_PROPERTY, row[2] or "", format_amount(row[3]), format_amount(row[4]),
+            row[5] or "", row[6] or "", row[7] or "", row[8] or NO_AGENT,
+        )
+        for row in rows
+    ]
+
+
+def format_agent_rows(rows):
+    """Display values for agent rows (id, name, phone, email, licence, join date, commission)"""
+    return [
+        (row[0], row[1], row[2] or "", row[3] or "", row[4] or "", row[5], format_commission(row[6]))
+        for row in rows
+    ]
+
+
+def format_inquiry_rows(rows):
+    """Display values for inquiry rows (id, client, property address, date, status, agent name)"""
+    return [
+        (row[0], row[1], row[2] or NO_PROPERTY, row[3], row[4] or DEFAULT_INQUIRY_STATUS, row[5] or UNASSIGNED)
+        for row in rows
+    ]
+
+
+def format_listing_summary_rows(rows):
+    """Display values for dashboard listing rows (status, type, listings, total value)"""
+    return [(row[0] or NO_STATUS, row[1] or NO_STATUS, row[2], format_price(row[3])) for row in rows]
+
+
+def format_funnel_rows(rows):
+    """Display values for dashboard funnel rows (status, inquiries, share of all inquiries)
+
+    Statuses come in funnel order; statuses outside the funnel follow, by name.
+    """
+    total = sum(row[1] for row in rows)
+    order = {status: position for position, status in enumerate(INQUIRY_FUNNEL)}
+    rows = sorted(rows, key=lambda row: (order.get(row[0], len(order)), row[0]))
+    return [
+        (row[0] or NO_STATUS, row[1], f"{row[1] / total * 100:.1f}%" if total else "0.0%")
+        for row in rows
+    ]
+
+
+def format_city_summary_rows(rows):
+    """Display values for dashboard city (or locality) rows (place, listings, available, total value)"""
+    return [(row[0] or NO_LOCATION, row[1], row[2], format_price(row[3])) for row in rows]
+
+
+def format_agent_summary_rows(rows):
+    """Display values for dashboard agent rows (agent, listings, available, listed value, open inquiries)"""
+    return [(row[1] or UNASSIGNED, row[2], row[3], format_price(row[4]), row[5]) for row in rows]
+
+
+def format_score(score):
+    """A duplicate match score (0 to 1) as a percentage (87%)"""
+    return f"{score * 100:.0f}%"
+
+
+def format_listing_duplicate_rows(rows):
+    """Display values for duplicate listing pairs (score, then id, address, price and agent name of each listing)
+
+    Rows come from get_duplicates: (first id, second id, score, first address,
+    price, agent, second address, price, agent).
+    """
+    return [
+        (
+            format_score(row[2]), row[0], row[3], format_price(row[4]), row[5] or NO_AGENT,
+            row[1], row[6], format_price(row[7]), row[8] or NO_AGENT,
+        )
+        for row in rows
+    ]
+
+
+def format_client_duplicate_rows(rows):
+    """Display values for duplicate client pairs (score, then inquiry id, client name and contact info of each spelling)
+
+    Rows come from get_duplicates: (first id, second id, score, first name,
+    contact, second name, contact).
+    """
+    return [(format_score(row[2]), row[0], row[3], row[4] or "", row[1], row[5], row[6] or "") for row in rows]
+
+
+def format_duplicate_note(matches, lead):
+    """A note naming the likely duplicates of a saved row, from get_duplicates_of ("" when there are none)
+
+    lead starts the sentence: "It looks like a duplicate of listing" gives
+    "It looks like a duplicate of listing #12 (92%); review it under Duplicates."
+    """
+    if not matches:
+        return ""
+    found = ", ".join(f"#{row_id} ({format_score(score)})" for row_id, score in matches)
+    return f"\n\n{lead} {found}; review it under Duplicates."
+
+
+def parse_number(value, label):
+    """Read a typed or imported number as a finite float, 0 when blank
+
+    Raises ValueError for text that is not a number and for 'nan' and 'inf',
+    which float() accepts but which would break price sorting, summaries and
+    the formatters above. The forms and the CSV importer share this rule.
+    """
+    number = float(value or 0)
+    if not math.isfinite(number):
+        raise ValueError(f"{label} must be a finite number, not '{value}'")
+    return number
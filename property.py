@@ -1,6 +1,34 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from database import PropertyFilter
+from events import DELETE, INSERT, UPDATE
+from live_search import FIRST_RESULTS, LiveSearch
+from locations import place_coordinates, valid_coordinates
+from migrations import PRICE_BANDS
+from picker import Picker
+from presenters import format_baths, format_duplicate_note, format_facet_choices, format_price, format_property_rows, parse_number
+from virtual_tree import VirtualTreeview
+
+# Shown in a filter box when its criterion isn't set
+ANY = "Any"
+
+# Radius of a nearby search until another is chosen (km)
+DEFAULT_NEAR_RADIUS = 5
+
+# Filter boxes: (facet dimension, label)
+FILTERS = (
+    ("property_type", "Type"),
+    ("status", "Status"),
+    ("bedrooms", "Beds"),
+    ("bathrooms", "Baths"),
+    ("agent_id", "Agent"),
+    ("min_price", "Price from"),
+    ("max_price", "Price under"),
+    ("city", "City"),
+    ("locality", "Locality"),
+)
+
 class PropertyTab:
     def __init__(self, parent, database, app):
         """Initialize the Property Management tab"""
@@ -16,15 +44,34 @@ class PropertyTab:
         self.price_var = tk.StringVar()
         self.status_var = tk.StringVar()
         self.agent_id_var = tk.StringVar()
+        self.latitude_var = tk.StringVar()
+        self.longitude_var = tk.StringVar()
         self.property_search_var = tk.StringVar()
 
-        # Create the tab UI
-        self.create_tab()
+        # Nearby search: the place typed, the radius and the (latitude, longitude, km) searched (None: anywhere)
+        self.near_var = tk.StringVar()
+        self.radius_var = tk.StringVar(value=str(DEFAULT_NEAR_RADIUS))
+        self.near = None
+
+        # Filter box texts and the values chosen in them (None: any)
+        self.filter_vars = {dimension: tk.StringVar(value=ANY) for dimension, _ in FILTERS}
+        self.filter_values = dict.fromkeys(self.filter_vars)
+        # Per filter box, its choices' texts and values
+        self.filter_choices = {
+            "min_price": {format_price(edge): edge for edge in PRICE_BANDS[1:]},
+            "max_price": {format_price(edge): edge for edge in PRICE_BANDS[1:]},
+        }
+        self.matches_var = tk.StringVar()
+
+        # Add the tab's frame now; its widgets and data are built when it is first shown
+        self.frame = ttk.Frame(self.parent)
+        self.parent.add(self.frame, text="Property Management")
+        self.built = False
 
     def create_tab(self):
-        """Create the Property Management tab UI"""
-        property_frame = ttk.Frame(self.parent)
-        self.parent.add(property_frame, text="Property Management")
+        """Create the Property Management tab UI and load its data (called when the tab is first shown)"""
+        self.built = True
+        property_frame = self.frame
 
         # Left frame for property entry
         left_frame = ttk.Frame(property_frame)
@@ -58,17 +105,29 @@ class PropertyTab:
         ttk.Combobox(left_frame, textvariable=self.status_var, values=status_types, width=15).grid(row=6, column=1, pady=5, sticky=tk.W)
 
         ttk.Label(left_frame, text="Agent:").grid(row=7, column=0, sticky=tk.W, pady=5)
-        self.agent_combo = ttk.Combobox(left_frame, textvariable=self.agent_id_var, width=25)
+        self.agent_combo = Picker(
+            left_frame, textvariable=self.agent_id_var, width=25,
+            search=self.db.search_agent_ids, run=self.app.run_in_background,
+            load=self.db.get_agent_combo_data, fetch=self.db.get_agents_by_ids,
+        )
         self.agent_combo.grid(row=7, column=1, pady=5, sticky=tk.W)
-        self.update_agent_combo()
+        self.agent_combo.reload()
+
+        # Left blank, the listing is placed at its locality's centre
+        ttk.Label(left_frame, text="Lat / Long:").grid(row=8, column=0, sticky=tk.W, pady=5)
+        coordinates_frame = ttk.Frame(left_frame)
+        coordinates_frame.grid(row=8, column=1, pady=5, sticky=tk.W)
+        ttk.Entry(coordinates_frame, textvariable=self.latitude_var, width=10).pack(side=tk.LEFT)
+        ttk.Entry(coordinates_frame, textvariable=self.longitude_var, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Label(coordinates_frame, text="(blank: locality centre)").pack(side=tk.LEFT)
 
-        ttk.Label(left_frame, text="Description:").grid(row=8, column=0, sticky=tk.W, pady=5)
+        ttk.Label(left_frame, text="Description:").grid(row=9, column=0, sticky=tk.W, pady=5)
         self.description_text = tk.Text(left_frame, width=40, height=5)
-        self.description_text.grid(row=8, column=1, pady=5, sticky=tk.W)
+        self.description_text.grid(row=9, column=1, pady=5, sticky=tk.W)
 
         # Buttons
         button_frame = ttk.Frame(left_frame)
-        button_frame.grid(row=9, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=10, column=0, columnspan=2, pady=10)
 
         ttk.Button(button_frame, text="Add Property", command=self.add_property).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Update Property", command=self.update_property).pack(side=tk.LEFT, padx=5)
@@ -83,13 +142,56 @@ class PropertyTab:
         search_frame.pack(fill=tk.X, pady=5)
 
         ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
-        ttk.Entry(search_frame, textvariable=self.property_search_var, width=20).pack(side=tk.LEFT, padx=5)
-        ttk.Button(search_frame, text="Search", command=self.search_properties).pack(side=tk.LEFT, padx=5)
-        ttk.Button(search_frame, text="Show All", command=self.load_properties).pack(side=tk.LEFT, padx=5)
+        search_entry = ttk.Entry(search_frame, textvariable=self.property_search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        # Search as the user types, once typing pauses
+        self.property_search = LiveSearch(search_entry, self.property_search_var, self.search_properties)
+        search_entry.bind("<Return>", self.property_search.run)
+        ttk.Button(search_frame, text="Search", command=self.property_search.run).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="Show All", command=self.property_search.clear).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="Export", command=self.export_properties).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="Import", command=self.import_properties).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="Duplicates", command=self.show_duplicates).pack(side=tk.LEFT, padx=5)
+
+        # Filters; each box lists how many listings each choice would show
+        filter_frame = ttk.Frame(right_frame)
+        filter_frame.pack(fill=tk.X, pady=5)
+        self.filter_boxes = {}
+        for position, (dimension, label) in enumerate(FILTERS):
+            row, column = divmod(position, 4)
+            ttk.Label(filter_frame, text=f"{label}:").grid(row=row, column=column * 2, sticky=tk.W, padx=5, pady=2)
+            box = ttk.Combobox(
+                filter_frame, textvariable=self.filter_vars[dimension], state="readonly",
+                width=22 if dimension == "agent_id" else 14,
+            )
+            box.grid(row=row, column=column * 2 + 1, sticky=tk.W, pady=2)
+            box.bind("<<ComboboxSelected>>", lambda event, dimension=dimension: self.filter_chosen(dimension))
+            self.filter_boxes[dimension] = box
+        row, column = divmod(len(FILTERS), 4)
+        ttk.Button(filter_frame, text="Clear Filters", command=self.clear_filters).grid(row=row, column=column * 2, padx=5)
+        ttk.Label(filter_frame, textvariable=self.matches_var).grid(row=row, column=column * 2 + 1, sticky=tk.W, padx=5)
+        self.show_filter_choices()
+
+        # Nearby search: a locality, city or "latitude, longitude"
+        near_frame = ttk.Frame(right_frame)
+        near_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(near_frame, text="Near:").pack(side=tk.LEFT, padx=5)
+        near_entry = ttk.Entry(near_frame, textvariable=self.near_var, width=25)
+        near_entry.pack(side=tk.LEFT, padx=5)
+        near_entry.bind("<Return>", lambda event: self.find_nearby())
+        ttk.Label(near_frame, text="Within (km):").pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(near_frame, from_=1, to=100, textvariable=self.radius_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Button(near_frame, text="Find Nearby", command=self.find_nearby).pack(side=tk.LEFT, padx=5)
+        ttk.Button(near_frame, text="Anywhere", command=self.clear_nearby).pack(side=tk.LEFT, padx=5)
 
         # Treeview for property listing
         columns = ("id", "address", "type", "beds", "baths", "price", "status", "agent")
-        self.property_tree = ttk.Treeview(right_frame, columns=columns, show="headings", height=15)
+        # Only the rows on screen exist as Tk items; the rest are fetched as the list scrolls
+        self.property_tree = VirtualTreeview(
+            right_frame, format_property_rows, self.app.executor, self.app.show_error,
+            changes=lambda after_seq: self.db.get_changes("properties", after_seq),
+            columns=columns, show="headings", height=15,
+        )
 
         # Define headings
         self.property_tree.heading("id", text="ID")
@@ -122,25 +224,12 @@ class PropertyTab:
         # Bind select event
         self.property_tree.bind("<<TreeviewSelect>>", self.property_selected)
 
+        # Follow changes made on any tab; applied once per burst, while the tab is shown
+        self.app.events.subscribe(("properties", "agents"), self.records_changed, property_frame)
+
         # Load data
         self.load_properties()
-
-    def update_agent_combo(self):
-        """Update the agent combobox with current data"""
-        self.agent_combo.set("")
-        agents = self.db.get_agent_combo_data()
-        agent_list = [f"{agent[0]} - {agent[1]}" for agent in agents]
-        self.agent_combo["values"] = agent_list
-
-    def get_id_from_combobox(self, combo_value):
-        """Extract ID from combobox value (format: "ID - Value")"""
-        if not combo_value:
-            return None
-
-        try:
-            return int(combo_value.split(" - ")[0])
-        except (ValueError, IndexError):
-            return None
+        self.load_facets()
 
     def add_property(self):
         """Add a new property to the database"""
@@ -150,7 +239,7 @@ class PropertyTab:
         bathrooms = self.bathrooms_var.get()
         price = self.price_var.get()
         status = self.status_var.get()
-        agent_id = self.get_id_from_combobox(self.agent_id_var.get())
+        agent_id = self.agent_combo.get_id()
         description = self.description_text.get("1.0", tk.END).strip()
 
         if not address or not property_type:
@@ -159,17 +248,44 @@ class PropertyTab:
 
         try:
             bedrooms = int(bedrooms) if bedrooms else 0
-            bathrooms = float(bathrooms) if bathrooms else 0
-            price = float(price) if price else 0
+            bathrooms = parse_number(bathrooms, "Bathrooms")
+            price = parse_number(price, "Price")
+            latitude, longitude = self.read_coordinates()
+        except ValueError as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            return
 
-            self.db.add_property(address, property_type, bedrooms, bathrooms, price, status, agent_id, description)
+        def property_added(property_id):
+            self.app.events.publish("properties", property_id, INSERT)
             self.clear_fields()
-            self.load_properties()
-            self.app.inquiry_tab.update_property_combo()
 
-            messagebox.showinfo("Success", "Property added successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            # Mention any listing it seems to duplicate (recorded as it was added)
+            def duplicates_found(matches):
+                note = format_duplicate_note(matches, "It looks like a duplicate of listing")
+                messagebox.showinfo("Success", "Property added successfully" + note)
+
+            self.app.run_in_background(
+                self.db.get_duplicates_of, "properties", property_id, on_success=duplicates_found
+            )
+
+        self.app.run_in_background(
+            self.db.add_property, address, property_type, bedrooms, bathrooms, price, status, agent_id, description,
+            latitude, longitude,
+            on_success=property_added,
+        )
+
+    def read_coordinates(self):
+        """The (latitude, longitude) typed in the form, (None, None) when both are blank; raises ValueError"""
+        latitude = self.latitude_var.get().strip()
+        longitude = self.longitude_var.get().strip()
+        if not latitude and not longitude:
+            return None, None
+        if not latitude or not longitude:
+            raise ValueError("enter both latitude and longitude, or neither")
+        latitude, longitude = float(latitude), float(longitude)
+        if not valid_coordinates(latitude, longitude):
+            raise ValueError("latitude must be between -90 and 90 and longitude between -180 and 180")
+        return latitude, longitude
 
     def update_property(self):
         """Update an existing property in the database"""
@@ -185,7 +301,7 @@ class PropertyTab:
         bathrooms = self.bathrooms_var.get()
         price = self.price_var.get()
         status = self.status_var.get()
-        agent_id = self.get_id_from_combobox(self.agent_id_var.get())
+        agent_id = self.agent_combo.get_id()
         description = self.description_text.get("1.0", tk.END).strip()
 
         if not address or not property_type:
@@ -194,16 +310,23 @@ class PropertyTab:
 
         try:
             bedrooms = int(bedrooms) if bedrooms else 0
-            bathrooms = float(bathrooms) if bathrooms else 0
-            price = float(price) if price else 0
+            bathrooms = parse_number(bathrooms, "Bathrooms")
+            price = parse_number(price, "Price")
+            latitude, longitude = self.read_coordinates()
+        except ValueError as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            return
 
-            self.db.update_property(property_id, address, property_type, bedrooms, bathrooms, price, status, agent_id, description)
-            self.load_properties()
-            self.app.inquiry_tab.update_property_combo()
+        def property_updated(_):
+            self.app.events.publish("properties", int(property_id), UPDATE)
 
             messagebox.showinfo("Success", "Property updated successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+
+        self.app.run_in_background(
+            self.db.update_property, property_id, address, property_type, bedrooms, bathrooms, price, status, agent_id, description,
+            latitude, longitude,
+            on_success=property_updated,
+        )
 
     def delete_property(self):
         """Delete a property and its associated inquiries from the database"""
@@ -218,77 +341,219 @@ class PropertyTab:
         if not confirm:
             return
 
-        try:
-            self.db.delete_property(property_id)
+        def property_deleted(_):
+            self.app.events.publish("properties", int(property_id), DELETE)
             self.clear_fields()
-            self.load_properties()
-            self.app.inquiry_tab.load_inquiries()
-            self.app.inquiry_tab.update_property_combo()
 
             messagebox.showinfo("Success", "Property deleted successfully")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
-    def load_properties(self):
-        """Load all properties into the treeview"""
-        # Clear existing data
-        for i in self.property_tree.get_children():
-            self.property_tree.delete(i)
-
-        # Load data from database
-        properties = self.db.get_properties()
-
-        for row in properties:
-            # Format price as INR currency
-            price_in_lakhs = row[5] / 100000
-            if price_in_lakhs >= 100:
-                # Display in crores if >= 1 crore
-                price_in_crores = price_in_lakhs / 100
-                price_formatted = f"₹{price_in_crores:.2f} Cr"
-            else:
-                # Display in lakhs
-                price_formatted = f"₹{price_in_lakhs:.2f} L"
-
-            # Format bedrooms and bathrooms
-            beds = int(row[3]) if row[3] else 0
-            baths = float(row[4]) if row[4] else 0
-            baths_formatted = int(baths) if baths.is_integer() else baths
-
-            # Add to treeview with formatted values
-            self.property_tree.insert("", "end", values=(row[0], row[1], row[2], beds, baths_formatted, price_formatted, row[6], row[7] or "None"))
-
-    def search_properties(self):
-        """Search properties by address or property type"""
-        search_term = self.property_search_var.get()
-        if not search_term:
-            self.load_properties()
+        self.app.run_in_background(self.db.delete_property, property_id, on_success=property_deleted)
+
+    def load_properties(self, filters=None, cancel=None):
+        """Load all properties (those matching the filters, if any are set) into the treeview
+
+        During a nearby search only the listings within its radius are
+        loaded, nearest first.
+        """
+        if filters is None:
+            filters = self.current_filters()
+        if self.near is not None:
+            # Rows moving in or out of range can't be told apart; refreshes reload the ids
+            near = self.near
+            self.property_tree.load(
+                lambda: self.nearby_ids(near, filters, cancel=cancel),
+                lambda property_ids: self.db.get_properties_by_ids(property_ids, filters),
+                incremental=False,
+                first_ids=lambda: self.nearby_ids(near, filters, FIRST_RESULTS, cancel),
+            )
+            return
+        if filters.is_empty():
+            # Load the ids in listing order; rows are fetched as they scroll into view
+            self.property_tree.load(self.db.get_property_ids, self.db.get_properties_by_ids)
             return
 
-        # Clear existing data
-        for i in self.property_tree.get_children():
-            self.property_tree.delete(i)
-
-        # Search properties
-        properties = self.db.search_properties(search_term)
-
-        for row in properties:
-            # Format price as INR currency
-            price_in_lakhs = row[5] / 100000
-            if price_in_lakhs >= 100:
-                # Display in crores if >= 1 crore
-                price_in_crores = price_in_lakhs / 100
-                price_formatted = f"₹{price_in_crores:.2f} Cr"
-            else:
-                # Display in lakhs
-                price_formatted = f"₹{price_in_lakhs:.2f} L"
+        # Rows that stop matching are dropped as they change; text matches can't tell, so reload
+        self.property_tree.load(
+            lambda: self.db.filter_property_ids(filters, cancel=cancel),
+            lambda property_ids: self.db.get_properties_by_ids(property_ids, filters),
+            incremental=not filters.search,
+            first_ids=lambda: self.db.filter_property_ids(filters, FIRST_RESULTS, cancel),
+        )
+
+    def current_filters(self, search_term=None):
+        """The PropertyFilter chosen in the filter boxes, with the search text when other filters are set
+
+        A search alone (outside a nearby search) is ranked by relevance
+        instead (see search_properties).
+        """
+        values = self.filter_values
+        filters = PropertyFilter(
+            property_type=values["property_type"],
+            status=values["status"],
+            min_bedrooms=values["bedrooms"],
+            max_bedrooms=values["bedrooms"],
+            min_bathrooms=values["bathrooms"],
+            max_bathrooms=values["bathrooms"],
+            min_price=values["min_price"],
+            max_price=values["max_price"],
+            agent_id=values["agent_id"],
+            city=values["city"],
+            locality=values["locality"],
+        )
+        if filters.is_empty() and self.near is None:
+            return filters
+        if search_term is None:
+            search_term = self.property_search_var.get().strip()
+        return filters._replace(search=search_term or None)
+
+    def filter_chosen(self, dimension):
+        """Apply the choice just made in a filter box"""
+        text = self.filter_vars[dimension].get()
+        self.filter_values[dimension] = self.filter_choices.get(dimension, {}).get(text)
+        if dimension == "city":
+            # A locality chosen before belongs to the old city
+            self.filter_values["locality"] = None
+        self.apply_filters()
+
+    def clear_filters(self):
+        """Reset every filter box to Any"""
+        self.filter_values = dict.fromkeys(self.filter_vars)
+        self.apply_filters()
+
+    def apply_filters(self):
+        """Reload the listings and the filter counts for the current filters"""
+        search_term = self.property_search_var.get().strip()
+        if self.current_filters().is_empty() and search_term and self.near is None:
+            self.property_search.run()
+        else:
+            self.load_properties()
+        self.load_facets()
+
+    def load_facets(self, filters=None, cancel=None):
+        """Fetch the filter counts in the background"""
+        if filters is None:
+            filters = self.current_filters()
+        near = self.near
+        if near is None:
+            count = lambda: self.db.count_properties(filters, cancel)
+        else:
+            count = lambda: len(self.nearby_ids(near, filters, cancel=cancel))
+        self.app.run_in_background(
+            lambda: (count(), self.db.get_property_facets(filters, cancel)),
+            key=(self, "facets"),
+            on_success=self.show_facets,
+        )
+
+    def nearby_ids(self, near, filters, limit=-1, cancel=None):
+        """Ids of the listings matching filters within a nearby search's (latitude, longitude, km), nearest first"""
+        return [property_id for property_id, _ in self.db.search_properties_near(*near, filters, limit, cancel)]
+
+    def find_nearby(self):
+        """List only the listings within the chosen radius of the place typed in the Near box"""
+        coordinates = place_coordinates(self.near_var.get())
+        if coordinates is None:
+            messagebox.showerror("Error", "Enter a known locality or city, or a latitude and longitude")
+            return
+        try:
+            radius = parse_number(self.radius_var.get(), "Radius")
+        except ValueError:
+            radius = -1
+        if radius <= 0:
+            messagebox.showerror("Error", "The radius must be a number of kilometres above 0")
+            return
 
-            # Format bedrooms and bathrooms
-            beds = int(row[3]) if row[3] else 0
-            baths = float(row[4]) if row[4] else 0
-            baths_formatted = int(baths) if baths.is_integer() else baths
+        self.near = coordinates + (radius,)
+        self.apply_filters()
+
+    def clear_nearby(self):
+        """End the nearby search"""
+        self.near = None
+        self.near_var.set("")
+        self.apply_filters()
+
+    def show_facets(self, result):
+        """Show freshly fetched filter counts in the filter boxes"""
+        matches, facets = result
+        self.matches_var.set(f"{matches:,} listings")
+        labels = self.agent_combo.index.labels
+        self.filter_choices["property_type"] = format_facet_choices(facets["property_type"])
+        self.filter_choices["status"] = format_facet_choices(facets["status"])
+        self.filter_choices["bedrooms"] = format_facet_choices(facets["bedrooms"], lambda beds: f"{beds} BHK")
+        self.filter_choices["bathrooms"] = format_facet_choices(facets["bathrooms"], format_baths)
+        self.filter_choices["agent_id"] = format_facet_choices(
+            facets["agent_id"], lambda agent_id: labels.get(agent_id, f"Agent {agent_id}")
+        )
+        self.filter_choices["city"] = format_facet_choices(facets["city"])
+        self.filter_choices["locality"] = format_facet_choices(facets["locality"])
+        self.show_filter_choices()
+
+    def show_filter_choices(self):
+        """List each filter box's choices and show the chosen one's current text"""
+        for dimension, box in self.filter_boxes.items():
+            choices = self.filter_choices.get(dimension, {})
+            box["values"] = [ANY] + list(choices)
+            chosen = self.filter_values[dimension]
+            text = next((text for text, value in choices.items() if value == chosen), None)
+            if chosen is None:
+                text = ANY
+            elif text is None:
+                # No longer among the counted choices (e.g. an agent outside the top ones)
+                text = self.filter_vars[dimension].get()
+            self.filter_vars[dimension].set(text)
+
+    def refresh_properties(self):
+        """Apply property changes to the treeview without reloading it"""
+        self.property_tree.refresh()
+
+    def records_changed(self, events):
+        """Bring the tab up to date after properties or agents changed (on any tab)"""
+        agent_events = [event for event in events if event.entity == "agents"]
+        if agent_events:
+            self.agent_combo.records_changed(agent_events)
+            # Listings show the agent's name
+            self.property_tree.invalidate()
+        self.refresh_properties()
+        self.load_facets()
+
+    def search_properties(self, search_term, cancel):
+        """Search properties by address, property type or description
+
+        Called by the live search; cancel is set once the term changes again.
+        With filters set, the text narrows the filtered listings instead.
+        """
+        filters = self.current_filters(search_term)
+        if not filters.is_empty() or self.near is not None:
+            # Filtered (or nearby) listings; the counts change with the text too
+            self.load_properties(filters, cancel)
+            self.load_facets(filters, cancel)
+            return
+        if not search_term:
+            self.load_properties()
+            return
 
-            # Add to treeview with formatted values
-            self.property_tree.insert("", "end", values=(row[0], row[1], row[2], beds, baths_formatted, price_formatted, row[6], row[7] or "None"))
+        # Show the first matches straight away, then the rest of the ids
+        self.property_tree.load(
+            lambda: self.db.search_property_ids(search_term, cancel=cancel),
+            self.db.get_properties_by_ids,
+            incremental=False,
+            first_ids=lambda: self.db.search_property_ids(search_term, FIRST_RESULTS, cancel),
+        )
+
+    def export_properties(self):
+        """Export the properties matching the current search to a file"""
+        filters = self.current_filters()
+        if filters.is_empty():
+            self.app.export_table("properties", search=self.property_search_var.get())
+        else:
+            self.app.export_table("properties", filters=filters)
+
+    def import_properties(self):
+        """Import listings from a CSV file"""
+        self.app.import_file("properties")
+
+    def show_duplicates(self):
+        """Open the duplicate listings window"""
+        self.app.show_duplicates("properties")
 
     def property_selected(self, event):
         """Handle property selection in the treeview"""
@@ -298,32 +563,37 @@ class PropertyTab:
             property_id = self.property_tree.item(selected_item, "values")[0]
 
             # Get property details from database
-            property_data = self.db.get_property(property_id)
-            if property_data:
-                # Clear current fields
-                self.clear_fields()
-
-                # Populate fields with selected property data
-                self.address_var.set(property_data[1])
-                self.property_type_var.set(property_data[2])
-                self.bedrooms_var.set(property_data[3])
-                self.bathrooms_var.set(property_data[4])
-                self.price_var.set(property_data[5])
-                self.status_var.set(property_data[7])
-
-                # Set agent if exists
-                if property_data[8]:
-                    # Find agent in combobox values
-                    agent_values = self.agent_combo["values"]
-                    for agent_value in agent_values:
-                        if agent_value.startswith(f"{property_data[8]} - "):
-                            self.agent_id_var.set(agent_value)
-                            break
-
-                # Set description
-                self.description_text.delete("1.0", tk.END)
-                if property_data[9]:
-                    self.description_text.insert("1.0", property_data[9])
+            self.app.run_in_background(
+                self.db.get_property, property_id, key=(self, "selected"), on_success=self.show_property
+            )
+
+    def show_property(self, property_data):
+        """Populate the input fields with a property row"""
+        if property_data:
+            # Clear current fields
+            self.clear_fields()
+
+            # Populate fields with selected property data
+            self.address_var.set(property_data[1])
+            self.property_type_var.set(property_data[2])
+            self.bedrooms_var.set(property_data[3])
+            self.bathrooms_var.set(property_data[4])
+            self.price_var.set(property_data[5])
+            self.status_var.set(property_data[7])
+
+            # Set agent if exists
+            if property_data[8]:
+                self.agent_combo.set_id(property_data[8])
+
+            # Set description
+            self.description_text.delete("1.0", tk.END)
+            if property_data[9]:
+                self.description_text.insert("1.0", property_data[9])
+
+            # Coordinates taken from the locality stay blank, so they follow address changes
+            if property_data[15]:
+                self.latitude_var.set(property_data[13])
+                self.longitude_var.set(property_data[14])
 
     def clear_fields(self):
         """Clear all input fields"""
@@ -334,4 +604,6 @@ class PropertyTab:
         self.price_var.set("")
         self.status_var.set("")
         self.agent_id_var.set("")
+        self.latitude_var.set("")
+        self.longitude_var.set("")
         self.description_text.delete("1.0", tk.END)
\ No newline at end of file
@@ -1,105 +1,26 @@
-import sqlite3
 from datetime import datetime, timedelta
 import random
-import os
 
-def seed_database(db_path="real_estate.db"):
-    """Seed the database with sample Indian real estate data"""
+from database import Database
 
-    # Check if database already has data
-    if os.path.exists(db_path):
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+def seed_database(db_path="real_estate.db", db=None):
+    """Seed the database with sample Indian real estate data
 
-        # Check if there are any existing records
-        cursor.execute("SELECT COUNT(*) FROM properties")
-        property_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM agents")
-        agent_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM inquiries")
-        inquiry_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM marketing")
-        marketing_count = cursor.fetchone()[0]
-
-        conn.close()
+    Pass an open `db` to seed it in place (it is left open); otherwise
+    `db_path` is opened and closed again.
+    """
+    owned = db is None
+    if owned:
+        # Connect to database (creates tables and applies migrations if needed)
+        db = Database(db_path)
 
+    # Check if there are any existing records
+    if not db.is_empty():
         # If there's already data, don't seed
-        if property_count > 0 or agent_count > 0 or inquiry_count > 0 or marketing_count > 0:
-            print("Database already contains data. Skipping seed operation.")
-            return
-
-    # Connect to database
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Create tables if they don't exist
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS properties (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            address TEXT NOT NULL,
-            property_type TEXT NOT NULL,
-            bedrooms INTEGER,
-            bathrooms REAL,
-            price REAL,
-            listing_date TEXT,
-            status TEXT,
-            agent_id INTEGER,
-            description TEXT
-        )
-        """
-    )
-
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS agents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            phone TEXT,
-            email TEXT,
-            license_number TEXT,
-            join_date TEXT,
-            commission_rate REAL
-        )
-        """
-    )
-
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS inquiries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_name TEXT NOT NULL,
-            contact_info TEXT,
-            property_id INTEGER,
-            inquiry_date TEXT,
-            status TEXT,
-            notes TEXT,
-            agent_id INTEGER
-        )
-        """
-    )
-
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS marketing (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            address TEXT NOT NULL,
-            marketing_type TEXT NOT NULL,
-            bedrooms INTEGER,
-            bathrooms REAL,
-            price REAL,
-            listing_date TEXT,
-            status TEXT,
-            agent_id INTEGER,
-            description TEXT
-        )
-        """
-    )
-
-    conn.commit()
+        print("Database already contains data. Skipping seed operation.")
+        if owned:
+            db.close()
+        return
 
     # Sample data for agents
     agents = [
@@ -146,20 +67,10 @@ def seed_database(db_path="real_estate.db"):
     ]
 
     # Insert agents
-    for agent in agents:
-        cursor.execute(
-            """
-            INSERT INTO agents (name, phone, email, license_number, join_date, commission_rate)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            agent,
-        )
-
-    conn.commit()
+    db.add_agents_bulk(agents)
 
     # Get agent IDs for reference
-    cursor.execute("SELECT id FROM agents")
-    agent_ids = [row[0] for row in cursor.fetchall()]
+    agent_ids = [row[0] for row in db.get_agent_combo_data()]
 
     # Sample data for properties (Indian cities, localities, and INR prices)
     properties = [
@@ -276,16 +187,10 @@ def seed_database(db_path="real_estate.db"):
     ]
 
     # Insert properties
-    for prop in properties:
-        cursor.execute(
-            """
-            INSERT INTO properties (address, property_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            prop,
-        )
+    db.add_properties_bulk(properties)
 
-    conn.commit()
+    # Get property IDs for reference
+    property_ids = [row[0] for row in db.get_property_combo_data()]
 
     # Sample data for marketing
     marketing = [
@@ -401,24 +306,30 @@ def seed_database(db_path="real_estate.db"):
         ),
     ]
 
-    # Insert marketing entries
-    for prop in marketing:
-        cursor.execute(
-            """
-            INSERT INTO marketing (address, marketing_type, bedrooms, bathrooms, price, listing_date, status, agent_id, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            prop,
+    # Campaign details: linked listing, channel, registration fee, spend and a 30-day run
+    property_ids_by_address = {address: property_id for property_id, address in db.get_property_combo_data()}
+    channels = ["Property Portal", "Social Media", "Newspaper", "Email", "Hoarding"]
+    marketing = [
+        row + (
+            property_ids_by_address.get(row[0]),
+            channels[i % len(channels)],
+            2500.0,
+            float(random.choice([10000, 25000, 50000])),
+            row[5],
+            (datetime.strptime(row[5], "%Y-%m-%d") + timedelta(days=30)).strftime("%Y-%m-%d"),
         )
+        for i, row in enumerate(marketing)
+    ]
 
-    conn.commit()
+    # Insert marketing entries
+    db.add_marketing_bulk(marketing)
 
     # Sample data for inquiries (Indian names and contact info)
     inquiries = [
         (
             "Rahul Verma",
             "rahul.verma@email.com",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             (datetime.now() - timedelta(days=15)).strftime("%Y-%m-%d"),
             "New",
             "Looking for property close to his office in Mumbai. Budget 1-1.2 cr.",
@@ -427,7 +338,7 @@ def seed_database(db_path="real_estate.db"):
         (
             "Ananya Gupta",
             "9876543210",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             (datetime.now() - timedelta(days=12)).strftime("%Y-%m-%d"),
             "Contacted",
             "Called client to discuss property details. Interested in east-facing apartments only.",
@@ -436,7 +347,7 @@ def seed_database(db_path="real_estate.db"):
         (
             "Suresh Menon",
             "suresh.menon@email.com",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d"),
             "Viewing Scheduled",
             "Site visit scheduled for Sunday at 11:00 AM. Client coming with family.",
@@ -445,7 +356,7 @@ def seed_database(db_path="real_estate.db"):
         (
             "Pooja Iyer",
             "9876123450",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             (datetime.now() - timedelta(days=8)).strftime("%Y-%m-%d"),
             "Offer Made",
             "Client has submitted an offer of ₹83 lakhs. Awaiting seller response.",
@@ -454,7 +365,7 @@ def seed_database(db_path="real_estate.db"):
         (
             "Karan Malhotra",
             "karan.malhotra@email.com",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             (datetime.now() - timedelta(days=5)).strftime("%Y-%m-%d"),
             "New",
             "NRI customer looking for investment property in Bangalore. Prefers new construction.",
@@ -463,7 +374,7 @@ def seed_database(db_path="real_estate.db"):
         (
             "Neha Sharma",
             "9871234560",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             (datetime.now() - timedelta(days=3)).strftime("%Y-%m-%d"),
             "Contacted",
             "Left message. Client is looking for property for her parents. Needs ground floor.",
@@ -472,7 +383,7 @@ def seed_database(db_path="real_estate.db"):
         (
             "Arjun Nair",
             "arjun.nair@email.com",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d"),
             "New",
             "Interested in gated communities in Whitefield area. Budget up to ₹1.5 cr.",
@@ -481,7 +392,7 @@ def seed_database(db_path="real_estate.db"):
         (
             "Meera Desai",
             "9898765432",
-            random.choice([row[0] for row in properties]),
+            random.choice(property_ids),
             datetime.now().strftime("%Y-%m-%d"),
             "New",
             "First-time homebuyer looking for 2BHK in Pune. Has pre-approved loan.",
@@ -490,17 +401,9 @@ def seed_database(db_path="real_estate.db"):
     ]
 
     # Insert inquiries
-    for inquiry in inquiries:
-        cursor.execute(
-            """
-            INSERT INTO inquiries (client_name, contact_info, property_id, inquiry_date, status, notes, agent_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            inquiry,
-        )
-
-    conn.commit()
-    conn.close()
+    db.add_inquiries_bulk(inquiries)
+    if owned:
+        db.close()
 
     print("Database seeded successfully with Indian real estate sample data.")
 
@@ -0,0 +1,757 @@
+import argparse
+import math
+import random
+import sys
+import time
+from bisect import bisect
+from datetime import date, timedelta
+from functools import reduce
+from itertools import accumulate
+from string import Formatter
+
+from database import Database
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python sampler is used instead
+    np = None
+
+# Named data sizes (number of properties) for --scale
+SCALES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+DEFAULT_SEED = 42
+
+# Rows generated and written per add_*_bulk call. Each chunk has its own
+# random stream, so changing this changes the data a seed produces.
+GENERATE_CHUNK = 50_000
+
+# Table sizes relative to the number of properties
+PROPERTIES_PER_AGENT = 200
+MIN_AGENTS = 10
+INQUIRIES_PER_PROPERTY = 0.5
+
+# Agent workloads follow Zipf's law: the agent ranked r gets a share
+# proportional to 1 / r ** ZIPF_EXPONENT
+ZIPF_EXPONENT = 1.1
+
+# How far back listing, inquiry and join dates go (days)
+LISTING_DAYS = 3 * 365
+JOIN_DAYS = 10 * 365
+INQUIRY_DAYS = 2 * 365
+# Mean inquiry age: most inquiries are recent
+INQUIRY_MEAN_AGE = 90
+
+# City: (price factor, weight, [(locality, pincode), ...])
+CITIES = {
+    "Mumbai": (2.2, 14, [
+        ("Powai", "400076"), ("Andheri West", "400058"), ("Bandra West", "400050"), ("Goregaon East", "400063"),
+        ("Thane West", "400601"), ("Malad West", "400064"), ("Chembur", "400071"), ("Borivali West", "400092"),
+    ]),
+    "Bangalore": (1.4, 13, [
+        ("Whitefield", "560066"), ("Koramangala", "560034"), ("Indiranagar", "560038"), ("HSR Layout", "560102"),
+        ("Electronic City", "560100"), ("Hebbal", "560024"), ("Jayanagar", "560041"), ("Sarjapur Road", "560035"),
+    ]),
+    "Delhi": (1.7, 11, [
+        ("Dwarka", "110075"), ("Vasant Kunj", "110070"), ("Rohini", "110085"), ("Saket", "110017"),
+        ("Lajpat Nagar", "110024"), ("Janakpuri", "110058"),
+    ]),
+    "Hyderabad": (1.1, 10, [
+        ("Banjara Hills", "500034"), ("Gachibowli", "500032"), ("Kondapur", "500084"), ("Madhapur", "500081"),
+        ("Kukatpally", "500072"),
+    ]),
+    "Pune": (1.0, 9, [
+        ("Aundh", "411007"), ("Hinjewadi", "411057"), ("Kharadi", "411014"), ("Baner", "411045"),
+        ("Wakad", "411057"), ("Kothrud", "411038"),
+    ]),
+    "Chennai": (1.0, 9, [
+        ("Adyar", "600020"), ("Anna Nagar", "600040"), ("Velachery", "600042"), ("OMR", "600097"),
+        ("T Nagar", "600017"),
+    ]),
+    "Kolkata": (0.8, 7, [
+        ("Salt Lake", "700091"), ("New Town", "700156"), ("Ballygunge", "700019"), ("Behala", "700034"),
+    ]),
+    "Gurugram": (1.5, 6, [
+        ("DLF Phase 2", "122002"), ("Sohna Road", "122018"), ("Golf Course Road", "122011"), ("Sector 56", "122011"),
+    ]),
+    "Ahmedabad": (0.7, 6, [
+        ("Satellite", "380015"), ("Bopal", "380058"), ("Prahlad Nagar", "380015"), ("Vastrapur", "380015"),
+    ]),
+    "Noida": (1.0, 5, [("Sector 62", "201309"), ("Sector 150", "201310"), ("Sector 137", "201305")]),
+    "Jaipur": (0.6, 4, [("Malviya Nagar", "302017"), ("Vaishali Nagar", "302021"), ("Mansarovar", "302020")]),
+    "Kochi": (0.7, 3, [("Kakkanad", "682030"), ("Edappally", "682024"), ("Panampilly Nagar", "682036")]),
+    "Lucknow": (0.55, 3, [("Gomti Nagar", "226010"), ("Hazratganj", "226001"), ("Aliganj", "226024")]),
+    "Chandigarh": (0.9, 3, [("Sector 17", "160017"), ("Sector 35", "160022")]),
+    "Ludhiana": (0.55, 2, [("Model Town", "141002"), ("Sarabha Nagar", "141001")]),
+}
+
+# Type: (weight, base price in lakhs, lakhs per bedroom, price spread (log sigma),
+#        bedroom choices, bedroom weights); bedrooms None for plots and shops
+PROPERTY_TYPES = {
+    "Apartment": (52, 20, 25, 0.35, (1, 2, 3, 4), (18, 42, 30, 10)),
+    "Independent House": (12, 30, 30, 0.4, (2, 3, 4, 5), (20, 40, 30, 10)),
+    "Villa": (7, 60, 45, 0.4, (3, 4, 5), (35, 45, 20)),
+    "Row House": (6, 35, 30, 0.35, (2, 3, 4), (25, 50, 25)),
+    "Land": (11, 45, 0, 0.6, (None,), (1,)),
+    "Commercial": (12, 80, 0, 0.6, (None,), (1,)),
+}
+
+PROPERTY_STATUSES = (("Available", 60), ("Pending", 10), ("Sold", 25), ("Off Market", 5))
+
+# Inquiry funnel: the share of inquiries at each stage that move on to the next
+FUNNEL_STAGES = ("New", "Contacted", "Viewing Scheduled", "Offer Made", "Closed")
+FUNNEL_CONVERSION = (0.75, 0.55, 0.4, 0.5)
+# An inquiry moves at most one stage per week, and open inquiries older
+# than STALE_DAYS are cancelled with probability CANCEL_RATE
+STAGE_DAYS = 7
+STALE_DAYS = 45
+CANCEL_RATE = 0.6
+CANCELLED = "Cancelled"
+
+FIRST_NAMES = (
+    "Aarav", "Aditi", "Amit", "Ananya", "Anil", "Arjun", "Deepa", "Divya", "Farhan", "Gaurav", "Harpreet",
+    "Isha", "Kavita", "Kiran", "Lakshmi", "Manoj", "Meera", "Mohammed", "Neha", "Nikhil", "Pooja", "Prakash",
+    "Priya", "Rahul", "Rajesh", "Ravi", "Rohan", "Sanjay", "Shreya", "Sneha", "Sunil", "Suresh", "Tanvi",
+    "Vikram", "Vivek", "Zoya",
+)
+LAST_NAMES = (
+    "Agarwal", "Banerjee", "Bhat", "Chatterjee", "Das", "Desai", "Gupta", "Iyer", "Jain", "Joshi", "Kapoor",
+    "Khan", "Kulkarni", "Kumar", "Menon", "Mehta", "Mishra", "Nair", "Patel", "Pillai", "Rao", "Reddy",
+    "Saxena", "Shah", "Sharma", "Singh", "Sinha", "Srinivasan", "Verma", "Yadav",
+)
+EMAIL_DOMAINS = ("gmail.com", "yahoo.co.in", "outlook.com", "rediffmail.com", "email.com")
+AGENT_EMAIL_DOMAIN = "realestate.co.in"
+COMMISSION_RATES = (1.0, 1.5, 2.0, 2.5, 3.0)
+
+SOCIETY_NAMES = (
+    "Green", "Sun", "Palm", "Lake", "Royal", "Silver", "Lotus", "Shanti", "Ganga", "Kaveri", "Orchid",
+    "Emerald", "Sapphire", "Harmony", "Sunrise", "Skyline",
+)
+SOCIETY_SUFFIXES = ("Apartments", "Heights", "Residency", "Towers", "Enclave", "Gardens", "Park", "Meadows")
+COMMERCIAL_SUFFIXES = ("Business Park", "Trade Centre", "Plaza", "Commercial Complex")
+ROADS = ("Main Road", "Cross Road", "Link Road", "Station Road", "MG Road", "Nehru Road", "Ring Road", "Temple Street")
+AMENITIES = (
+    "swimming pool and gym", "24/7 security and power backup", "covered parking", "children's play area",
+    "clubhouse access", "metro connectivity", "a park-facing balcony", "a modular kitchen",
+)
+COMMERCIAL_AMENITIES = ("high footfall", "ample parking", "lift and power backup", "main road frontage")
+INQUIRY_NOTES = (
+    "Looking for {bhk}BHK in {locality}. Budget up to {budget}.",
+    "Interested in {locality} area, prefers ready-to-move. Budget {budget}.",
+    "First-time homebuyer, {bhk}BHK near {locality}. Has pre-approved loan up to {budget}.",
+    "Wants a {bhk}BHK close to schools in {locality}. Budget around {budget}.",
+)
+
+
+def format_inr(amount):
+    """Format a rupee amount in lakhs or crores, e.g. '₹85 lakh' or '₹1.5 cr'"""
+    if amount >= 10_000_000:
+        return f"₹{amount / 10_000_000:.1f} cr"
+    return f"₹{round(amount / 100_000)} lakh"
+
+
+def round_price(price):
+    """Round to ₹50,000 below a crore and to ₹5 lakh above, as asking prices are"""
+    step = 500_000 if price >= 10_000_000 else 50_000
+    return max(step, round(price / step) * step)
+
+
+class PythonSampler:
+    def __init__(self, seed):
+        """Random columns drawn with the standard library (used when NumPy is missing)
+
+        seed may be any hashable; the same seed gives the same columns.
+        """
+        self.rng = random.Random(repr(seed))
+
+    def random(self, n):
+        """n floats in [0, 1)"""
+        rand = self.rng.random
+        return [rand() for _ in range(n)]
+
+    def integers(self, high, n):
+        """n ints in [0, high)"""
+        rand = self.rng.random
+        return [int(rand() * high) for _ in range(n)]
+
+    def categorical(self, cum_weights, n):
+        """n indexes into cum_weights, each drawn with its share of the total weight"""
+        return self.rng.choices(range(len(cum_weights)), cum_weights=cum_weights, k=n)
+
+    def lognormal(self, sigma, n):
+        """n log-normal factors with median 1"""
+        gauss = self.rng.gauss
+        return [math.exp(gauss(0.0, sigma)) for _ in range(n)]
+
+    def exponential(self, mean, n):
+        """n exponentially distributed floats"""
+        expovariate = self.rng.expovariate
+        rate = 1.0 / mean
+        return [expovariate(rate) for _ in range(n)]
+
+    def permutation(self, n):
+        """A random ordering of range(n)"""
+        order = list(range(n))
+        self.rng.shuffle(order)
+        return order
+
+
+class NumpyColumns:
+    def __init__(self, rng):
+        """NumpySampler's draws as NumPy arrays, for the vectorised row builders"""
+        self.rng = rng
+
+    def random(self, n):
+        """n floats in [0, 1)"""
+        return self.rng.random(n)
+
+    def integers(self, high, n):
+        """n ints in [0, high)"""
+        return self.rng.integers(0, high, n)
+
+    def categorical(self, cum_weights, n):
+        """n indexes into cum_weights, each drawn with its share of the total weight"""
+        cum_weights = np.asarray(cum_weights, dtype=float)
+        return np.searchsorted(cum_weights, self.rng.random(n) * cum_weights[-1], side="right")
+
+    def lognormal(self, sigma, n):
+        """n log-normal factors with median 1"""
+        return self.rng.lognormal(0.0, sigma, n)
+
+    def exponential(self, mean, n):
+        """n exponentially distributed floats"""
+        return self.rng.exponential(mean, n)
+
+
+class NumpySampler:
+    def __init__(self, seed):
+        """The PythonSampler interface, drawn as NumPy arrays and returned as lists
+
+        seed is a tuple of non-negative ints. The draws differ from
+        PythonSampler's, so a seed reproduces its data only on the same sampler.
+        columns draws from the same stream without the conversion to lists.
+        """
+        self.rng = np.random.default_rng(list(seed))
+        self.columns = NumpyColumns(self.rng)
+
+    def random(self, n):
+        """n floats in [0, 1)"""
+        return self.columns.random(n).tolist()
+
+    def integers(self, high, n):
+        """n ints in [0, high)"""
+        return self.columns.integers(high, n).tolist()
+
+    def categorical(self, cum_weights, n):
+        """n indexes into cum_weights, each drawn with its share of the total weight"""
+        return self.columns.categorical(cum_weights, n).tolist()
+
+    def lognormal(self, sigma, n):
+        """n log-normal factors with median 1"""
+        return self.columns.lognormal(sigma, n).tolist()
+
+    def exponential(self, mean, n):
+        """n exponentially distributed floats"""
+        return self.columns.exponential(mean, n).tolist()
+
+    def permutation(self, n):
+        """A random ordering of range(n)"""
+        return self.rng.permutation(n).tolist()
+
+
+def join_columns(*parts):
+    """Concatenate string arrays (and plain strings) element-wise"""
+    return reduce(np.char.add, parts)
+
+
+def round_prices(prices):
+    """round_price over an array of prices"""
+    steps = np.where(prices >= 10_000_000, 500_000, 50_000)
+    return np.maximum(steps, np.rint(prices / steps) * steps).astype(np.int64)
+
+
+# Streams seeded per (seed, table, chunk), so any chunk can be regenerated alone
+STREAMS = ("agents", "zipf", "properties", "inquiries")
+
+
+class SyntheticData:
+    def __init__(self, properties, seed=DEFAULT_SEED, end_date=None, use_numpy=None):
+        """Generate reproducible agents, properties and inquiries for `properties` listings
+
+        Dates run back from end_date (default: today); pass a fixed end_date
+        as well as the seed to get identical data on another day. use_numpy
+        picks the sampler (default: NumPy when it is installed).
+        """
+        if use_numpy is None:
+            use_numpy = np is not None
+        elif use_numpy and np is None:
+            raise ValueError("NumPy is not installed")
+        if properties < 0:
+            raise ValueError("The number of properties can't be negative")
+
+        self.properties = properties
+        self.agents = max(MIN_AGENTS, properties // PROPERTIES_PER_AGENT)
+        self.inquiries = int(properties * INQUIRIES_PER_PROPERTY)
+        self.seed = seed
+        self.use_numpy = use_numpy
+        self.end_date = end_date or date.today()
+
+        # Lookup tables, so rows index into lists instead of formatting dates or searching
+        self._dates = [
+            (self.end_date - timedelta(days=days)).strftime("%Y-%m-%d")
+            for days in range(max(LISTING_DAYS, JOIN_DAYS, INQUIRY_DAYS) + 1)
+        ]
+        self._cities = list(CITIES.items())
+        self._city_weights = list(accumulate(weight for _, (_, weight, _) in self._cities))
+        self._types = list(PROPERTY_TYPES.items())
+        self._type_weights = list(accumulate(spec[0] for _, spec in self._types))
+        self._bedroom_weights = [list(accumulate(spec[5])) for _, spec in self._types]
+        self._status_weights = list(accumulate(weight for _, weight in PROPERTY_STATUSES))
+        if use_numpy:
+            self._numpy_tables()
+
+    def _numpy_tables(self):
+        """The lookup tables as arrays, with the localities of all cities in one"""
+        self._np_dates = np.array(self._dates)
+        self._np_city_names = np.array([city for city, _ in self._cities])
+        self._np_city_factors = np.array([factor for _, (factor, _, _) in self._cities])
+        self._np_locality_counts = np.array([len(localities) for _, (_, _, localities) in self._cities])
+        self._np_locality_starts = np.cumsum(self._np_locality_counts) - self._np_locality_counts
+        places = [place for _, (_, _, localities) in self._cities for place in localities]
+        self._np_localities = np.array([locality for locality, _ in places])
+        self._np_pincodes = np.array([pincode for _, pincode in places])
+        self._np_type_names = np.array([type_name for type_name, _ in self._types])
+        self._np_statuses = np.array([status for status, _ in PROPERTY_STATUSES])
+
+    def sampler(self, stream, chunk=0):
+        """The random source for one chunk of one table"""
+        if self.use_numpy:
+            return NumpySampler((self.seed, STREAMS.index(stream), chunk))
+        return PythonSampler((self.seed, stream, chunk))
+
+    def chunks(self, total):
+        """(chunk number, first offset, row count) for `total` rows"""
+        for chunk, start in enumerate(range(0, total, GENERATE_CHUNK)):
+            yield chunk, start, min(GENERATE_CHUNK, total - start)
+
+    def agent_weights(self):
+        """Cumulative Zipf weights over the agents, in a seeded random order"""
+        order = self.sampler("zipf").permutation(self.agents)
+        weights = [0.0] * self.agents
+        for rank, agent in enumerate(order, 1):
+            weights[agent] = 1.0 / rank ** ZIPF_EXPONENT
+        return list(accumulate(weights))
+
+    def agent_rows(self, chunk, start, count, first_id=1):
+        """Rows for add_agents_bulk; first_id is the id the first agent will get"""
+        sample = self.sampler("agents", chunk)
+        rows = []
+        for i, first, last, mobile, joined, rate in zip(
+            range(start, start + count),
+            sample.integers(len(FIRST_NAMES), count),
+            sample.integers(len(LAST_NAMES), count),
+            sample.integers(4_000_000_000, count),
+            sample.integers(JOIN_DAYS, count),
+            sample.integers(len(COMMISSION_RATES), count),
+        ):
+            first, last = FIRST_NAMES[first], LAST_NAMES[last]
+            rows.append(
+                (
+                    f"{first} {last}",
+                    str(6_000_000_000 + mobile),
+                    f"{first}.{last}{first_id + i}@{AGENT_EMAIL_DOMAIN}".lower(),
+                    f"RERA{first_id + i:07d}",
+                    self._dates[joined],
+                    COMMISSION_RATES[rate],
+                )
+            )
+        return rows
+
+    def _address(self, type_name, locality, city, pincode, number, block, society):
+        """A street address in the style of the sample data"""
+        place = f"{locality}, {city} {pincode}"
+        if type_name == "Apartment":
+            floor, unit = divmod(number % 2500, 100)
+            return f"{'ABCDEF'[block % 6]}-{floor + 1}{unit % 8 + 1:02d}, {society}, {place}"
+        if type_name == "Villa":
+            return f"Villa {number % 300 + 1}, {society}, {place}"
+        if type_name == "Row House":
+            return f"{'ABCDEF'[block % 6]}-{number % 80 + 1}, {society}, {place}"
+        if type_name == "Land":
+            return f"Plot {number % 900 + 1}, {place}"
+        if type_name == "Commercial":
+            name = f"{SOCIETY_NAMES[block % len(SOCIETY_NAMES)]} {COMMERCIAL_SUFFIXES[block % len(COMMERCIAL_SUFFIXES)]}"
+            return f"Shop {number % 200 + 1}, {name}, {place}"
+        return f"{number % 400 + 1}, {ROADS[block % len(ROADS)]}, {place}"
+
+    def _description(self, type_name, bedrooms, locality, city, amenity, area):
+        """A one-line listing description"""
+        if type_name == "Land":
+            return f"{area * 10} sq ft residential plot in {locality}, {city}. Clear title, ready for construction."
+        if type_name == "Commercial":
+            return f"{area * 5} sq ft commercial space in {locality} with {COMMERCIAL_AMENITIES[amenity % 4]}."
+        return f"Spacious {bedrooms}BHK {type_name.lower()} in {locality}, {city} with {AMENITIES[amenity % len(AMENITIES)]}."
+
+    def property_rows(self, chunk, start, count, agent_ids, agent_weights):
+        """Rows for add_properties_bulk, with agents drawn by their Zipf weights"""
+        if self.use_numpy:
+            return self._numpy_property_rows(chunk, count, agent_ids, agent_weights)
+        sample = self.sampler("properties", chunk)
+        rows = []
+        for city, locality, type_index, bedroom_u, spread, bath_u, listed, status, agent, number, block, society, suffix, amenity, area in zip(
+            sample.categorical(self._city_weights, count),
+            sample.random(count),
+            sample.categorical(self._type_weights, count),
+            sample.random(count),
+            sample.lognormal(1.0, count),
+            sample.random(count),
+            sample.integers(LISTING_DAYS, count),
+            sample.categorical(self._status_weights, count),
+            sample.categorical(agent_weights, count),
+            sample.integers(100_000, count),
+            sample.integers(1_000, count),
+            sample.integers(len(SOCIETY_NAMES), count),
+            sample.integers(len(SOCIETY_SUFFIXES), count),
+            sample.integers(1_000, count),
+            sample.integers(400, count),
+        ):
+            city, (factor, _, localities) = self._cities[city]
+            locality, pincode = localities[int(locality * len(localities))]
+            type_name, (_, base, per_bedroom, sigma, bedroom_choices, _) = self._types[type_index]
+            bedrooms = bedroom_choices[bisect(self._bedroom_weights[type_index], bedroom_u * self._bedroom_weights[type_index][-1])]
+
+            # Spread is drawn with sigma 1 and scaled per type: exp(N(0, 1)) ** sigma = exp(N(0, sigma))
+            price = round_price((base + per_bedroom * (bedrooms or 0)) * 100_000 * factor * spread ** sigma)
+            if bedrooms is None:
+                bathrooms = None if type_name == "Land" else 1 + int(bath_u * 2)
+            else:
+                # Usually one bathroom per bedroom, sometimes one fewer; villas add a powder room
+                bathrooms = max(1, bedrooms - (bath_u < 0.35)) + (0.5 if type_name == "Villa" else 0)
+
+            rows.append(
+                (
+                    self._address(type_name, locality, city, pincode, number, block, f"{SOCIETY_NAMES[society]} {SOCIETY_SUFFIXES[suffix]}"),
+                    type_name,
+                    bedrooms,
+                    bathrooms,
+                    price,
+                    self._dates[listed],
+                    PROPERTY_STATUSES[status][0],
+                    agent_ids[agent],
+                    self._description(type_name, bedrooms, locality, city, amenity, 50 + area),
+                )
+            )
+        return rows
+
+    def _numpy_property_rows(self, chunk, count, agent_ids, agent_weights):
+        """property_rows built a column at a time (and a type at a time) from NumPy arrays
+
+        The draws and the rows are the same as property_rows makes with the
+        NumPy sampler; only the final tuples are put together in Python.
+        """
+        sample = self.sampler("properties", chunk).columns
+        city = sample.categorical(self._city_weights, count)
+        locality_u = sample.random(count)
+        type_index = sample.categorical(self._type_weights, count)
+        bedroom_u = sample.random(count)
+        spread = sample.lognormal(1.0, count)
+        bath_u = sample.random(count)
+        listed = sample.integers(LISTING_DAYS, count)
+        status = sample.categorical(self._status_weights, count)
+        agent = sample.categorical(agent_weights, count)
+        number = sample.integers(100_000, count)
+        block = sample.integers(1_000, count)
+        society = sample.integers(len(SOCIETY_NAMES), count)
+        suffix = sample.integers(len(SOCIETY_SUFFIXES), count)
+        amenity = sample.integers(1_000, count)
+        area = 50 + sample.integers(400, count)
+
+        place_index = self._np_locality_starts[city] + (locality_u * self._np_locality_counts[city]).astype(np.int64)
+        localities, cities = self._np_localities[place_index], self._np_city_names[city]
+        place = join_columns(localities, ", ", cities, " ", self._np_pincodes[place_index])
+        societies = join_columns(np.array(SOCIETY_NAMES)[society], " ", np.array(SOCIETY_SUFFIXES)[suffix])
+        blocks = np.array(list("ABCDEF"))[block % 6]
+
+        addresses = np.empty(count, dtype=object)
+        descriptions = np.empty(count, dtype=object)
+        bedrooms = np.full(count, None, dtype=object)
+        bathrooms = np.full(count, None, dtype=object)
+        prices = np.empty(count, dtype=object)
+        for index, (type_name, (_, base, per_bedroom, sigma, bedroom_choices, _)) in enumerate(self._types):
+            rows = type_index == index
+            if not rows.any():
+                continue
+            weights = self._bedroom_weights[index]
+            drawn = np.searchsorted(weights, bedroom_u[rows] * weights[-1], side="right")
+            numbers, row_blocks, row_place = number[rows], block[rows], place[rows]
+            row_localities, row_cities = localities[rows], cities[rows]
+
+            if bedroom_choices[0] is None:
+                beds = np.zeros(len(drawn), dtype=np.int64)
+                if type_name != "Land":
+                    bathrooms[rows] = (1 + (bath_u[rows] * 2).astype(np.int64)).tolist()
+            else:
+                beds = np.array(bedroom_choices)[drawn]
+                bedrooms[rows] = beds.tolist()
+                baths = np.maximum(1, beds - (bath_u[rows] < 0.35))
+                bathrooms[rows] = (baths + 0.5).tolist() if type_name == "Villa" else baths.tolist()
+
+            # Spread is drawn with sigma 1 and scaled per type, as in property_rows
+            price = (base + per_bedroom * beds) * 100_000 * self._np_city_factors[city[rows]] * spread[rows] ** sigma
+            prices[rows] = round_prices(price).tolist()
+
+            if type_name == "Apartment":
+                floor, unit = np.divmod(numbers % 2500, 100)
+                address = join_columns(
+                    blocks[rows], "-", (floor + 1).astype(str), np.char.zfill((unit % 8 + 1).astype(str), 2), ", ",
+                    societies[rows], ", ", row_place,
+                )
+            elif type_name == "Villa":
+                address = join_columns("Villa ", (numbers % 300 + 1).astype(str), ", ", societies[rows], ", ", row_place)
+            elif type_name == "Row House":
+                address = join_columns(blocks[rows], "-", (numbers % 80 + 1).astype(str), ", ", societies[rows], ", ", row_place)
+            elif type_name == "Land":
+                address = join_columns("Plot ", (numbers % 900 + 1).astype(str), ", ", row_place)
+            elif type_name == "Commercial":
+                name = join_columns(
+                    np.array(SOCIETY_NAMES)[row_blocks % len(SOCIETY_NAMES)], " ",
+                    np.array(COMMERCIAL_SUFFIXES)[row_blocks % len(COMMERCIAL_SUFFIXES)],
+                )
+                address = join_columns("Shop ", (numbers % 200 + 1).astype(str), ", ", name, ", ", row_place)
+            else:
+                address = join_columns(
+                    (numbers % 400 + 1).astype(str), ", ", np.array(ROADS)[row_blocks % len(ROADS)], ", ", row_place
+                )
+            addresses[rows] = address.tolist()
+
+            row_areas, row_amenities = area[rows], amenity[rows]
+            if type_name == "Land":
+                description = join_columns(
+                    (row_areas * 10).astype(str), " sq ft residential plot in ", row_localities, ", ", row_cities,
+                    ". Clear title, ready for construction.",
+                )
+            elif type_name == "Commercial":
+                description = join_columns(
+                    (row_areas * 5).astype(str), " sq ft commercial space in ", row_localities, " with ",
+                    np.array(COMMERCIAL_AMENITIES)[row_amenities % 4], ".",
+                )
+            else:
+                description = join_columns(
+                    "Spacious ", beds.astype(str), f"BHK {type_name.lower()} in ", row_localities, ", ", row_cities,
+                    " with ", np.array(AMENITIES)[row_amenities % len(AMENITIES)], ".",
+                )
+            descriptions[rows] = description.tolist()
+
+        return list(
+            zip(
+                addresses.tolist(),
+                self._np_type_names[type_index].tolist(),
+                bedrooms.tolist(),
+                bathrooms.tolist(),
+                prices.tolist(),
+                self._np_dates[listed].tolist(),
+                self._np_statuses[status].tolist(),
+                np.asarray(agent_ids)[agent].tolist(),
+                descriptions.tolist(),
+            )
+        )
+
+    def inquiry_status(self, age, draws, cancel_draw):
+        """Walk an inquiry down the funnel: one stage per successful draw, at most one a week"""
+        stage = 0
+        limit = min(len(FUNNEL_CONVERSION), age // STAGE_DAYS + 1)
+        while stage < limit and draws[stage] < FUNNEL_CONVERSION[stage]:
+            stage += 1
+        if stage < len(FUNNEL_CONVERSION) and age >= STALE_DAYS and cancel_draw < CANCEL_RATE:
+            return CANCELLED
+        return FUNNEL_STAGES[stage]
+
+    def inquiry_rows(self, chunk, start, count, property_ids, agent_ids, agent_weights):
+        """Rows for add_inquiries_bulk about the given property ids"""
+        if self.use_numpy:
+            return self._numpy_inquiry_rows(chunk, start, count, property_ids, agent_ids, agent_weights)
+        sample = self.sampler("inquiries", chunk)
+        localities = [locality for _, (_, _, places) in self._cities for locality, _ in places]
+        stage_draws = list(zip(*(sample.random(count) for _ in FUNNEL_CONVERSION)))
+        rows = []
+        for i, first, last, contact, mobile, domain, prop, age, draws, cancel_draw, agent, note, bhk, locality, budget in zip(
+            range(start, start + count),
+            sample.integers(len(FIRST_NAMES), count),
+            sample.integers(len(LAST_NAMES), count),
+            sample.random(count),
+            sample.integers(4_000_000_000, count),
+            sample.integers(len(EMAIL_DOMAINS), count),
+            sample.integers(len(property_ids), count),
+            sample.exponential(INQUIRY_MEAN_AGE, count),
+            stage_draws,
+            sample.random(count),
+            sample.categorical(agent_weights, count),
+            sample.integers(len(INQUIRY_NOTES), count),
+            sample.integers(3, count),
+            sample.integers(len(localities), count),
+            sample.lognormal(0.5, count),
+        ):
+            first, last = FIRST_NAMES[first], LAST_NAMES[last]
+            age = min(int(age), INQUIRY_DAYS)
+            if contact < 0.5:
+                contact_info = str(6_000_000_000 + mobile)
+            else:
+                contact_info = f"{first}.{last}{i}@{EMAIL_DOMAINS[domain]}".lower()
+            rows.append(
+                (
+                    f"{first} {last}",
+                    contact_info,
+                    property_ids[prop],
+                    self._dates[age],
+                    self.inquiry_status(age, draws, cancel_draw),
+                    INQUIRY_NOTES[note].format(
+                        bhk=bhk + 2, locality=localities[locality], budget=format_inr(round_price(7_500_000 * budget))
+                    ),
+                    agent_ids[agent],
+                )
+            )
+        return rows
+
+    def _numpy_inquiry_rows(self, chunk, start, count, property_ids, agent_ids, agent_weights):
+        """inquiry_rows built a column at a time from NumPy arrays (the same draws and rows)"""
+        sample = self.sampler("inquiries", chunk).columns
+        localities = np.array([locality for _, (_, _, places) in self._cities for locality, _ in places])
+        stage_draws = [sample.random(count) for _ in FUNNEL_CONVERSION]
+        first = np.array(FIRST_NAMES)[sample.integers(len(FIRST_NAMES), count)]
+        last = np.array(LAST_NAMES)[sample.integers(len(LAST_NAMES), count)]
+        contact = sample.random(count)
+        mobile = sample.integers(4_000_000_000, count)
+        domain = np.array(EMAIL_DOMAINS)[sample.integers(len(EMAIL_DOMAINS), count)]
+        prop = sample.integers(len(property_ids), count)
+        age = np.minimum(sample.exponential(INQUIRY_MEAN_AGE, count).astype(np.int64), INQUIRY_DAYS)
+        cancel_draw = sample.random(count)
+        agent = sample.categorical(agent_weights, count)
+        note = sample.integers(len(INQUIRY_NOTES), count)
+        bhk = sample.integers(3, count)
+        locality = sample.integers(len(localities), count)
+        budget = round_prices(7_500_000 * sample.lognormal(0.5, count))
+
+        # inquiry_status for every row: the stages passed in a row, up to one a week
+        limit = np.minimum(len(FUNNEL_CONVERSION), age // STAGE_DAYS + 1)
+        moving = np.ones(count, dtype=bool)
+        stage = np.zeros(count, dtype=np.int64)
+        for step, (draws, conversion) in enumerate(zip(stage_draws, FUNNEL_CONVERSION)):
+            moving &= (step < limit) & (draws < conversion)
+            stage += moving
+        cancelled = (stage < len(FUNNEL_CONVERSION)) & (age >= STALE_DAYS) & (cancel_draw < CANCEL_RATE)
+        statuses = np.where(cancelled, CANCELLED, np.array(FUNNEL_STAGES)[stage])
+
+        emails = np.char.lower(join_columns(first, ".", last, np.arange(start, start + count).astype(str), "@", domain))
+        contact_info = np.where(contact < 0.5, (6_000_000_000 + mobile).astype(str), emails)
+
+        # format_inr of every budget, then each note template filled in with its rows' values
+        budgets = np.where(
+            budget >= 10_000_000,
+            join_columns("₹", np.char.mod("%.1f", budget / 10_000_000), " cr"),
+            join_columns("₹", np.rint(budget / 100_000).astype(np.int64).astype(str), " lakh"),
+        )
+        values = {"bhk": (bhk + 2).astype(str), "locality": localities[locality], "budget": budgets}
+        notes = np.empty(count, dtype=object)
+        for index, template in enumerate(INQUIRY_NOTES):
+            rows = note == index
+            parts = []
+            for literal, field, _, _ in Formatter().parse(template):
+                parts.append(literal)
+                if field is not None:
+                    parts.append(values[field][rows])
+            notes[rows] = join_columns(*parts).tolist()
+
+        return list(
+            zip(
+                join_columns(first, " ", last).tolist(),
+                contact_info.tolist(),
+                np.asarray(property_ids)[prop].tolist(),
+                self._np_dates[age].tolist(),
+                statuses.tolist(),
+                notes.tolist(),
+                np.asarray(agent_ids)[agent].tolist(),
+            )
+        )
+
+
+def generate(db, properties, seed=DEFAULT_SEED, end_date=None, use_numpy=None, progress=None):
+    """Fill `db` with synthetic agents, properties and inquiries through the bulk insert path
+
+    Rows are generated and written GENERATE_CHUNK at a time (one transaction
+    each), so memory stays flat at any size. progress(table, done, total) is
+    called after each chunk. Returns {table: rows inserted}.
+    """
+    data = SyntheticData(properties, seed, end_date, use_numpy)
+    report = progress or (lambda table, done, total: None)
+
+    # The ids are read back after the inserts: AUTOINCREMENT continues from
+    # the highest id ever given out, which rows deleted since may leave above MAX(id)
+    agent_seq = db.get_id_sequence("agents")
+    for chunk, start, count in data.chunks(data.agents):
+        db.add_agents_bulk(data.agent_rows(chunk, start, count, agent_seq + 1))
+        report("agents", start + count, data.agents)
+    agent_ids = db.get_ids_after("agents", agent_seq)
+    agent_weights = data.agent_weights()
+
+    property_seq = db.get_id_sequence("properties")
+    for chunk, start, count in data.chunks(data.properties):
+        db.add_properties_bulk(data.property_rows(chunk, start, count, agent_ids, agent_weights))
+        report("properties", start + count, data.properties)
+    property_ids = db.get_ids_after("properties", property_seq)
+
+    inquiries = data.inquiries if property_ids else 0
+    for chunk, start, count in data.chunks(inquiries):
+        db.add_inquiries_bulk(data.inquiry_rows(chunk, start, count, property_ids, agent_ids, agent_weights))
+        report("inquiries", start + count, inquiries)
+
+    return {"agents": data.agents, "properties": data.properties, "inquiries": inquiries}
+
+
+def parse_scale(text):
+    """Return the number of properties for '100k', '1m', ... or a plain number"""
+    text = text.strip().lower().replace("_", "")
+    if text in SCALES:
+        return SCALES[text]
+    try:
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(SCALES)} or a number, not '{text}'")
+
+
+def main(argv=None):
+    """Generate synthetic data from the command line"""
+    parser = argparse.ArgumentParser(description="Fill a database with reproducible synthetic real estate data")
+    parser.add_argument("scale", type=parse_scale, help=f"number of properties, or one of {', '.join(SCALES)}")
+    parser.add_argument("--db", default="real_estate.db", help="database file (default: real_estate.db)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"random seed (default: {DEFAULT_SEED})")
+    parser.add_argument(
+        "--end-date", type=date.fromisoformat, help="latest listing/inquiry date, YYYY-MM-DD (default: today)"
+    )
+    parser.add_argument("--no-numpy", action="store_true", help="use the pure-Python generator even if NumPy is installed")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def progress(table, done, total):
+        print(f"\r{table}: {done:,}/{total:,} ({time.perf_counter() - started:.1f}s)", end="", flush=True)
+        if done == total:
+            print()
+
+    db = Database(args.db)
+    try:
+        counts = generate(db, args.scale, args.seed, args.end_date, False if args.no_numpy else None, progress)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        db.close()
+    total = sum(counts.values())
+    print(f"Generated {total:,} rows in {time.perf_counter() - started:.1f}s into {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
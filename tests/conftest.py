@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The application modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A new, fully migrated database file"""
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
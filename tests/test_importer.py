@@ -0,0 +1,106 @@
+import csv
+
+import pytest
+
+from importer import import_rows
+
+HEADER = ["address", "type", "bedrooms", "bathrooms", "price", "listing_date", "agent", "latitude", "longitude"]
+
+
+def read_rejects(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))[1:]
+
+
+@pytest.fixture
+def agents(db):
+    """Two agents sharing a name, told apart by their licence numbers, and one more"""
+    return {
+        "first": db.add_agent("Ravi Kumar", "", "", "KA-001", 2.0),
+        "second": db.add_agent("Ravi Kumar", "", "", "KA-002", 2.0),
+        "other": db.add_agent("Meera Iyer", "", "", "MH-100", 1.5),
+    }
+
+
+def test_valid_rows_are_imported(db, agents, tmp_path):
+    rows = [
+        HEADER,
+        ["12 MG Road, Bengaluru", "Apartment", "2", "2", "8500000", "2024-03-01", "Meera Iyer", "", ""],
+        ["4 Hill Road, Bandra, Mumbai", "Villa", "", "", "", "", "KA-002", "19.05", "72.83"],
+    ]
+    reject_path = tmp_path / "rejects.csv"
+    assert import_rows(db, "properties", rows, str(reject_path)) == (2, 0)
+    assert not reject_path.exists()
+
+    with db.pool.reader() as conn:
+        saved = conn.execute(
+            "SELECT bedrooms, bathrooms, price, listing_date, agent_id, latitude, coordinates_manual FROM properties ORDER BY id"
+        ).fetchall()
+    # Blank numbers read as 0; rows without coordinates are placed at their locality's centre
+    assert saved[0][:5] == (2, 2.0, 8500000.0, "2024-03-01", agents["other"])
+    assert saved[0][6] == 0
+    assert saved[1][:3] == (0, 0.0, 0.0)
+    assert saved[1][4:] == (agents["second"], 19.05, 1)
+
+
+@pytest.mark.parametrize(
+    "row, error",
+    [
+        (["", "Apartment"], "Address and Property Type are required fields"),
+        (["12 MG Road, Bengaluru", ""], "Address and Property Type are required fields"),
+        (["12 MG Road, Bengaluru", "Apartment", "two"], "invalid literal"),
+        (["12 MG Road, Bengaluru", "Apartment", "2", "nan"], "Bathrooms must be a finite number"),
+        (["12 MG Road, Bengaluru", "Apartment", "2", "2", "inf"], "Price must be a finite number"),
+        (["12 MG Road, Bengaluru", "Apartment", "2", "2", "1", "01/03/2024"], "Invalid isoformat"),
+        (["12 MG Road, Bengaluru", "Apartment", "2", "2", "1", "", "Nobody"], "Unknown agent 'Nobody'"),
+        (["12 MG Road, Bengaluru", "Apartment", "2", "2", "1", "", "ravi kumar"], "is ambiguous"),
+        (["12 MG Road, Bengaluru", "Apartment", "2", "2", "1", "", "", "12.9"], "Latitude and longitude go together"),
+        (["12 MG Road, Bengaluru", "Apartment", "2", "2", "1", "", "", "95", "77.6"], "Coordinates out of range"),
+    ],
+)
+def test_invalid_rows_are_rejected_with_their_line_and_reason(db, agents, tmp_path, row, error):
+    rows = [HEADER, ["1 Park Street, Kolkata", "Flat"], row]
+    reject_path = tmp_path / "rejects.csv"
+    assert import_rows(db, "properties", rows, str(reject_path)) == (1, 1)
+
+    (rejected,) = read_rejects(reject_path)
+    assert rejected[0] == "3"
+    assert error in rejected[1]
+    assert rejected[2:] == row
+
+
+def test_unknown_agent_id_is_rejected(db, agents):
+    rows = [["address", "type", "agent_id"], ["12 MG Road, Bengaluru", "Apartment", str(max(agents.values()) + 1)]]
+    assert import_rows(db, "properties", rows) == (0, 1)
+
+
+def test_blank_lines_are_skipped(db):
+    rows = [["address", "type"], [], ["", ""], ["12 MG Road, Bengaluru", "Apartment"]]
+    assert import_rows(db, "properties", rows) == (1, 0)
+
+
+def test_agent_rows_reject_a_non_finite_commission(db, tmp_path):
+    rows = [["Name", "Commission Rate"], ["Meera Iyer", "1.5"], ["Ravi Kumar", "nan"], ["", "2"]]
+    reject_path = tmp_path / "rejects.csv"
+    assert import_rows(db, "agents", rows, str(reject_path)) == (1, 2)
+    assert [rejected[1] for rejected in read_rejects(reject_path)] == [
+        "Commission rate must be a finite number, not 'nan'",
+        "Agent Name is a required field",
+    ]
+
+
+@pytest.mark.parametrize(
+    "rows, error",
+    [
+        ([], "The file is empty"),
+        ([["address", "bedrooms"]], "Missing required column(s): property_type"),
+    ],
+)
+def test_unusable_files_raise(db, rows, error):
+    with pytest.raises(ValueError, match=error.replace("(", r"\(").replace(")", r"\)")):
+        import_rows(db, "properties", rows)
+
+
+def test_unknown_table_raises(db):
+    with pytest.raises(ValueError, match="Unknown table"):
+        import_rows(db, "inquiries", [["client_name"]])
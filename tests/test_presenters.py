@@ -0,0 +1,62 @@
+import pytest
+
+from presenters import (
+    NO_AGENT, NO_PROPERTY, UNASSIGNED, format_baths, format_commission, format_duplicate_note, format_facet_choices,
+    format_funnel_rows, format_inquiry_rows, format_price, format_property_rows, parse_number,
+)
+
+
+@pytest.mark.parametrize(
+    "price, shown",
+    [(None, ""), (0, "₹0.00 L"), (8500000, "₹85.00 L"), (9999999, "₹100.00 L"), (10000000, "₹1.00 Cr"), (125000000, "₹12.50 Cr")],
+)
+def test_format_price(price, shown):
+    assert format_price(price) == shown
+
+
+@pytest.mark.parametrize("bathrooms, shown", [(None, 0), (0, 0), (2, 2), (2.0, 2), (2.5, 2.5)])
+def test_format_baths(bathrooms, shown):
+    assert format_baths(bathrooms) == shown
+
+
+def test_format_commission():
+    assert format_commission(2.5) == "2.5%"
+    assert format_commission(None) == "0.0%"
+
+
+def test_format_property_rows_fills_missing_values_and_ignores_extra_columns():
+    rows = [(1, "12 MG Road", "Apartment", None, 2.0, 8500000, "Available", None, "extra")]
+    assert format_property_rows(rows) == [(1, "12 MG Road", "Apartment", 0, 2, "₹85.00 L", "Available", NO_AGENT)]
+
+
+def test_format_inquiry_rows_fills_missing_values():
+    rows = [(3, "Asha", None, "2024-01-02", None, None)]
+    assert format_inquiry_rows(rows) == [(3, "Asha", NO_PROPERTY, "2024-01-02", "New", UNASSIGNED)]
+
+
+def test_format_funnel_rows_orders_by_funnel_and_shares_the_total():
+    rows = [("Closed", 1), ("Zebra", 1), ("New", 2)]
+    assert format_funnel_rows(rows) == [("New", 2, "50.0%"), ("Closed", 1, "25.0%"), ("Zebra", 1, "25.0%")]
+    assert format_funnel_rows([("New", 0)]) == [("New", 0, "0.0%")]
+
+
+def test_format_facet_choices_leaves_out_missing_values():
+    rows = [("Apartment", 52043), (None, 3), ("Villa", 7)]
+    assert format_facet_choices(rows) == {"Apartment (52,043)": "Apartment", "Villa (7)": "Villa"}
+
+
+def test_format_duplicate_note():
+    assert format_duplicate_note([], "It looks like a duplicate of listing") == ""
+    note = format_duplicate_note([(12, 0.92)], "It looks like a duplicate of listing")
+    assert note == "\n\nIt looks like a duplicate of listing #12 (92%); review it under Duplicates."
+
+
+def test_parse_number():
+    assert parse_number("", "Price") == 0
+    assert parse_number(" 2.5 ", "Bathrooms") == 2.5
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-Infinity", "abc"])
+def test_parse_number_rejects_non_finite_and_non_numbers(value):
+    with pytest.raises(ValueError):
+        parse_number(value, "Price")
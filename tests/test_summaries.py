@@ -0,0 +1,96 @@
+"""The summary tables must always equal a GROUP BY over their base tables, whichever write path changed them"""
+import pytest
+
+from importer import import_rows
+from migrations import SUMMARY_KEYS, SUMMARY_TABLES
+
+ADDRESSES = (
+    "12 MG Road, Indiranagar, Bengaluru",
+    "4 Hill Road, Bandra, Mumbai",
+    "7 FC Road, Shivajinagar, Pune",
+    "1 Nowhere Lane",
+)
+
+
+def grouped(conn, summary):
+    """The rows `summary` should hold, added up from its base table"""
+    table, keys, values = SUMMARY_TABLES[summary]
+    groups = [SUMMARY_KEYS.get(key, (None, f"COALESCE({{row}}.{key}, '')"))[1].format(row=table) for key in keys]
+    sums = [f"SUM({value.format(row=table)})" for _, value in values]
+    positions = ", ".join(str(position) for position in range(1, len(keys) + 1))
+    return conn.execute(f"SELECT {', '.join(groups + sums)} FROM {table} GROUP BY {positions} ORDER BY {positions}").fetchall()
+
+
+def stored(conn, summary):
+    _, keys, values = SUMMARY_TABLES[summary]
+    columns = ", ".join(list(keys) + [column for column, _ in values])
+    positions = ", ".join(str(position) for position in range(1, len(keys) + 1))
+    return conn.execute(f"SELECT {columns} FROM {summary} ORDER BY {positions}").fetchall()
+
+
+def assert_summaries_exact(db):
+    with db.pool.reader() as conn:
+        for summary in SUMMARY_TABLES:
+            assert stored(conn, summary) == grouped(conn, summary), summary
+
+
+def listing(position, agent_id):
+    """An add_properties_bulk row; every few rows leaves the price, rooms or agent blank"""
+    return (
+        f"{position} {ADDRESSES[position % len(ADDRESSES)]}",
+        ("Apartment", "Villa", "Plot")[position % 3],
+        None if position % 5 == 0 else position % 4 + 1,
+        None if position % 7 == 0 else (1, 1.5, 2)[position % 3],
+        None if position % 6 == 0 else 1500000 * (position % 40 + 1),
+        "2024-01-01",
+        ("Available", "Sold", "Under Contract")[position % 3],
+        None if position % 4 == 0 else agent_id,
+        "",
+    )
+
+
+@pytest.fixture
+def agent_ids(db):
+    return [db.add_agent(f"Agent {position}", "", "", f"LIC-{position}", 2.0) for position in range(3)]
+
+
+def test_bulk_insert_keeps_summaries_exact(db, agent_ids):
+    db.add_properties_bulk(listing(position, agent_ids[position % 3]) for position in range(200))
+    db.add_inquiries_bulk(
+        (f"Client {position}", "", position % 50 + 1, "2024-02-01", ("New", "Contacted", None)[position % 3], "", None)
+        for position in range(60)
+    )
+    assert_summaries_exact(db)
+
+    # A second batch adds to the groups the first one created
+    db.add_properties_bulk(listing(position, agent_ids[0]) for position in range(200, 260))
+    assert_summaries_exact(db)
+
+
+def test_import_keeps_summaries_exact(db, agent_ids):
+    rows = [["address", "type", "bedrooms", "price", "status", "agent_id"]] + [
+        [ADDRESSES[position % len(ADDRESSES)], "Flat", str(position % 3), str(2000000 * position), "Available", str(agent_ids[1])]
+        for position in range(30)
+    ]
+    assert import_rows(db, "properties", rows, batch_size=7) == (30, 0)
+    assert_summaries_exact(db)
+
+
+def test_single_writes_keep_summaries_exact(db, agent_ids):
+    db.add_properties_bulk(listing(position, agent_ids[position % 3]) for position in range(40))
+    first = db.add_property("9 Park Street, Kolkata", "Villa", 3, 2, 30000000, "Available", agent_ids[0], "")
+    second = db.add_property("2 Anna Salai, Chennai", "Plot", None, None, None, "Sold", None, "", 13.06, 80.26)
+    inquiry = db.add_inquiry("Asha", "98450 12345", first, "New", "", agent_ids[0])
+    assert_summaries_exact(db)
+
+    # Changing any grouping key or value moves the listing between groups
+    db.update_property(first, "9 Park Street, Kolkata", "Apartment", 2, 1.5, 4000000, "Sold", agent_ids[2], "")
+    db.update_property(second, "7 FC Road, Shivajinagar, Pune", "Plot", 1, 1, 900000, "Available", agent_ids[1], "")
+    db.update_inquiry(inquiry, "Asha", "98450 12345", second, "Contacted", "", None)
+    assert_summaries_exact(db)
+
+    # Deleting the last listing of a group removes the group
+    db.delete_property(first)
+    db.delete_property(second)
+    db.delete_agent(agent_ids[1])
+    assert_summaries_exact(db)
@@ -0,0 +1,425 @@
+from collections import OrderedDict
+from tkinter import ttk
+
+# Formatted rows kept in memory per tree, least recently shown evicted first
+ROW_CACHE_SIZE = 2000
+
+# Rows fetched beyond each edge of the visible window, so short scrolls hit the cache
+PREFETCH_ROWS = 100
+
+# Shown in a row whose data hasn't arrived from the database yet
+LOADING_TEXT = "Loading..."
+
+# Rows moved per mouse wheel notch
+WHEEL_ROWS = 3
+
+
+class VirtualTreeview(ttk.Treeview):
+    def __init__(self, master, format_rows, executor, on_error=None, changes=None, sort_column=None, **kw):
+        """A Treeview that only creates items for the rows currently on screen
+
+        The full result is held as an ordered list of database ids; row data is
+        fetched a page at a time as the list scrolls and kept in a fixed-size
+        cache. Items are keyed by database id, and selection(), item() and
+        <<TreeviewSelect>> bindings behave as on a plain Treeview even when the
+        selected row has scrolled out of view.
+
+        format_rows(rows) returns the display values for a batch of database
+        rows (see presenters.py) and executor is the app's QueryExecutor;
+        on_error(exc) reports failed calls.
+        changes(after_seq) is the table's Database.get_changes, used by refresh().
+        Rows added by refresh() go to the top (the listings are newest first)
+        unless sort_column is given, in which case the id list is reloaded.
+        """
+        super().__init__(master, **kw)
+        self.format_rows = format_rows
+        self.executor = executor
+        self.on_error = on_error
+        self.changes = changes
+        self.sort_column = sort_column
+
+        self._ids = []
+        self._id_set = set()
+        self._top = 0
+        self._cache = OrderedDict()
+        self._rendered = {}
+        self._selection = ()
+        self._pinned = {}
+        self._select_handlers = []
+        self._yscrollcommand = None
+        self._make_ids = None
+        self._fetch_by_ids = None
+        self._incremental = False
+        self._seq = None
+        self._generation = 0
+        self._complete = True
+        self._partial = False
+
+        super().bind("<<TreeviewSelect>>", self._on_select)
+        super().bind("<Configure>", lambda event: self._render())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            super().bind(sequence, self._on_wheel)
+        for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            super().bind(sequence, self._on_key)
+
+    # Loading
+    def load(self, make_ids, fetch_by_ids, incremental=True, keep_position=False, first_ids=None):
+        """Show the rows whose ids make_ids() returns, in that order
+
+        make_ids() and fetch_by_ids(ids) run on a worker thread; fetch_by_ids
+        returns the database rows for the given ids (in any order) that belong
+        in the view, and is called for each page as it scrolls into view. Pass
+        incremental=False when fetch_by_ids can't tell whether a row still
+        belongs (search results), so refresh() reloads the ids instead. A newer
+        load discards an older one still in flight.
+
+        first_ids(), when given, quickly returns the start of make_ids()'s
+        result; it is shown while the full list is still loading.
+        """
+        self._generation += 1
+        generation = self._generation
+        self._make_ids = make_ids
+        self._fetch_by_ids = fetch_by_ids
+        self._incremental = incremental
+        self._complete = False
+        self._partial = False
+        self.executor.cancel((self, "first"))
+        self.executor.cancel((self, "page"))
+
+        if first_ids is not None:
+            self.executor.submit(
+                first_ids,
+                key=(self, "first"),
+                on_success=lambda ids: self._set_first_ids(generation, keep_position, ids),
+                on_error=self.on_error,
+            )
+
+        def fetch_ids():
+            # Read the change position first, so nothing committed meanwhile is missed
+            seq = self.changes(None)[0] if self.changes else None
+            return seq, list(make_ids())
+
+        self.executor.submit(
+            fetch_ids,
+            key=(self, "ids"),
+            on_success=lambda result: self._set_ids(generation, keep_position, *result),
+            on_error=self.on_error,
+        )
+
+    def _set_first_ids(self, generation, keep_position, ids):
+        """Show the start of a list whose full id list is still loading"""
+        if generation != self._generation or self._complete:
+            return
+        self._partial = True
+        self._install_ids(ids, keep_position, True)
+
+    def _set_ids(self, generation, keep_position, seq, ids):
+        """Install a freshly loaded id list"""
+        if generation != self._generation:
+            return
+        # When the first ids are already on screen their cached rows and the
+        # scroll position still hold
+        partial = self._partial
+        self._partial = False
+        self._complete = True
+        self._seq = seq
+        self._install_ids(ids, keep_position or partial, not partial)
+
+    def _install_ids(self, ids, keep_position, clear_cache):
+        """Replace the id list and redraw"""
+        if clear_cache:
+            self._cache.clear()
+        self._ids = ids
+        self._id_set = set(ids)
+        # As on a reloaded Treeview, rows that are gone can't stay selected
+        self._selection = tuple(iid for iid in self._selection if int(iid) in self._id_set)
+        if not keep_position:
+            self._top = 0
+        self._render()
+
+    def refresh(self):
+        """Bring the list up to date, refetching only the rows that changed since the last load
+
+        Changed rows are updated in the cache and on screen, deleted ones (and
+        ones no longer matching the view's filter) dropped and new ones added,
+        keeping the scroll position and selection. Falls back to reloading the
+        id list when the change set is too large or the list is sorted on a
+        column that may have changed.
+        """
+        if self._make_ids is None:
+            return
+        if self._seq is None or not self._incremental or self.sort_column is not None:
+            self.load(self._make_ids, self._fetch_by_ids, self._incremental, keep_position=True)
+            return
+
+        generation = self._generation
+        after_seq = self._seq
+        fetch_by_ids = self._fetch_by_ids
+
+        def fetch_changes():
+            seq, changes = self.changes(after_seq)
+            if not changes:
+                return seq, changes, []
+            return seq, changes, fetch_by_ids(list(changes))
+
+        self.executor.submit(
+            fetch_changes,
+            key=(self, "ids"),
+            on_success=lambda result: self._apply_changes(generation, *result),
+            on_error=self.on_error,
+        )
+
+    def invalidate(self):
+        """Refetch the rows on screen, e.g. after a change to a table the rows join to"""
+        self._cache.clear()
+        self._render()
+
+    def _apply_changes(self, generation, seq, changes, rows):
+        """Apply fetched changes to the id list and cache"""
+        if generation != self._generation:
+            return
+        if changes is None:
+            self.load(self._make_ids, self._fetch_by_ids, self._incremental, keep_position=True)
+            return
+
+        self._seq = seq
+        current = {row[0]: values for row, values in zip(rows, self.format_rows(rows))}
+        for row_id in changes:
+            values = current.get(row_id)
+            if values is None:
+                # Deleted, or no longer matches the view's filter
+                self._remove_id(row_id)
+                continue
+
+            if row_id not in self._id_set:
+                self._ids.insert(0, row_id)
+                self._id_set.add(row_id)
+                # Keep the rows on screen where they are unless already at the top
+                if self._top:
+                    self._top += 1
+            self._cache_values(row_id, values)
+        self._render()
+
+    def _remove_id(self, row_id):
+        """Drop a row from the list, keeping the rows on screen in place"""
+        if row_id in self._id_set:
+            if self._ids.index(row_id) < self._top:
+                self._top -= 1
+            self._ids.remove(row_id)
+            self._id_set.discard(row_id)
+        self._cache.pop(row_id, None)
+        self._selection = tuple(iid for iid in self._selection if iid != str(row_id))
+        self._pinned.pop(row_id, None)
+
+    def _fetch_page(self, ids):
+        """Fetch rows missing from the cache in the background"""
+        generation = self._generation
+        fetch_by_ids = self._fetch_by_ids
+        self.executor.submit(
+            fetch_by_ids,
+            ids,
+            key=(self, "page"),
+            on_success=lambda rows: self._page_fetched(generation, ids, rows),
+            on_error=self.on_error,
+        )
+
+    def _page_fetched(self, generation, ids, rows):
+        """Cache a fetched page and redraw"""
+        if generation != self._generation:
+            return
+        for row, values in zip(rows, self.format_rows(rows)):
+            self._cache_values(row[0], values)
+        # Rows deleted since the id list was loaded come back missing
+        found = {row[0] for row in rows}
+        for row_id in ids:
+            if row_id not in found:
+                self._remove_id(row_id)
+        self._render()
+
+    def _cache_values(self, row_id, values):
+        """Store display values, evicting the least recently used rows beyond ROW_CACHE_SIZE"""
+        self._cache[row_id] = values
+        self._cache.move_to_end(row_id)
+        if row_id in self._pinned:
+            self._pinned[row_id] = values
+        while len(self._cache) > ROW_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    # Drawing
+    def _visible_rows(self):
+        """Return how many rows fit in the widget at its current size"""
+        children = super().get_children()
+        bbox = super().bbox(children[0]) if children else None
+        if bbox:
+            heading, row_height = bbox[1], bbox[3]
+        else:
+            row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+            heading = row_height if "headings" in str(self.cget("show")) else 0
+        height = self.winfo_height()
+        if height <= 1:
+            # Not mapped yet; fall back to the configured height in rows
+            return int(self.cget("height"))
+        return max(1, (height - heading) // row_height)
+
+    def _render(self):
+        """Create items for the rows in view, reusing the ones already there"""
+        visible = self._visible_rows()
+        self._top = max(0, min(self._top, len(self._ids) - visible))
+        window = self._ids[self._top:self._top + visible]
+
+        missing = [row_id for row_id in window if row_id not in self._cache]
+        if missing and self._fetch_by_ids is not None:
+            start = max(0, self._top - PREFETCH_ROWS)
+            end = self._top + visible + PREFETCH_ROWS
+            self._fetch_page([row_id for row_id in self._ids[start:end] if row_id not in self._cache])
+
+        wanted = {str(row_id) for row_id in window}
+        stale = [iid for iid in super().get_children() if iid not in wanted]
+        if stale:
+            super().delete(*stale)
+            for iid in stale:
+                self._rendered.pop(int(iid), None)
+        for index, row_id in enumerate(window):
+            values = self._cache.get(row_id)
+            if values is not None:
+                self._cache.move_to_end(row_id)
+            elif row_id in self._rendered:
+                # Keep showing the old values until the refetched page arrives
+                values = self._rendered[row_id]
+            else:
+                values = (row_id, LOADING_TEXT)
+
+            if row_id in self._rendered:
+                if super().index(row_id) != index:
+                    super().move(row_id, "", index)
+                if self._rendered[row_id] != values:
+                    super().item(row_id, values=values)
+            else:
+                super().insert("", index, iid=row_id, values=values)
+            self._rendered[row_id] = values
+
+        # Re-show the selection on rows that scrolled back into view, unless the
+        # user has just changed it and <<TreeviewSelect>> hasn't been handled yet
+        current = super().selection()
+        shown = tuple(iid for iid in self._selection if iid in wanted)
+        if all(iid in self._selection for iid in current) and tuple(current) != shown:
+            super().selection_set(shown)
+
+        if self._yscrollcommand:
+            total = len(self._ids)
+            if total:
+                self._yscrollcommand(self._top / total, min(1.0, (self._top + visible) / total))
+            else:
+                self._yscrollcommand(0.0, 1.0)
+
+    # Scrolling
+    def yview(self, *args):
+        """Scroll the virtual list (the Scrollbar command) or return the visible fraction"""
+        total = len(self._ids)
+        visible = self._visible_rows()
+        if not args:
+            if not total:
+                return 0.0, 1.0
+            return self._top / total, min(1.0, (self._top + visible) / total)
+
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = visible if args[2] == "pages" else 1
+            self._top += int(args[1]) * step
+        self._render()
+
+    def yview_scroll(self, number, what):
+        self.yview("scroll", number, what)
+
+    def yview_moveto(self, fraction):
+        self.yview("moveto", fraction)
+
+    def see(self, item):
+        """Scroll so that the row with database id `item` is visible"""
+        row_id = int(item)
+        if row_id not in self._id_set:
+            return
+        index = self._ids.index(row_id)
+        visible = self._visible_rows()
+        if index < self._top or index >= self._top + visible:
+            self._top = index
+            self._render()
+
+    def configure(self, cnf=None, **kw):
+        """Keep yscrollcommand for the virtual scroll position instead of passing it to Tk"""
+        if isinstance(cnf, dict) and "yscrollcommand" in cnf:
+            cnf = dict(cnf)
+            self._yscrollcommand = cnf.pop("yscrollcommand")
+        if "yscrollcommand" in kw:
+            self._yscrollcommand = kw.pop("yscrollcommand")
+            self._render()
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def _on_wheel(self, event):
+        """Scroll a few rows per mouse wheel notch"""
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.yview("scroll", -WHEEL_ROWS, "units")
+        else:
+            self.yview("scroll", WHEEL_ROWS, "units")
+        return "break"
+
+    def _on_key(self, event):
+        """Scroll the list when keyboard navigation runs past the rows on screen"""
+        children = super().get_children()
+        focus = super().focus()
+        if event.keysym == "Up" and children and focus == children[0]:
+            self.yview("scroll", -1, "units")
+        elif event.keysym == "Down" and children and focus == children[-1]:
+            self.yview("scroll", 1, "units")
+        elif event.keysym == "Prior":
+            self.yview("scroll", -1, "pages")
+        elif event.keysym == "Next":
+            self.yview("scroll", 1, "pages")
+        elif event.keysym == "Home":
+            self.yview("moveto", 0)
+        elif event.keysym == "End":
+            self.yview("moveto", 1)
+        # Let the Treeview class binding move the focus and selection as usual
+
+    # Selection
+    def bind(self, sequence=None, func=None, add=None):
+        """Route <<TreeviewSelect>> handlers through the virtual selection tracking"""
+        if sequence == "<<TreeviewSelect>>":
+            if not add:
+                self._select_handlers = []
+            if func:
+                self._select_handlers.append(func)
+            return None
+        return super().bind(sequence, func, add)
+
+    def _on_select(self, event):
+        """Track the selection by database id; pass user changes on to the handlers
+
+        Scrolling deletes and recreates items, which makes Tk report selection
+        changes the user didn't make; those are recognised and not passed on.
+        """
+        shown = tuple(super().selection())
+        on_screen = set(super().get_children())
+        expected = tuple(iid for iid in self._selection if iid in on_screen)
+        if shown == expected:
+            return
+        self._selection = shown
+        self._pinned = {int(iid): self._cache.get(int(iid)) for iid in shown}
+        for handler in self._select_handlers:
+            handler(event)
+
+    def selection(self):
+        """Return the selected database ids (as strings), including rows scrolled out of view"""
+        return self._selection
+
+    def item(self, item, option=None, **kw):
+        """As Treeview.item; the values of a selected row are available even when it's off screen"""
+        if isinstance(item, (tuple, list)):
+            item = item[0]
+        if option == "values" and not kw and not super().exists(item):
+            values = self._pinned.get(int(item)) or self._cache.get(int(item))
+            return values if values is not None else (item,)
+        return super().item(item, option, **kw)